@@ -0,0 +1,200 @@
+"""
+Incremental A/B aggregation:
+- Read impression logs chunk by chunk (only user_id / clicked / revenue)
+- Keep per-arm sufficient statistics: impressions, clicks, revenue sum and sum of squares
+- Persist them with per-source watermarks (byte offset for CSV, row count for Parquet/Feather),
+  so a daily readout only reads rows it hasn't seen
+- CTR z-test, sample ratio mismatch and RPM normal-approximation CI are computed from the stats alone
+
+Sources are treated as append-only: rows already counted are skipped.
+"""
+
+import io
+import json
+import os
+import numpy as np
+import pandas as pd
+from scipy import stats
+from utils import assign_user, save_json
+from storage import resolve_path, iter_dataset
+from ab_test import two_sample_z_test, expected_counts, arm_summary, sample_ratio_mismatch, TREATMENT_PCT, ALPHA
+
+DATA_IN = "data/raw/synthetic_ads.csv"
+STATE_JSON = "reports/ab_state.json"
+OUT_JSON = "reports/ab_results_incremental.json"
+CHUNK_ROWS = 100000
+CHUNK_BYTES = 16 << 20  # CSV sources are parsed in blocks of whole lines of about this size
+STAT_KEYS = ["impressions", "clicks", "revenue", "revenue_sq"]
+
+def empty_state(treatment_pct=TREATMENT_PCT):
+    return {"treatment_pct": treatment_pct, "arms": {}, "sources": {}}
+
+def load_state(path=STATE_JSON, treatment_pct=TREATMENT_PCT):
+    if not os.path.exists(path):
+        return empty_state(treatment_pct)
+    state = json.load(open(path))
+    if state["treatment_pct"] != treatment_pct:
+        raise ValueError(f"State at {path} was built with treatment_pct={state['treatment_pct']}, "
+                         f"not {treatment_pct}; start a new state file")
+    return state
+
+def save_state(state, path=STATE_JSON):
+    tmp = path + ".tmp"
+    save_json(tmp, state)
+    os.replace(tmp, path)
+
+def chunk_stats(chunk, treatment_pct):
+    """Per-arm sufficient statistics for one chunk of impressions."""
+    users = chunk["user_id"]
+    arm_of = {u: assign_user(u, pct_treatment=treatment_pct) for u in pd.unique(users)}
+    rev = chunk["revenue"].astype(float)
+    g = pd.DataFrame({
+        "assignment": users.map(arm_of),
+        "clicks": chunk["clicked"].astype(np.int64),
+        "revenue": rev,
+        "revenue_sq": rev * rev,
+    }).groupby("assignment")
+    agg = g.sum()
+    agg["impressions"] = g.size()
+    return {arm: {"impressions": int(row["impressions"]), "clicks": int(row["clicks"]),
+                  "revenue": float(row["revenue"]), "revenue_sq": float(row["revenue_sq"])}
+            for arm, row in agg.iterrows()}
+
+def merge_stats(state, part):
+    for arm, st in part.items():
+        acc = state["arms"].setdefault(arm, {k: 0 for k in STAT_KEYS})
+        for k in STAT_KEYS:
+            acc[k] += st[k]
+
+def update_from_dataset(state, data_path, chunksize=CHUNK_ROWS):
+    """Fold rows of data_path past its watermark into state. Returns the number of new rows."""
+    if resolve_path(data_path).endswith(".csv"):
+        return update_from_csv(state, data_path)
+    # Parquet/Feather files are written whole: skip the rows already counted
+    seen = state["sources"].get(data_path, {}).get("rows", 0)
+    new_rows, pos = 0, 0
+    for chunk in iter_dataset(data_path, columns=["user_id", "clicked", "revenue"], chunksize=chunksize):
+        skip = min(len(chunk), max(0, seen - pos))
+        pos += len(chunk)
+        if skip < len(chunk):
+            chunk = chunk.iloc[skip:]
+            merge_stats(state, chunk_stats(chunk, state["treatment_pct"]))
+            new_rows += len(chunk)
+    state["sources"][data_path] = {"rows": seen + new_rows}
+    return new_rows
+
+def _line_end(f, start, stop, block_bytes=CHUNK_BYTES):
+    """Offset just past the last newline in [start, stop), or start if there is none."""
+    pos = stop
+    while pos > start:
+        n = min(block_bytes, pos - start)
+        pos -= n
+        f.seek(pos)
+        i = f.read(n).rfind(b"\n")
+        if i >= 0:
+            return pos + i + 1
+    return start
+
+def _skip_lines(f, start, n_lines):
+    """Offset after the first n_lines complete lines from start (a watermark kept as a row count)."""
+    f.seek(start)
+    for _ in range(n_lines):
+        if not f.readline().endswith(b"\n"):
+            raise ValueError(f"{f.name} has fewer rows than its saved watermark; sources must be append-only")
+    return f.tell()
+
+def _line_blocks(f, start, stop, block_bytes=CHUNK_BYTES):
+    """Bytes [start, stop) in blocks of whole lines (stop must sit right after a newline)."""
+    f.seek(start)
+    carry = b""
+    while start < stop:
+        data = f.read(min(block_bytes, stop - start))
+        start += len(data)
+        data = carry + data
+        cut = data.rfind(b"\n") + 1
+        if cut:
+            yield data[:cut]
+        carry = data[cut:]
+
+def update_from_csv(state, data_path, block_bytes=CHUNK_BYTES):
+    """Fold complete rows of data_path past its byte watermark into state. Returns the number of new rows.
+
+    Only bytes up to the last newline present when the readout starts are read: rows appended
+    meanwhile and a partially written last line are left for the next readout.
+    """
+    src = state["sources"].get(data_path, {"rows": 0})
+    size = os.path.getsize(data_path)
+    if size < src.get("bytes", 0):
+        raise ValueError(f"{data_path} shrank since the last readout; sources must be append-only")
+
+    new_rows = 0
+    with open(data_path, "rb") as f:
+        header = f.readline()
+        if "bytes" in src:
+            start = max(src["bytes"], len(header))
+        else:
+            # watermark saved from a Parquet/Feather sibling: re-derive the byte offset from its row count
+            start = _skip_lines(f, len(header), src["rows"])
+        stop = _line_end(f, start, size, block_bytes)
+        names = header.decode("utf-8").strip().split(",")
+        for block in _line_blocks(f, start, stop, block_bytes):
+            chunk = pd.read_csv(io.BytesIO(block), header=None, names=names,
+                                usecols=["user_id", "clicked", "revenue"])
+            merge_stats(state, chunk_stats(chunk, state["treatment_pct"]))
+            new_rows += len(chunk)
+    state["sources"][data_path] = {"rows": src["rows"] + new_rows, "bytes": stop}
+    return new_rows
+
+def rpm_normal_ci(a, b, alpha=ALPHA):
+    """Welch CI for the difference in mean per-impression revenue (a - b) from sums and sums of squares."""
+    def mean_var(st):
+        n = st["impressions"]
+        mean = st["revenue"] / n
+        var = (st["revenue_sq"] - n * mean * mean) / (n - 1) if n > 1 else 0.0
+        return mean, max(var, 0.0), n
+    ma, va, na = mean_var(a)
+    mb, vb, nb = mean_var(b)
+    diff = ma - mb
+    se = np.sqrt(va / na + vb / nb)
+    z = stats.norm.ppf(1 - alpha / 2)
+    return {"mean_diff": float(diff), "ci": [float(diff - z * se), float(diff + z * se)]}
+
+def readout(state):
+    arms = state["arms"]
+    summary = {arm: arm_summary(int(st["impressions"]), int(st["clicks"]), float(st["revenue"]))
+               for arm, st in arms.items()}
+    n_total = int(sum(st["impressions"] for st in arms.values()))
+    total_expected = expected_counts(n_total, state["treatment_pct"])
+
+    results = {
+        "n_total": n_total,
+        "treatment_pct": state["treatment_pct"],
+        "expected_counts": total_expected,
+        "summary": summary,
+        "sample_ratio_mismatch": sample_ratio_mismatch(summary, total_expected),
+        "sources": state["sources"],
+    }
+    if "treatment" in arms and "control" in arms:
+        results["ctr_ztest"] = two_sample_z_test(
+            summary["treatment"]["clicks"], summary["treatment"]["impressions"],
+            summary["control"]["clicks"], summary["control"]["impressions"]
+        )
+        results["rpm_normal_ci"] = rpm_normal_ci(arms["treatment"], arms["control"])
+    return results
+
+def run_incremental_ab(data_paths=(DATA_IN,), state_path=STATE_JSON, out_json=OUT_JSON,
+                       treatment_pct=TREATMENT_PCT):
+    state = load_state(state_path, treatment_pct)
+    for p in data_paths:
+        n_new = update_from_dataset(state, p)
+        print(f"Folded {n_new} new rows from {p}")
+    save_state(state, state_path)
+
+    results = readout(state)
+    save_json(out_json, results)
+    print("Incremental A/B results saved to", out_json)
+    return results
+
+if __name__ == "__main__":
+    import pprint
+    pprint.pprint(run_incremental_ab())
@@ -5,7 +5,7 @@ A/B testing driver:
 - Log impressions and clicks to a results DataFrame
 - Aggregate metrics per arm and run statistical tests:
     - CTR two-sample z-test
-    - RPM bootstrap CI on mean diff
+    - RPM bootstrap CI on mean diff (vectorized, see bootstrap.py)
 - Detect sample ratio mismatch
 - Handle delayed clicks: if simulate_delay=True, some clicks come late; we show evaluation with/without delay window
 """
@@ -18,7 +18,11 @@ from joblib import load
 from utils import assign_user, save_json
 import os, random
 from utils import prepare_dicts, to_dense
-from data_generator import base_ctr
+from columnar import upgrade_pipeline, is_columnar
+from storage import read_dataset
+from batch_scoring import predict_in_batches
+from bootstrap import bootstrap_mean_diff_batched
+from data_generator import base_ctr_array
 import pprint
 
 random.seed(42)
@@ -32,6 +36,8 @@ OUT_JSON = "reports/ab_results.json"
 TREATMENT_PCT = 0.5
 EVAL_DELAY_WINDOW = 0
 BOOTSTRAP_ITERS = 10000
+BOOTSTRAP_MEMORY_MB = 256  # cap on resample blocks held in memory at once
+BOOTSTRAP_JOBS = 1  # >1 fans resample units out over a process pool
 ALPHA = 0.05
 
 def try_load_model(path):
@@ -43,8 +49,13 @@ def try_load_model(path):
     return None
 
 def predict_pctr_from_model(pipe, df):
-    # Expects pipe to accept list-of-dicts like baseline
-    
+    # Columnar featurization when pipe has a DictVectorizer/ColumnarVectorizer "vec" step;
+    # scoring errors on that path propagate instead of silently re-scoring through dicts
+    columnar = upgrade_pipeline(pipe)
+    if is_columnar(columnar):
+        return predict_in_batches(columnar, df)
+
+    # Otherwise expects pipe to accept list-of-dicts like baseline
     X = prepare_dicts(df)
     try:
         proba = pipe.predict_proba(X)[:,1]
@@ -67,6 +78,7 @@ def two_sample_z_test(count1, n1, count2, n2):
     return {"z": float(z), "p_value": float(p), "p1": p1, "p2": p2}
 
 def bootstrap_mean_diff(a, b, iters=2000, seed=42):
+    # Reference per-iteration loop; run_ab_test uses bootstrap.bootstrap_mean_diff_batched
     rng = np.random.RandomState(seed)
     diffs = []
     a = np.array(a)
@@ -82,9 +94,37 @@ def bootstrap_mean_diff(a, b, iters=2000, seed=42):
     hi = np.percentile(diffs, 100*(1-ALPHA/2))
     return {"mean_diff": float(diffs.mean()), "ci": [float(lo), float(hi)]}
 
+def expected_counts(n_total, treatment_pct):
+    expected_control = int(n_total * (1 - treatment_pct))
+    return {"control": expected_control, "treatment": n_total - expected_control}
+
+def arm_summary(impressions, clicks, revenue):
+    ctr = clicks / impressions if impressions>0 else 0.0
+    rpm = (revenue / impressions) * 1000 if impressions>0 else 0.0
+    return {
+        "impressions": impressions,
+        "clicks": clicks,
+        "revenue": revenue,
+        "ctr": ctr,
+        "rpm": rpm
+    }
+
+def sample_ratio_mismatch(summary, total_expected, tolerance=0.02):
+    actual_control = summary.get("control", {}).get("impressions", 0)
+    actual_treatment = summary.get("treatment", {}).get("impressions", 0)
+    mismatch = {}
+    def pct_diff(actual, expected):
+        if expected == 0: return np.nan
+        return (actual - expected) / expected
+    mismatch["control_pct_diff"] = pct_diff(actual_control, total_expected["control"])
+    mismatch["treatment_pct_diff"] = pct_diff(actual_treatment, total_expected["treatment"])
+    # flag if magnitude > tolerance (2%)
+    mismatch["flag"] = (abs(mismatch["control_pct_diff"]) > tolerance) or (abs(mismatch["treatment_pct_diff"]) > tolerance)
+    return mismatch
+
 def run_ab_test(data_path=DATA_IN, model_path=MODEL_PATH, out_json=OUT_JSON,
-                treatment_pct=TREATMENT_PCT, bootstrap_iters=BOOTSTRAP_ITERS):
-    df = pd.read_csv(data_path)
+                treatment_pct=TREATMENT_PCT, bootstrap_iters=BOOTSTRAP_ITERS, bootstrap_jobs=BOOTSTRAP_JOBS):
+    df = read_dataset(data_path)
     df["assignment"] = df["user_id"].apply(lambda u: assign_user(u, pct_treatment=treatment_pct))
     # optional: predict pCTR using saved model
     pipe = try_load_model(model_path)
@@ -94,9 +134,9 @@ def run_ab_test(data_path=DATA_IN, model_path=MODEL_PATH, out_json=OUT_JSON,
             print("Used saved model for pCTR.")
         except Exception as e:
             print("Model present but error predicting:", e)
-            df["pctr"] = df.apply(lambda r: base_ctr(r.age_bucket, r.interests, r.creative_type, r.hour_of_day), axis=1)
+            df["pctr"] = base_ctr_array(df["age_bucket"], df["interests"], df["creative_type"], df["hour_of_day"])
     else:
-        df["pctr"] = df.apply(lambda r: base_ctr(r.age_bucket, r.interests, r.creative_type, r.hour_of_day), axis=1)
+        df["pctr"] = base_ctr_array(df["age_bucket"], df["interests"], df["creative_type"], df["hour_of_day"])
 
     # Optionally simulate delayed clicks: add click_delay seconds to some clicks
     # For demo we don't actually shift timestamps, but we can mark some clicks as 'delayed'
@@ -112,40 +152,16 @@ def run_ab_test(data_path=DATA_IN, model_path=MODEL_PATH, out_json=OUT_JSON,
     # Basic aggregates per arm
     arms = logs["assignment"].unique().tolist()
     summary = {}
-    total_expected = {"control": 0, "treatment": 0}
     # Expected counts by deterministic assignment
     n_total = len(logs)
-    expected_control = int(n_total * (1 - treatment_pct))
-    expected_treatment = n_total - expected_control
-    total_expected["control"] = expected_control
-    total_expected["treatment"] = expected_treatment
+    total_expected = expected_counts(n_total, treatment_pct)
 
     for arm in arms:
         sub = logs[logs["assignment"] == arm]
-        impressions = len(sub)
-        clicks = int(sub["clicked"].sum())
-        revenue = float(sub["revenue"].sum())
-        ctr = clicks / impressions if impressions>0 else 0.0
-        rpm = (revenue / impressions) * 1000 if impressions>0 else 0.0
-        summary[arm] = {
-            "impressions": impressions,
-            "clicks": clicks,
-            "revenue": revenue,
-            "ctr": ctr,
-            "rpm": rpm
-        }
+        summary[arm] = arm_summary(len(sub), int(sub["clicked"].sum()), float(sub["revenue"].sum()))
 
     # Sample ratio mismatch detection
-    actual_control = summary.get("control", {}).get("impressions", 0)
-    actual_treatment = summary.get("treatment", {}).get("impressions", 0)
-    mismatch = {}
-    def pct_diff(actual, expected):
-        if expected == 0: return np.nan
-        return (actual - expected) / expected
-    mismatch["control_pct_diff"] = pct_diff(actual_control, total_expected["control"])
-    mismatch["treatment_pct_diff"] = pct_diff(actual_treatment, total_expected["treatment"])
-    # flag if magnitude > 0.02 (2%)
-    mismatch["flag"] = (abs(mismatch["control_pct_diff"]) > 0.02) or (abs(mismatch["treatment_pct_diff"]) > 0.02)
+    mismatch = sample_ratio_mismatch(summary, total_expected)
 
     # Statistical tests
     z_res = two_sample_z_test(
@@ -156,7 +172,8 @@ def run_ab_test(data_path=DATA_IN, model_path=MODEL_PATH, out_json=OUT_JSON,
     # Bootstrap for RPM mean difference: we bootstrap per-impression revenue (many zeros)
     rev_treatment = logs[logs["assignment"] == "treatment"]["revenue"].values
     rev_control = logs[logs["assignment"] == "control"]["revenue"].values
-    rpm_boot = bootstrap_mean_diff(rev_treatment, rev_control, iters=bootstrap_iters)
+    rpm_boot = bootstrap_mean_diff_batched(rev_treatment, rev_control, iters=bootstrap_iters, alpha=ALPHA,
+                                           memory_cap_mb=BOOTSTRAP_MEMORY_MB, n_jobs=bootstrap_jobs)
 
     results = {
         "n_total": n_total,
@@ -0,0 +1,189 @@
+"""
+Array-native offline evaluation (NumPy only, optional per-row weights):
+- evaluate() derives AUC, log-loss, Brier, the calibration table and the lift curve from one argsort
+- calibration_bins / top_k_ctr back eval_utils.calibration_table / decile_lift with identical output
+  (equal-count buckets like np.array_split; top-k via argpartition instead of a full sort)
+- StreamingEvaluator accumulates score histograms (HIST_BINS equal-width bins in logit space, so the
+  few-percent CTR range is finely resolved) chunk by chunk and merges them across workers, for eval
+  sets that do not fit in memory; log-loss and Brier stay exact, AUC / calibration / lift are binned
+"""
+
+import numpy as np
+
+HIST_BINS = 10000
+LOGIT_RANGE = 12.0  # histogram covers logits in [-12, 12], i.e. p in about [6e-6, 1 - 6e-6]
+CALIBRATION_BINS = 10
+LIFT_POINTS = 10
+
+def _weights(w, n):
+    return np.ones(n) if w is None else np.asarray(w, dtype=float)
+
+def _bucket_edges(n, bins, cum_w=None):
+    """Row offsets of `bins` buckets: equal counts (np.array_split sizes) or equal cumulative weight."""
+    if cum_w is None:
+        q, r = divmod(n, bins)
+        return np.concatenate([[0], np.cumsum([q + 1] * r + [q] * (bins - r))]).astype(np.int64)
+    targets = cum_w[-1] * np.arange(1, bins) / bins
+    return np.concatenate([[0], np.searchsorted(cum_w, targets, side="right"), [n]]).astype(np.int64)
+
+def calibration_bins(y_true, y_prob, bins=CALIBRATION_BINS, w=None, order=None):
+    """Buckets of ascending score: {"bucket", "avg_pred", "avg_true", "count"} (+ "weight" if weighted)."""
+    y = np.asarray(y_true, dtype=float)
+    p = np.asarray(y_prob, dtype=float)
+    order = np.argsort(p, kind="stable") if order is None else order
+    y, p = y[order], p[order]
+    ws = None if w is None else _weights(w, len(y))[order]
+    edges = _bucket_edges(len(y), bins, None if ws is None else np.cumsum(ws))
+
+    rows = []
+    for i in range(bins):
+        s = slice(edges[i], edges[i + 1])
+        if ws is None:
+            rows.append({"bucket": i, "avg_pred": np.mean(p[s]), "avg_true": np.mean(y[s]), "count": int(s.stop - s.start)})
+        else:
+            total = ws[s].sum()
+            rows.append({"bucket": i, "avg_pred": np.dot(ws[s], p[s]) / total, "avg_true": np.dot(ws[s], y[s]) / total,
+                         "count": int(s.stop - s.start), "weight": total})
+    return rows
+
+def top_k_ctr(y_true, y_prob, k, w=None):
+    """(Weighted) CTR of the k highest-scored rows; ties at the cut are broken arbitrarily."""
+    y = np.asarray(y_true, dtype=float)
+    if k <= 0:
+        return float("nan")
+    top = np.argpartition(-np.asarray(y_prob, dtype=float), k - 1)[:k] if k < len(y) else slice(None)
+    if w is None:
+        return y[top].mean()
+    ws = _weights(w, len(y))[top]
+    return np.dot(ws, y[top]) / ws.sum()
+
+def lift_curve(y_true, y_prob, points=LIFT_POINTS, w=None, order=None):
+    """CTR and lift over the overall CTR of the top 1/points, 2/points, ... of rows by score."""
+    y = np.asarray(y_true, dtype=float)
+    order = np.argsort(np.asarray(y_prob, dtype=float), kind="stable") if order is None else order
+    desc = order[::-1]
+    ws = _weights(w, len(y))[desc]
+    cum_w, cum_c = np.cumsum(ws), np.cumsum(ws * y[desc])
+    overall = cum_c[-1] / cum_w[-1]
+    rows = []
+    for i in range(1, points + 1):
+        k = max(1, int(len(y) * i / points))
+        ctr = cum_c[k - 1] / cum_w[k - 1]
+        rows.append({"fraction": i / points, "ctr": ctr, "lift": ctr / overall if overall else float("nan")})
+    return rows
+
+def _auc_from_groups(pos, neg):
+    """AUC from per-score-group positive / negative weight in ascending score order (ties count half)."""
+    neg_below = np.cumsum(neg) - neg
+    denom = pos.sum() * neg.sum()
+    return float(np.dot(pos, neg_below + 0.5 * neg) / denom) if denom else float("nan")
+
+def auc(y_true, y_prob, w=None, order=None):
+    y = np.asarray(y_true, dtype=float)
+    p = np.asarray(y_prob, dtype=float)
+    order = np.argsort(p, kind="stable") if order is None else order
+    ps, ys, ws = p[order], y[order], _weights(w, len(y))[order]
+    starts = np.flatnonzero(np.r_[True, ps[1:] != ps[:-1]])
+    return _auc_from_groups(np.add.reduceat(ws * ys, starts), np.add.reduceat(ws * (1 - ys), starts))
+
+def _loss_sums(y, p, ws):
+    eps = np.finfo(float).eps
+    pc = np.clip(p, eps, 1 - eps)
+    ll = -np.dot(ws, y * np.log(pc) + (1 - y) * np.log1p(-pc))
+    return ll, np.dot(ws, (p - y) ** 2)
+
+def log_loss(y_true, y_prob, w=None):
+    y, p = np.asarray(y_true, dtype=float), np.asarray(y_prob, dtype=float)
+    ws = _weights(w, len(y))
+    return float(_loss_sums(y, p, ws)[0] / ws.sum())
+
+def brier(y_true, y_prob, w=None):
+    y, p = np.asarray(y_true, dtype=float), np.asarray(y_prob, dtype=float)
+    ws = _weights(w, len(y))
+    return float(_loss_sums(y, p, ws)[1] / ws.sum())
+
+def evaluate(y_true, y_prob, w=None, bins=CALIBRATION_BINS, lift_points=LIFT_POINTS):
+    """All offline metrics from a single argsort of the scores."""
+    y, p = np.asarray(y_true, dtype=float), np.asarray(y_prob, dtype=float)
+    ws = _weights(w, len(y))
+    order = np.argsort(p, kind="stable")
+    ll, br = _loss_sums(y, p, ws)
+    return {
+        "auc": auc(y, p, w, order),
+        "log_loss": float(ll / ws.sum()),
+        "brier": float(br / ws.sum()),
+        "calibration": calibration_bins(y, p, bins, w, order),
+        "lift": lift_curve(y, p, lift_points, w, order),
+    }
+
+class StreamingEvaluator:
+    """Chunk-by-chunk evaluation over fixed score histograms; update() per chunk, merge() across workers."""
+
+    def __init__(self, hist_bins=HIST_BINS):
+        self.hist_bins = hist_bins
+        self.pos = np.zeros(hist_bins)   # weight of clicks per score bin
+        self.neg = np.zeros(hist_bins)
+        self.pred = np.zeros(hist_bins)  # weighted score sum per bin, for calibration
+        self.rows = np.zeros(hist_bins, dtype=np.int64)
+        self.ll_sum = 0.0
+        self.brier_sum = 0.0
+
+    def update(self, y_true, y_prob, w=None):
+        y, p = np.asarray(y_true, dtype=float), np.asarray(y_prob, dtype=float)
+        ws = _weights(w, len(y))
+        with np.errstate(divide="ignore"):
+            z = np.clip(np.log(p) - np.log1p(-p), -LOGIT_RANGE, LOGIT_RANGE)
+        b = np.minimum(((z + LOGIT_RANGE) / (2 * LOGIT_RANGE) * self.hist_bins).astype(np.int64), self.hist_bins - 1)
+        self.pos += np.bincount(b, ws * y, self.hist_bins)
+        self.neg += np.bincount(b, ws * (1 - y), self.hist_bins)
+        self.pred += np.bincount(b, ws * p, self.hist_bins)
+        self.rows += np.bincount(b, minlength=self.hist_bins)
+        ll, br = _loss_sums(y, p, ws)
+        self.ll_sum += ll
+        self.brier_sum += br
+        return self
+
+    def merge(self, other):
+        self.pos += other.pos
+        self.neg += other.neg
+        self.pred += other.pred
+        self.rows += other.rows
+        self.ll_sum += other.ll_sum
+        self.brier_sum += other.brier_sum
+        return self
+
+    def _calibration(self, bins):
+        weight = self.pos + self.neg
+        cum = np.cumsum(weight)
+        edges = np.searchsorted(cum, cum[-1] * np.arange(1, bins) / bins, side="right")
+        edges = np.concatenate([[0], edges, [self.hist_bins]])
+        rows = []
+        for i in range(bins):
+            s = slice(edges[i], edges[i + 1])
+            total = weight[s].sum()
+            rows.append({"bucket": i, "avg_pred": self.pred[s].sum() / total if total else float("nan"),
+                         "avg_true": self.pos[s].sum() / total if total else float("nan"),
+                         "count": int(self.rows[s].sum()), "weight": total})
+        return rows
+
+    def _lift(self, points):
+        weight, clicks = (self.pos + self.neg)[::-1], self.pos[::-1]
+        cum_w, cum_c = np.cumsum(weight), np.cumsum(clicks)
+        overall = cum_c[-1] / cum_w[-1]
+        rows = []
+        for i in range(1, points + 1):
+            k = min(np.searchsorted(cum_w, cum_w[-1] * i / points), self.hist_bins - 1)
+            ctr = cum_c[k] / cum_w[k]
+            rows.append({"fraction": i / points, "ctr": ctr, "lift": ctr / overall if overall else float("nan")})
+        return rows
+
+    def result(self, bins=CALIBRATION_BINS, lift_points=LIFT_POINTS):
+        total = (self.pos + self.neg).sum()
+        return {
+            "auc": _auc_from_groups(self.pos, self.neg),
+            "log_loss": self.ll_sum / total,
+            "brier": self.brier_sum / total,
+            "calibration": self._calibration(bins),
+            "lift": self._lift(lift_points),
+            "rows": int(self.rows.sum()),
+        }
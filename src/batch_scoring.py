@@ -0,0 +1,84 @@
+"""
+Batch scoring for saved models (pickled pipelines or compact .npz exports):
+- Read a large impressions dataset in fixed-size chunks (only id + feature columns)
+- Featurize + score each chunk, append pCTR to the output CSV as it goes
+- Optionally fan chunks out to a process pool; in-flight chunks are bounded so memory stays flat
+"""
+
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from columnar import upgrade_pipeline, FEATURE_COLUMNS
+from compact_model import load_model
+from storage import iter_dataset
+
+DATA_IN = "data/raw/synthetic_ads.csv"
+MODEL_PATH = "models/best_model.pkl"
+OUT_CSV = "reports/pctr_scores.csv"
+
+CHUNK_ROWS = 50000
+ID_COLUMNS = ["impression_id"]
+
+def load_pipeline(path):
+    return upgrade_pipeline(load_model(path))
+
+def predict_in_batches(pipe, df, batch_size=CHUNK_ROWS):
+    """pCTR for every row of df, featurizing at most batch_size rows at a time."""
+    out = np.empty(len(df), dtype=float)
+    for start in range(0, len(df), batch_size):
+        out[start:start + batch_size] = pipe.predict_proba(df.iloc[start:start + batch_size])[:, 1]
+    return out
+
+# per-process pipeline for the pool workers (loaded once by the initializer)
+_worker_pipe = None
+
+def _init_worker(model_path):
+    global _worker_pipe
+    _worker_pipe = load_pipeline(model_path)
+
+def _score_chunk(chunk):
+    return _worker_pipe.predict_proba(chunk)[:, 1]
+
+def iter_scored_chunks(data_path, model_path, chunksize=CHUNK_ROWS, n_jobs=1, id_columns=ID_COLUMNS):
+    """Yield (ids DataFrame, pCTR array) per chunk, in file order."""
+    reader = iter_dataset(data_path, columns=list(id_columns) + FEATURE_COLUMNS, chunksize=chunksize)
+
+    if n_jobs == 1:
+        pipe = load_pipeline(model_path)
+        for chunk in reader:
+            yield chunk[id_columns], pipe.predict_proba(chunk)[:, 1]
+        return
+
+    with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker, initargs=(model_path,)) as ex:
+        pending = deque()
+        for chunk in reader:
+            pending.append((chunk[id_columns], ex.submit(_score_chunk, chunk[FEATURE_COLUMNS])))
+            if len(pending) >= 2 * n_jobs:
+                ids, fut = pending.popleft()
+                yield ids, fut.result()
+        while pending:
+            ids, fut = pending.popleft()
+            yield ids, fut.result()
+
+def score_csv(data_path=DATA_IN, model_path=MODEL_PATH, out_path=OUT_CSV,
+              chunksize=CHUNK_ROWS, n_jobs=1, id_columns=ID_COLUMNS):
+    if n_jobs is None or n_jobs < 1:
+        n_jobs = os.cpu_count() or 1
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+
+    tmp_path = out_path + ".tmp"
+    n_rows = 0
+    with open(tmp_path, "w", newline="") as f:
+        for ids, pctr in iter_scored_chunks(data_path, model_path, chunksize, n_jobs, id_columns):
+            out = ids.assign(pctr=pctr)
+            out.to_csv(f, header=(n_rows == 0), index=False)
+            n_rows += len(out)
+    os.replace(tmp_path, out_path)
+
+    print(f"✅ Scored {n_rows} rows -> {out_path}")
+    return n_rows
+
+if __name__ == "__main__":
+    score_csv()
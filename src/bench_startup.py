@@ -0,0 +1,68 @@
+"""
+Cold-start benchmark for the serving / orchestration entry points:
+- Every measurement runs in a fresh interpreter, so nothing is cached in sys.modules
+- inference_api: module import + model load, from the pickle and from a compact model snapshot
+- pipeline_driver: module import (stage modules are imported when their step runs)
+- Median over REPEATS runs -> reports/startup_bench.json
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+from utils import save_json
+
+MODEL_PATH = "models/logistic.pkl"
+SNAPSHOT_PATH = "models/serving_snapshot.npz"
+OUT_JSON = "reports/startup_bench.json"
+REPEATS = 5
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+
+PROBE = """
+import json, sys, time, warnings
+warnings.filterwarnings("ignore")
+t0 = time.perf_counter()
+import {module}
+t1 = time.perf_counter()
+{load}
+t2 = time.perf_counter()
+print(json.dumps({{"import_s": t1 - t0, "load_s": t2 - t1, "sklearn_imported": "sklearn" in sys.modules}}))
+"""
+
+def probe(module, load="pass", env=None):
+    env = {**os.environ, **(env or {})}
+    env["PYTHONPATH"] = os.pathsep.join(p for p in [SRC_DIR, env.get("PYTHONPATH")] if p)
+    out = subprocess.run([sys.executable, "-c", PROBE.format(module=module, load=load)],
+                         env=env, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def bench(module, load="pass", env=None, repeats=REPEATS):
+    runs = [probe(module, load, env) for _ in range(repeats)]
+    return {
+        "import_s": statistics.median(r["import_s"] for r in runs),
+        "load_s": statistics.median(r["load_s"] for r in runs),
+        "total_s": statistics.median(r["import_s"] + r["load_s"] for r in runs),
+        "sklearn_imported": runs[-1]["sklearn_imported"],
+        "repeats": repeats,
+    }
+
+def run_startup_bench(model_path=MODEL_PATH, snapshot_path=SNAPSHOT_PATH, out_json=OUT_JSON, repeats=REPEATS):
+    load = "inference_api.load_model()"
+    results = {
+        "pipeline_driver": bench("pipeline_driver", repeats=repeats),
+        "inference_api": bench("inference_api", load, {"MODEL_PATH": model_path, "MODEL_SNAPSHOT": ""}, repeats),
+    }
+    if snapshot_path:
+        env = {"MODEL_PATH": model_path, "MODEL_SNAPSHOT": snapshot_path}
+        probe("inference_api", load, env)  # first worker writes the snapshot
+        results["inference_api_snapshot"] = bench("inference_api", load, env, repeats)
+
+    save_json(out_json, results)
+    for name, r in results.items():
+        print(f"{name:24s} import {r['import_s']:.3f}s  load {r['load_s']:.3f}s  total {r['total_s']:.3f}s")
+    print("✅ Startup benchmark saved to", out_json)
+    return results
+
+if __name__ == "__main__":
+    run_startup_bench()
@@ -0,0 +1,146 @@
+"""
+Vectorized bootstrap for the difference of two means (e.g. per-impression revenue, treatment - control):
+- bootstrap_mean_diff_batched: resamples in (iterations x rows) blocks under a memory cap,
+  optionally fanned out over a process pool
+- PoissonBootstrap: streaming Poisson(1)-weight bootstrap, fed chunk by chunk, for data that doesn't fit in RAM
+
+Randomness is split into fixed units (seed -> unit -> arm streams), so for a given seed the CI
+does not depend on the memory cap, the number of workers or how the input was chunked.
+"""
+
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+ALPHA = 0.05
+UNIT_ITERS = 64  # resamples per RNG stream; the unit of work handed to blocks / workers
+MEMORY_CAP_MB = 256
+POISSON_BLOCK_ROWS = 1024  # rows per Poisson weight block (at most iters x rows weights in memory)
+
+def _summary(diffs, alpha):
+    lo = np.percentile(diffs, 100*alpha/2)
+    hi = np.percentile(diffs, 100*(1-alpha/2))
+    return {"mean_diff": float(diffs.mean()), "ci": [float(lo), float(hi)]}
+
+def _resample_means(values, iters, seed_seq, cap_elems):
+    """Means of `iters` resamples of values, drawn row-major from one stream in <= cap_elems pieces."""
+    rng = np.random.default_rng(seed_seq)
+    n = len(values)
+    sums = np.zeros(iters)
+    levels, counts = np.unique(values, return_counts=True)
+    if len(levels) * 4 <= n:
+        # Few distinct levels (revenue is mostly zeros + cents): resampling n rows is a
+        # multinomial draw over the levels, O(levels) per resample instead of O(n).
+        rows = max(1, cap_elems // len(levels))
+        for r0 in range(0, iters, rows):
+            r1 = min(iters, r0 + rows)
+            sums[r0:r1] = rng.multinomial(n, counts / n, size=r1 - r0) @ levels
+    elif cap_elems >= n:
+        rows = max(1, cap_elems // n)
+        for r0 in range(0, iters, rows):
+            r1 = min(iters, r0 + rows)
+            idx = (rng.random((r1 - r0, n)) * n).astype(np.int64)
+            sums[r0:r1] = values[idx].sum(axis=1)
+    else:
+        for r in range(iters):
+            for c0 in range(0, n, cap_elems):
+                m = min(cap_elems, n - c0)
+                idx = (rng.random(m) * n).astype(np.int64)
+                sums[r] += values[idx].sum()
+    return sums / n
+
+def _unit_diffs(a, b, units, cap_elems):
+    out = []
+    for iters, seed_seq in units:
+        seq_a, seq_b = seed_seq.spawn(2)
+        out.append(_resample_means(a, iters, seq_a, cap_elems) - _resample_means(b, iters, seq_b, cap_elems))
+    return np.concatenate(out) if out else np.empty(0)
+
+def bootstrap_mean_diff_batched(a, b, iters=2000, seed=42, alpha=ALPHA,
+                                memory_cap_mb=MEMORY_CAP_MB, n_jobs=1):
+    a = np.asarray(a, dtype=float)
+    b = np.asarray(b, dtype=float)
+    if len(a) == 0 or len(b) == 0:
+        raise ValueError(f"bootstrap needs values in both arms (got {len(a)} and {len(b)})")
+    # index + gathered value per resampled element
+    cap_elems = max(1, int(memory_cap_mb * 2**20) // 16)
+    n_units = -(-iters // UNIT_ITERS)
+    seeds = np.random.SeedSequence(seed).spawn(n_units)
+    units = [(min(UNIT_ITERS, iters - i * UNIT_ITERS), s) for i, s in enumerate(seeds)]
+
+    if n_jobs == 1 or n_units == 1:
+        diffs = _unit_diffs(a, b, units, cap_elems)
+    else:
+        # each worker holds its own blocks, so split the memory cap between them
+        per_worker = max(1, cap_elems // n_jobs)
+        splits = [units[i::n_jobs] for i in range(n_jobs)]
+        with ProcessPoolExecutor(max_workers=n_jobs) as ex:
+            parts = list(ex.map(_unit_diffs, [a] * n_jobs, [b] * n_jobs, splits, [per_worker] * n_jobs))
+        # restore unit order (worker w got units w, w+n_jobs, ...)
+        diffs = np.empty(iters)
+        offsets = np.cumsum([0] + [u[0] for u in units])
+        for w, part in enumerate(parts):
+            pos = 0
+            for i in range(w, n_units, n_jobs):
+                size = units[i][0]
+                diffs[offsets[i]:offsets[i] + size] = part[pos:pos + size]
+                pos += size
+    return _summary(diffs, alpha)
+
+class PoissonBootstrap:
+    """Streaming bootstrap of the mean per arm: each row gets an independent Poisson(1) weight per replicate.
+
+    Feed chunks with update(arm, values) in stream order; only iters-sized accumulators and one
+    partial block per arm stay in memory.
+    """
+
+    def __init__(self, iters=2000, seed=42, block_rows=POISSON_BLOCK_ROWS):
+        self.iters = iters
+        self.seed = seed
+        self.block_rows = block_rows
+        self.arms = {}
+
+    def _arm(self, arm):
+        if arm not in self.arms:
+            self.arms[arm] = {"sums": np.zeros(self.iters), "weights": np.zeros(self.iters),
+                              "blocks": 0, "buffer": np.empty(0)}
+        return self.arms[arm]
+
+    def _consume(self, arm, st, block):
+        rng = np.random.default_rng([self.seed, zlib.crc32(str(arm).encode()), st["blocks"]])
+        # rows sharing a value share a Poisson(count) weight total, so draw per distinct value
+        levels, counts = np.unique(block, return_counts=True)
+        w = rng.poisson(counts, size=(self.iters, len(levels))).astype(float)
+        st["sums"] += w @ levels
+        st["weights"] += w.sum(axis=1)
+        st["blocks"] += 1
+
+    def update(self, arm, values):
+        st = self._arm(arm)
+        buf = np.concatenate([st["buffer"], np.asarray(values, dtype=float)])
+        n_full = len(buf) // self.block_rows * self.block_rows
+        for r0 in range(0, n_full, self.block_rows):
+            self._consume(arm, st, buf[r0:r0 + self.block_rows])
+        st["buffer"] = buf[n_full:]
+        return self
+
+    def _means(self, arm):
+        st = self._arm(arm)
+        sums, weights = st["sums"].copy(), st["weights"].copy()
+        if len(st["buffer"]):
+            # score the trailing partial block without committing it, so more data can still arrive
+            tmp = {"sums": sums, "weights": weights, "blocks": st["blocks"]}
+            self._consume(arm, tmp, st["buffer"])
+        return sums / np.maximum(weights, 1e-12)
+
+    def mean_diff(self, arm_a="treatment", arm_b="control", alpha=ALPHA):
+        return _summary(self._means(arm_a) - self._means(arm_b), alpha)
+
+def poisson_bootstrap_mean_diff(chunks, arm_col="assignment", value_col="revenue",
+                                arm_a="treatment", arm_b="control", iters=2000, seed=42, alpha=ALPHA):
+    """Poisson bootstrap over an iterable of DataFrame chunks (e.g. pd.read_csv(..., chunksize=...))."""
+    boot = PoissonBootstrap(iters=iters, seed=seed)
+    for chunk in chunks:
+        for arm in (arm_a, arm_b):
+            boot.update(arm, chunk.loc[chunk[arm_col] == arm, value_col].to_numpy())
+    return boot.mean_diff(arm_a, arm_b, alpha=alpha)
@@ -0,0 +1,205 @@
+"""
+Columnar featurizer:
+- Turns the impression DataFrame straight into the CSR matrix DictVectorizer builds from prepare_dicts(df)
+- Same feature names, column order and values, without one Python dict per row
+- ColumnarVectorizer is a drop-in "vec" pipeline step; upgrade_pipeline swaps it into pickled pipelines
+- HashedVectorizer maps the same features into a fixed-width hashed space (no vocabulary to fit),
+  for models trained incrementally on unbounded data
+"""
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.feature_extraction import DictVectorizer
+from sklearn.pipeline import Pipeline
+from sklearn.utils import murmurhash3_32
+
+# (feature prefix, DataFrame column) following the naming convention of utils.prepare_dicts
+CATEGORICAL_FEATURES = [
+    ("age", "age_bucket"),
+    ("geo", "geo"),
+    ("interest", "interests"),
+    ("creative", "creative_type"),
+    ("device", "device"),
+]
+NUMERIC_FEATURES = [
+    ("hour", "hour_of_day"),
+    ("bid", "bid"),
+]
+SEPARATOR = "="
+FEATURE_COLUMNS = [col for _, col in CATEGORICAL_FEATURES + NUMERIC_FEATURES]
+
+
+def _column_values(series):
+    """Distinct values as prepare_dicts would spell them (str(value)) plus per-row codes."""
+    codes, uniques = pd.factorize(series, use_na_sentinel=False)
+    return codes, [str(u) for u in uniques]
+
+
+def columnar_feature_names(df):
+    names = set()
+    for prefix, col in CATEGORICAL_FEATURES:
+        if col in df:
+            _, values = _column_values(df[col])
+            names.update(prefix + SEPARATOR + v for v in values)
+    for name, col in NUMERIC_FEATURES:
+        if col in df:
+            names.add(name)
+    return sorted(names)
+
+
+def columnar_transform(df, vocabulary, n_features, dtype=np.float64):
+    """CSR matrix for df in the column space of a fitted DictVectorizer vocabulary.
+
+    Unknown categories and missing columns are dropped, exactly like DictVectorizer.transform.
+    """
+    n = len(df)
+    cols, vals = [], []
+    for prefix, col in CATEGORICAL_FEATURES:
+        if col not in df:
+            continue
+        codes, values = _column_values(df[col])
+        lookup = np.array([vocabulary.get(prefix + SEPARATOR + v, -1) for v in values] + [-1], dtype=np.int64)
+        cols.append(lookup[codes])
+        vals.append(np.ones(n, dtype=dtype))
+    for name, col in NUMERIC_FEATURES:
+        if col not in df or name not in vocabulary:
+            continue
+        cols.append(np.full(n, vocabulary[name], dtype=np.int64))
+        vals.append(df[col].to_numpy(dtype=dtype))
+
+    if not cols:
+        return sp.csr_matrix((n, n_features), dtype=dtype)
+
+    cols = np.column_stack(cols)
+    vals = np.column_stack(vals)
+    # DictVectorizer emits sorted column indices per row
+    order = np.argsort(cols, axis=1, kind="stable")
+    cols = np.take_along_axis(cols, order, axis=1)
+    vals = np.take_along_axis(vals, order, axis=1)
+    mask = cols >= 0
+
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(mask.sum(axis=1), out=indptr[1:])
+    return sp.csr_matrix((vals[mask], cols[mask], indptr), shape=(n, n_features), dtype=dtype)
+
+
+def hashed_transform(df, n_features, numeric_scale=None, dtype=np.float64):
+    """CSR matrix with each "prefix=value" / numeric feature name hashed (murmurhash3) into n_features columns.
+
+    Only the distinct values of each column are hashed; colliding features add up.
+    """
+    n = len(df)
+    numeric_scale = numeric_scale or {}
+    cols, vals = [], []
+    for prefix, col in CATEGORICAL_FEATURES:
+        if col not in df:
+            continue
+        codes, values = _column_values(df[col])
+        lookup = np.array([murmurhash3_32(prefix + SEPARATOR + v, positive=True) % n_features for v in values],
+                          dtype=np.int64)
+        cols.append(lookup[codes])
+        vals.append(np.ones(n, dtype=dtype))
+    for name, col in NUMERIC_FEATURES:
+        if col not in df:
+            continue
+        cols.append(np.full(n, murmurhash3_32(name, positive=True) % n_features, dtype=np.int64))
+        vals.append(df[col].to_numpy(dtype=dtype) * numeric_scale.get(name, 1.0))
+
+    if not cols:
+        return sp.csr_matrix((n, n_features), dtype=dtype)
+    indptr = np.arange(0, n * len(cols) + 1, len(cols), dtype=np.int64)
+    X = sp.csr_matrix((np.column_stack(vals).ravel(), np.column_stack(cols).ravel(), indptr),
+                      shape=(n, n_features), dtype=dtype)
+    X.sum_duplicates()
+    return X
+
+
+class ColumnarVectorizer(TransformerMixin, BaseEstimator):
+    """DictVectorizer-compatible pipeline step that featurizes DataFrames column-wise.
+
+    Lists of dicts (e.g. from inference_api) are still accepted and go through DictVectorizer.
+    """
+
+    def __init__(self, dtype=np.float64):
+        self.dtype = dtype
+
+    @classmethod
+    def from_feature_names(cls, feature_names, dtype=np.float64):
+        """Already-fitted step for a known vocabulary (e.g. a matrix_cache entry)."""
+        return cls(dtype=dtype)._set_vocabulary(feature_names)
+
+    @classmethod
+    def from_dict_vectorizer(cls, vec):
+        step = cls(dtype=vec.dtype)
+        step._set_vocabulary(vec.feature_names_)
+        return step
+
+    def _set_vocabulary(self, feature_names):
+        self.feature_names_ = list(feature_names)
+        self.vocabulary_ = {f: i for i, f in enumerate(self.feature_names_)}
+        self.dict_vec_ = DictVectorizer(dtype=self.dtype, separator=SEPARATOR, sparse=True)
+        self.dict_vec_.feature_names_ = self.feature_names_
+        self.dict_vec_.vocabulary_ = self.vocabulary_
+        return self
+
+    def fit(self, X, y=None):
+        if isinstance(X, pd.DataFrame):
+            return self._set_vocabulary(columnar_feature_names(X))
+        vec = DictVectorizer(dtype=self.dtype, separator=SEPARATOR, sparse=True).fit(X)
+        return self._set_vocabulary(vec.feature_names_)
+
+    def transform(self, X):
+        if isinstance(X, pd.DataFrame):
+            return columnar_transform(X, self.vocabulary_, len(self.feature_names_), dtype=self.dtype)
+        return self.dict_vec_.transform(X)
+
+    def get_feature_names_out(self, input_features=None):
+        return np.asarray(self.feature_names_, dtype=object)
+
+
+class HashedVectorizer(TransformerMixin, BaseEstimator):
+    """Stateless "vec" step: DataFrames (or lists of dicts) -> hashed_transform CSR matrix."""
+
+    def __init__(self, n_features=2 ** 20, numeric_scale=None, dtype=np.float64):
+        self.n_features = n_features
+        self.numeric_scale = numeric_scale
+        self.dtype = dtype
+
+    def fit(self, X, y=None):
+        return self
+
+    def transform(self, X):
+        if isinstance(X, pd.DataFrame):
+            return hashed_transform(X, self.n_features, self.numeric_scale, dtype=self.dtype)
+        # feature dicts as built by utils.prepare_dicts ("age=18-24": 1, "hour": 13.0, ...)
+        X = list(X)
+        scale = self.numeric_scale or {}
+        rows, cols, vals = [], [], []
+        for i, d in enumerate(X):
+            for k, v in d.items():
+                rows.append(i)
+                cols.append(murmurhash3_32(k, positive=True) % self.n_features)
+                vals.append(float(v) * scale.get(k, 1.0))
+        return sp.csr_matrix((vals, (rows, cols)), shape=(len(X), self.n_features), dtype=self.dtype)
+
+
+def as_columnar(vec):
+    if isinstance(vec, ColumnarVectorizer):
+        return vec
+    return ColumnarVectorizer.from_dict_vectorizer(vec)
+
+
+def is_columnar(pipe):
+    """True when pipe's "vec" step featurizes DataFrames itself (ColumnarVectorizer / HashedVectorizer)."""
+    steps = getattr(pipe, "steps", None)
+    return bool(steps) and isinstance(dict(steps).get("vec"), (ColumnarVectorizer, HashedVectorizer))
+
+
+def upgrade_pipeline(pipe):
+    """Replace the fitted DictVectorizer "vec" step so the pipeline scores DataFrames directly."""
+    steps = getattr(pipe, "steps", None)
+    if not steps or not isinstance(dict(steps).get("vec"), DictVectorizer):
+        return pipe
+    return Pipeline([(name, as_columnar(step) if name == "vec" else step) for name, step in steps])
@@ -0,0 +1,269 @@
+"""
+Compact models for serving without sklearn / joblib:
+- save_compact writes the vectorizer vocabulary + fitted weights of a pipeline to one .npz
+- CompactLogisticModel: one weight lookup per categorical value + two numeric terms, then a sigmoid
+- CompactTreeEnsemble: HistGradientBoosting trees flattened into node tables, all trees walked
+  level by level over the rows' one-hot column indices (no dense matrix)
+- Both score DataFrames column-wise or lists of feature dicts with plain NumPy
+- load_model picks the compact loader for .npz paths and joblib for everything else
+"""
+
+import numpy as np
+
+COMPACT_SUFFIX = ".npz"
+TREE_ROW_BLOCK = 1 << 18  # (row, tree) pairs walked at once by CompactTreeEnsemble
+# same (prefix, column) convention as columnar.py; repeated so serving does not import sklearn
+CATEGORICAL_FEATURES = [
+    ("age", "age_bucket"),
+    ("geo", "geo"),
+    ("interest", "interests"),
+    ("creative", "creative_type"),
+    ("device", "device"),
+]
+NUMERIC_FEATURES = [
+    ("hour", "hour_of_day"),
+    ("bid", "bid"),
+]
+SEPARATOR = "="
+
+
+def _sigmoid_proba(z):
+    p = np.exp(-np.logaddexp(0.0, -z))  # overflow-free sigmoid
+    return np.column_stack([1.0 - p, p])
+
+
+def _split_pipeline(pipe):
+    steps = getattr(pipe, "steps", None)
+    if not steps or len(steps) < 2 or steps[0][0] != "vec" or any(name != "to_dense" for name, _ in steps[1:-1]):
+        raise ValueError("compact export needs a ('vec', ['to_dense',] estimator) pipeline")
+    return steps[0][1], steps[-1][1]
+
+
+def flatten_hist_gbt(clf):
+    """Node tables of a binary HistGradientBoostingClassifier, all trees concatenated.
+
+    Leaves point to themselves, so every row can take max_depth steps regardless of where it stops.
+    """
+    if getattr(clf, "n_trees_per_iteration_", None) != 1:
+        raise ValueError("compact tree export supports binary HistGradientBoostingClassifier only")
+    tables = [predictor.nodes for predictors in clf._predictors for predictor in predictors]
+    sizes = np.array([len(t) for t in tables], dtype=np.int64)
+    roots = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.int64)
+    nodes = np.concatenate(tables)
+    if nodes["is_categorical"].any():
+        raise ValueError("compact tree export does not support categorical splits")
+    leaf = nodes["is_leaf"].astype(bool)
+    offset = np.repeat(roots, sizes)
+    self_idx = np.arange(len(nodes), dtype=np.int64)
+    return {
+        "feature": nodes["feature_idx"].astype(np.int64),
+        "threshold": nodes["num_threshold"].astype(np.float64),
+        "missing_left": nodes["missing_go_to_left"].astype(bool),
+        "left": np.where(leaf, self_idx, nodes["left"].astype(np.int64) + offset),
+        "right": np.where(leaf, self_idx, nodes["right"].astype(np.int64) + offset),
+        "value": np.where(leaf, nodes["value"], 0.0).astype(np.float64),
+        "roots": roots,
+        "max_depth": np.int64(nodes["depth"].max()),
+        "baseline": np.float64(np.ravel(clf._baseline_prediction)[0]),
+    }
+
+
+def save_compact(pipe, out_path):
+    """Write a fitted vec + (binary linear classifier | HistGradientBoostingClassifier) pipeline as .npz."""
+    vec, clf = _split_pipeline(pipe)
+    names = np.asarray(vec.feature_names_, dtype=str)
+    shift = 0.0
+    if hasattr(clf, "neg_sample_rate"):  # sampling.DownsampledClassifier: fold its correction into the bias
+        clf, shift = clf.estimator, np.log(clf.neg_sample_rate)
+    if hasattr(clf, "_predictors"):
+        tables = flatten_hist_gbt(clf)
+        tables["baseline"] = tables["baseline"] + shift
+        np.savez(out_path, kind=np.array(CompactTreeEnsemble.KIND), feature_names=names, **tables)
+        return out_path
+    coef = np.asarray(getattr(clf, "coef_", None), dtype=np.float64)
+    if coef.ndim != 2 or coef.shape[0] != 1 or coef.shape[1] != len(names):
+        raise ValueError("compact export needs a binary linear classifier (coef_ of shape (1, n_features))")
+    np.savez(out_path, kind=np.array(CompactLogisticModel.KIND), feature_names=names,
+             coef=coef[0], intercept=np.float64(clf.intercept_[0] + shift))
+    return out_path
+
+
+class CompactLogisticModel:
+    """predict_proba-compatible scorer over a feature-name -> weight table."""
+
+    KIND = "logistic"
+
+    def __init__(self, feature_names, coef, intercept):
+        self.feature_names_ = [str(f) for f in feature_names]
+        self.coef_ = np.asarray(coef, dtype=np.float64)
+        self.intercept_ = float(intercept)
+        self.weights_ = dict(zip(self.feature_names_, self.coef_.tolist()))
+        self.classes_ = np.array([0, 1])
+
+    @classmethod
+    def from_arrays(cls, z):
+        return cls(z["feature_names"], z["coef"], z["intercept"])
+
+    def _logit_frame(self, df):
+        import pandas as pd  # only reached with a DataFrame, so pandas is already loaded
+        z = np.full(len(df), self.intercept_)
+        for prefix, col in CATEGORICAL_FEATURES:
+            if col not in df:
+                continue
+            codes, uniques = pd.factorize(df[col], use_na_sentinel=False)
+            w = np.array([self.weights_.get(prefix + SEPARATOR + str(u), 0.0) for u in uniques], dtype=np.float64)
+            z += w[codes]
+        for name, col in NUMERIC_FEATURES:
+            if col in df and name in self.weights_:
+                z += self.weights_[name] * df[col].to_numpy(dtype=np.float64)
+        return z
+
+    def _logit_dict(self, d):
+        z = self.intercept_
+        for k, v in d.items():
+            if isinstance(v, str):  # DictVectorizer one-hot encodes string values as k=v
+                k, v = k + SEPARATOR + v, 1.0
+            z += self.weights_.get(k, 0.0) * v
+        return z
+
+    def decision_function(self, X):
+        if hasattr(X, "columns"):
+            return self._logit_frame(X)
+        return np.array([self._logit_dict(d) for d in X], dtype=np.float64)
+
+    def predict_proba(self, X):
+        return _sigmoid_proba(self.decision_function(X))
+
+    def predict(self, X):
+        return (self.decision_function(X) > 0).astype(int)
+
+
+class CompactTreeEnsemble:
+    """predict_proba-compatible evaluator for flattened HistGradientBoosting trees.
+
+    Rows are encoded as one slot per feature group (the vocabulary column of the row's category,
+    or the numeric value), so x[row, feature] is one gather: column == feature for one-hot
+    features, the slot value for numeric ones (absent = 0.0). Every (row, tree) pair still on an
+    internal node then moves left (x <= threshold, or NaN with missing_left) or right.
+    """
+
+    KIND = "gbt"
+    SLOTS = [prefix for prefix, _ in CATEGORICAL_FEATURES] + [name for name, _ in NUMERIC_FEATURES]
+
+    def __init__(self, feature_names, feature, threshold, missing_left, left, right, value,
+                 roots, max_depth, baseline):
+        self.feature_names_ = [str(f) for f in feature_names]
+        self.vocabulary_ = {f: i for i, f in enumerate(self.feature_names_)}
+        self.feature_ = np.asarray(feature, dtype=np.int64)
+        self.threshold_ = np.asarray(threshold, dtype=np.float64)
+        self.missing_left_ = np.asarray(missing_left, dtype=bool)
+        self.left_ = np.asarray(left, dtype=np.int64)
+        self.right_ = np.asarray(right, dtype=np.int64)
+        self.value_ = np.asarray(value, dtype=np.float64)
+        self.roots_ = np.asarray(roots, dtype=np.int64)
+        self.max_depth_ = int(max_depth)
+        self.baseline_ = float(baseline)
+        self.classes_ = np.array([0, 1])
+
+        # vocabulary column -> (slot, numeric?)
+        slot_index = {s: i for i, s in enumerate(self.SLOTS)}
+        n_cat = len(CATEGORICAL_FEATURES)
+        self.column_slot_ = np.empty(len(self.feature_names_), dtype=np.int64)
+        for j, name in enumerate(self.feature_names_):
+            slot = slot_index.get(name.split(SEPARATOR, 1)[0] if SEPARATOR in name else name)
+            if slot is None or (SEPARATOR in name) != (slot < n_cat):
+                raise ValueError(f"feature {name!r} does not belong to a known feature group")
+            self.column_slot_[j] = slot
+        self.column_numeric_ = self.column_slot_ >= n_cat
+        self.node_slot_ = self.column_slot_[self.feature_]
+        self.node_numeric_ = self.column_numeric_[self.feature_]
+        self.is_leaf_ = self.left_ == np.arange(len(self.left_))
+
+    @classmethod
+    def from_arrays(cls, z):
+        return cls(z["feature_names"], z["feature"], z["threshold"], z["missing_left"], z["left"],
+                   z["right"], z["value"], z["roots"], z["max_depth"], z["baseline"])
+
+    def encode(self, X):
+        """(n, len(SLOTS)) float array: vocabulary column (-1 = absent/unknown) or numeric value."""
+        n_cat = len(CATEGORICAL_FEATURES)
+        if hasattr(X, "columns"):
+            import pandas as pd  # only reached with a DataFrame, so pandas is already loaded
+            slots = np.zeros((len(X), len(self.SLOTS)))
+            for s, (prefix, col) in enumerate(CATEGORICAL_FEATURES):
+                if col not in X:
+                    slots[:, s] = -1
+                    continue
+                codes, uniques = pd.factorize(X[col], use_na_sentinel=False)
+                lookup = np.array([self.vocabulary_.get(prefix + SEPARATOR + str(u), -1) for u in uniques] + [-1])
+                slots[:, s] = lookup[codes]
+            for s, (_, col) in enumerate(NUMERIC_FEATURES, start=n_cat):
+                if col in X:
+                    slots[:, s] = X[col].to_numpy(dtype=np.float64)
+            return slots
+
+        slots = np.zeros((len(X), len(self.SLOTS)))
+        slots[:, :n_cat] = -1
+        for i, d in enumerate(X):
+            for k, v in d.items():
+                if isinstance(v, str):  # DictVectorizer one-hot encodes string values as k=v
+                    k, v = k + SEPARATOR + v, 1.0
+                j = self.vocabulary_.get(k)
+                if j is not None:
+                    # one category per group, as prepare_dicts produces
+                    slots[i, self.column_slot_[j]] = float(v) if self.column_numeric_[j] else j
+        return slots
+
+    def _leaves(self, slots):
+        n_trees = len(self.roots_)
+        row = np.repeat(np.arange(len(slots)), n_trees)  # one entry per (row, tree), row-major
+        node = np.tile(self.roots_, len(slots))
+        live = np.flatnonzero(~self.is_leaf_[node])
+        for _ in range(self.max_depth_):
+            if not live.size:
+                break
+            nd = node[live]
+            x = slots[row[live], self.node_slot_[nd]]
+            x = np.where(self.node_numeric_[nd], x, x == self.feature_[nd])
+            go_left = np.where(np.isnan(x), self.missing_left_[nd], x <= self.threshold_[nd])
+            nd = np.where(go_left, self.left_[nd], self.right_[nd])
+            node[live] = nd
+            live = live[~self.is_leaf_[nd]]
+        return node
+
+    def decision_function(self, X):
+        slots = self.encode(X)
+        n_trees = len(self.roots_)
+        out = np.full(len(slots), self.baseline_)
+        if not n_trees:
+            return out
+        block = max(1, TREE_ROW_BLOCK // n_trees)
+        for start in range(0, len(slots), block):
+            leaves = self._leaves(slots[start:start + block])
+            out[start:start + block] += self.value_[leaves].reshape(-1, n_trees).sum(axis=1)
+        return out
+
+    def predict_proba(self, X):
+        return _sigmoid_proba(self.decision_function(X))
+
+    def predict(self, X):
+        return (self.decision_function(X) > 0).astype(int)
+
+
+COMPACT_KINDS = {cls.KIND: cls for cls in (CompactLogisticModel, CompactTreeEnsemble)}
+
+
+def load_compact(path):
+    with np.load(path, allow_pickle=False) as z:
+        kind = str(z["kind"])
+        if kind not in COMPACT_KINDS:
+            raise ValueError(f"{path}: unsupported compact model kind {kind}")
+        return COMPACT_KINDS[kind].from_arrays(z)
+
+
+def load_model(path):
+    """Compact .npz -> CompactLogisticModel / CompactTreeEnsemble, anything else -> joblib.load."""
+    if str(path).endswith(COMPACT_SUFFIX):
+        return load_compact(path)
+    from joblib import load
+    return load(path)
@@ -1,52 +1,56 @@
-import joblib, json, pandas as pd, numpy as np
-from eval_utils import offline_metrics, calibration_table
-from sklearn.metrics import confusion_matrix
-from utils import prepare_dicts
+import json, numpy as np
+from columnar import FEATURE_COLUMNS
+from storage import read_dataset
+from eval_runner import score_all, summarize, top_overlap
+from significance import paired_tests, select_model, ALPHA
+import model_registry
+from tune import tuned_candidates
 from pathlib import Path
+import os
 import shutil
 
+BASELINE = "logistic"
+INCUMBENT = "incumbent"  # the registry's current version, scored alongside the fresh candidates
+
 def compare_and_choose():
     EVAL = "data/processed/eval.csv"
     BASELINE_PIPE = "models/logistic.pkl"
     GBT_PIPE = "models/gbt.pkl"
     DNN_PIPE = "models/dnn.pkl"
+    STREAMING_PIPE = "models/streaming_lr.pkl"
 
     OUT_REPORT = "reports/compare_report.txt"
     OUT_METRICS = "reports/all_offline_metrics.json"
     OUT_BEST = "models/best_model.pkl"
     OUT_BEST_INFO = "reports/best_model_info.json"
 
-    eval_df = pd.read_csv(EVAL)
+    eval_df = read_dataset(EVAL, columns=FEATURE_COLUMNS + ["clicked"])
     y_true = eval_df.clicked.values
 
     models = {
         "logistic": BASELINE_PIPE,
         "gbt": GBT_PIPE,
-        "dnn": DNN_PIPE
+        "dnn": DNN_PIPE,
+        "streaming_lr": STREAMING_PIPE
     }
+    models.update(tuned_candidates())  # "<family>_tuned" winners of tune.py, if it has run
+    incumbent = model_registry.current_version()
+    if incumbent:
+        models[INCUMBENT] = model_registry.artifact_path(incumbent)
 
-    results = {}
+    # ---- Evaluate All Models (shared eval features, scored concurrently) ----
+    scored, scores, errors = score_all(models, EVAL, eval_df)
+    row = {name: i for i, name in enumerate(scored)}
 
-    # ---- Evaluate Each Model ----
+    results = {}
     for name, path in models.items():
-        try:
-            pipe = joblib.load(path)
-            X_eval = prepare_dicts(eval_df)
-            y_prob = pipe.predict_proba(X_eval)[:, 1]
-
-            metrics = offline_metrics(y_true, y_prob)
-
-            results[name] = {
-                "metrics": metrics,
-                "y_prob": y_prob,
-                "path": path
-            }
+        if name in errors:
+            results[name] = {"error": errors[name]}
+            print(f"❌ Error loading {name}: {errors[name]}")
+        else:
+            results[name] = {**summarize(y_true, scores[row[name]]), "path": path}
 
-        except Exception as e:
-            results[name] = {"error": str(e)}
-            print(f"❌ Error loading {name}: {e}")
-
-    # ---- Choose Best Model (Using AUROC) ----
+    # ---- Choose Best Model (AUROC, promoted only if significantly better) ----
     valid_models = {
         name: info
         for name, info in results.items()
@@ -56,16 +60,39 @@ def compare_and_choose():
     if not valid_models:
         raise RuntimeError("No valid models available for comparison!")
 
-    best_name = max(valid_models, key=lambda m: valid_models[m]["metrics"]["auc"])
+    # challengers have to beat what is served now (or the baseline on a first run) by a DeLong test
+    reference = next((name for name in (INCUMBENT, BASELINE) if name in row),
+                     max(valid_models, key=lambda m: valid_models[m]["metrics"]["auc"]))
+    tests = paired_tests(y_true, scores, scored, reference)
+    best_name, challenger = select_model(tests, reference)
     best_info = valid_models[best_name]
+    model_name = best_name
+    if best_name == INCUMBENT:
+        model_name = model_registry.load_manifest()["versions"][incumbent]["name"]
+
+    # Copy best model to production path; rename into place so serving workers polling
+    # OUT_BEST never read a half-written file
+    shutil.copy(best_info["path"], OUT_BEST + ".tmp")
+    os.replace(OUT_BEST + ".tmp", OUT_BEST)
 
-    # Copy best model to production path
-    shutil.copy(best_info["path"], OUT_BEST)
+    # Immutable registry version for serving (inference_api with MODEL_REGISTRY set)
+    version = None
+    try:
+        version = model_registry.register(best_info["path"], model_name, best_info["metrics"])
+        model_registry.promote(version)
+    except Exception as e:
+        print("⚠️ Could not register best model:", e)
 
     # ---- Write Human-Readable Report ----
     lines = []
     lines.append("MODEL COMPARISON REPORT\n")
-    lines.append(f"BEST MODEL: {best_name.upper()} (AUC={best_info['metrics']['auc']:.4f})\n")
+    lines.append(f"BEST MODEL: {model_name.upper()} (AUC={best_info['metrics']['auc']:.4f})\n")
+    if challenger:
+        t = tests[challenger]
+        verdict = "promoted" if best_name == challenger else f"not significant at alpha={ALPHA}, keeping {reference}"
+        lines.append(f"Best challenger {challenger}: AUC {t['auc_diff']:+.4f} vs {reference} "
+                     f"(95% CI {t['auc_diff_ci'][0]:+.4f}..{t['auc_diff_ci'][1]:+.4f}, p={t['auc_p']:.3g}, "
+                     f"Holm p={t['auc_p_holm']:.3g} over {len(tests) - 1} challengers) -> {verdict}\n")
 
     for name, info in results.items():
         lines.append(f"--- {name} ---")
@@ -76,28 +103,22 @@ def compare_and_choose():
         m = info["metrics"]
         lines.append(json.dumps(m, indent=2))
 
-        probs = info["y_prob"]
-        df = pd.DataFrame({"prob": probs, "y": y_true})
-        baseline_ctr = df.y.mean()
-        top_decile = df.sort_values("prob", ascending=False).head(max(1, int(0.1 * len(df))))
-        lines.append(f"Baseline CTR: {baseline_ctr:.4f}, "
-                     f"Top-decile CTR: {top_decile.y.mean():.4f}")
+        lines.append(f"Baseline CTR: {y_true.mean():.4f}, "
+                     f"Top-decile CTR: {info['top_decile_ctr']:.4f}")
 
         # Calibration
-        cal = calibration_table(y_true, probs, bins=10)
         lines.append("Calibration (first 3 buckets):")
-        for b in cal[:3]:
+        for b in info["calibration"][:3]:
             lines.append(str(b))
 
-        preds = (probs >= 0.5).astype(int)
-        lines.append("Confusion Matrix:\n" + str(confusion_matrix(y_true, preds)))
+        lines.append("Confusion Matrix:\n" + str(info["confusion"]))
 
     # ---- Error Analysis ----
     lines.append("\n\nERROR ANALYSIS\n")
     try:
-        lprobs = results["logistic"]["y_prob"]
-        gprobs = results["gbt"]["y_prob"]
-        dprobs = results["dnn"]["y_prob"]
+        lprobs = scores[row["logistic"]]
+        gprobs = scores[row["gbt"]]
+        dprobs = scores[row["dnn"]]
 
         idx1 = np.where((lprobs > 0.6) & (gprobs < 0.4))[0][:10]
         idx2 = np.where((gprobs > 0.4) & (dprobs < 0.4))[0][:10]
@@ -107,6 +128,19 @@ def compare_and_choose():
     except Exception:
         pass
 
+    lines.append(f"\nSIGNIFICANCE vs {reference} (DeLong AUC, paired log-loss z-test)")
+    for name, t in tests.items():
+        if name != reference:
+            lines.append(f"  {name:16s} dAUC={t['auc_diff']:+.4f} "
+                         f"[{t['auc_diff_ci'][0]:+.4f}, {t['auc_diff_ci'][1]:+.4f}] p={t['auc_p']:.3g}  "
+                         f"dLogLoss={t['log_loss_diff']:+.5f} p={t['log_loss_p']:.3g}")
+
+    # share of each model's top-decile impressions that the other model also ranks in its top decile
+    overlap = top_overlap(scores)
+    lines.append("\nTop-decile overlap:")
+    for i, name in enumerate(scored):
+        lines.append(f"  {name:16s} " + " ".join(f"{other}={overlap[i, j]:.2f}" for j, other in enumerate(scored) if j != i))
+
     Path(OUT_REPORT).parent.mkdir(parents=True, exist_ok=True)
     with open(OUT_REPORT, "w") as f:
         f.write("\n".join(lines))
@@ -119,18 +153,23 @@ def compare_and_choose():
 
     json.dump(
         {
-            "best_model": best_name.lower(),
+            "best_model": model_name.lower(),
             "path": OUT_BEST,
-            "metrics": best_info["metrics"]
+            "version": version,
+            "registry": model_registry.REGISTRY_DIR,
+            "metrics": best_info["metrics"],
+            "reference": reference,
+            "challenger": challenger,
+            "significance": tests.get(challenger) if challenger else None
         },
         open(OUT_BEST_INFO, "w"), indent=2
     )
 
-    print(f"✅ Comparison complete. Best model = {best_name.lower()}")
+    print(f"✅ Comparison complete. Best model = {model_name.lower()}")
     print(f"📦 Saved to {OUT_BEST}")
     print("📄 Report at:", OUT_REPORT)
 
-    return best_name.lower()
+    return model_name.lower()
 
 if __name__ == "__main__":
     compare_and_choose()
@@ -0,0 +1,157 @@
+"""
+Local DAG executor for the pipeline stages:
+- Tasks whose dependencies are done run concurrently in a process pool (one stage per process)
+- Each task is fingerprinted from its code (its module + the src/ modules it imports, transitively),
+  the content of its input files and its kwargs
+- A task is skipped when its fingerprint matches the last successful run and its outputs are
+  still the files that run produced; a failed task blocks only its dependents
+- State (fingerprints, output signatures, cached input digests) lives in reports/dag_state.json
+"""
+
+import ast
+import hashlib
+import importlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from utils import file_digest
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+STATE_JSON = "reports/dag_state.json"
+
+def local_imports(module, src_dir=SRC_DIR):
+    """Module names under src_dir imported (transitively) by module, including itself."""
+    seen, todo = set(), [module]
+    while todo:
+        name = todo.pop()
+        path = os.path.join(src_dir, name + ".py")
+        if name in seen or not os.path.exists(path):
+            continue
+        seen.add(name)
+        for node in ast.walk(ast.parse(open(path, encoding="utf-8").read())):
+            if isinstance(node, ast.Import):
+                todo.extend(a.name.split(".")[0] for a in node.names)
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                todo.append(node.module.split(".")[0])
+    return sorted(seen)
+
+def code_fingerprint(module, src_dir=SRC_DIR):
+    h = hashlib.sha256()
+    for name in local_imports(module, src_dir):
+        h.update(name.encode())
+        h.update(open(os.path.join(src_dir, name + ".py"), "rb").read())
+    return h.hexdigest()
+
+def file_signature(path):
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
+def cached_digest(path, cache):
+    """sha256 of path, reusing cache[path] while size + mtime are unchanged."""
+    sig = file_signature(path)
+    hit = cache.get(path)
+    if hit and hit[:2] == sig:
+        return hit[2]
+    cache[path] = sig + [file_digest(path)]
+    return cache[path][2]
+
+def load_state(path=STATE_JSON):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {"tasks": {}, "files": {}}
+
+def save_state(state, path=STATE_JSON):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp, path)
+
+def _call(module, func, kwargs):
+    return getattr(importlib.import_module(module), func)(**kwargs)
+
+def run_dag(dag, stages, n_jobs=None, force=False, state_path=STATE_JSON, resolve=lambda p: p):
+    """Run dag = {task: {"deps", "inputs", "outputs", "kwargs"}}; stages = {task: (module, func)}.
+
+    resolve maps a declared path to the file actually on disk (e.g. storage.resolve_path).
+    Returns {task: "ran" | "cached" | "failed" | "blocked"}.
+    """
+    state = load_state(state_path)
+    n_jobs = n_jobs or os.cpu_count() or 1
+    status, timings = {}, {}
+    pending = set(dag)
+
+    def fingerprint(name):
+        spec = dag[name]
+        module, func = stages[name]
+        h = hashlib.sha256()
+        h.update(json.dumps([module, func, spec.get("kwargs", {})], sort_keys=True, default=str).encode())
+        h.update(code_fingerprint(module).encode())
+        for p in spec.get("inputs", []):
+            p = resolve(p)
+            h.update(p.encode())
+            h.update(cached_digest(p, state["files"]).encode() if os.path.exists(p) else b"<missing>")
+        return h.hexdigest()
+
+    def outputs_intact(name):
+        recorded = state["tasks"].get(name, {}).get("outputs", {})
+        for p in dag[name].get("outputs", []):
+            p = resolve(p)
+            if not os.path.exists(p) or recorded.get(p) != file_signature(p):
+                return False
+        return True
+
+    t_start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=n_jobs) as ex:
+        running = {}
+        while pending or running:
+            progressed = False
+            for name in sorted(pending):
+                deps = dag[name].get("deps", [])
+                if any(status.get(d) in ("failed", "blocked") for d in deps):
+                    status[name] = "blocked"
+                elif all(status.get(d) in ("ran", "cached") for d in deps):
+                    fp = fingerprint(name)
+                    if not force and state["tasks"].get(name, {}).get("fingerprint") == fp and outputs_intact(name):
+                        status[name] = "cached"
+                    else:
+                        module, func = stages[name]
+                        running[ex.submit(_call, module, func, dag[name].get("kwargs", {}))] = (name, fp, time.perf_counter())
+                        print(f"▶ {name}")
+                        status[name] = "running"
+                else:
+                    continue
+                pending.discard(name)
+                progressed = True
+            if progressed:
+                continue  # cached / blocked tasks may have unblocked others
+            if not running:
+                raise ValueError(f"DAG has unsatisfiable dependencies or a cycle: {sorted(pending)}")
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                name, fp, t0 = running.pop(fut)
+                timings[name] = time.perf_counter() - t0
+                try:
+                    fut.result()
+                except Exception as e:
+                    print(f"[WARN] Step {name} failed: {e}")
+                    status[name] = "failed"
+                    state["tasks"].pop(name, None)
+                else:
+                    status[name] = "ran"
+                    outputs = {resolve(p): file_signature(resolve(p)) for p in dag[name].get("outputs", [])
+                               if os.path.exists(resolve(p))}
+                    state["tasks"][name] = {"fingerprint": fp, "outputs": outputs, "seconds": timings[name]}
+                save_state(state, state_path)
+
+    state["last_run"] = {"seconds": time.perf_counter() - t_start, "n_jobs": n_jobs,
+                         "status": status, "task_seconds": timings}
+    save_state(state, state_path)
+    for name in dag:
+        extra = f" ({timings[name]:.1f}s)" if name in timings else ""
+        print(f"  {name:12s} {status[name]}{extra}")
+    return status
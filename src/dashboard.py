@@ -32,4 +32,5 @@ def dashboard_main():
 
     st.info("This dashboard is a simple binder to view the JSON reports. Add charts as needed.")
 
-dashboard_main()
\ No newline at end of file
+if __name__ == "__main__":  # streamlit run executes the script as __main__
+    dashboard_main()
@@ -1,6 +1,20 @@
-import csv
 import random
 from datetime import datetime
+import numpy as np
+import pandas as pd
+from storage import write_dataset
+
+AGES = ["18-24","25-34","35-44","45+"]
+GEOS = ["IN","US","UK","CN"]
+INTERESTS = ["sports","tech","finance","fashion"]
+CREATIVES = ["banner","video","native"]
+DEVICES = ["mobile","desktop","tablet"]
+COLUMNS = [
+    "impression_id", "timestamp", "user_id", "age_bucket",
+    "geo", "interests", "ad_id", "advertiser_id",
+    "creative_type", "device", "hour_of_day",
+    "bid", "clicked", "revenue"
+]
 
 def base_ctr(age, interest, creative, hour):
     ctr = 0.01
@@ -10,6 +24,20 @@ def base_ctr(age, interest, creative, hour):
     if 18 <= hour <= 22: ctr += 0.005
     return min(0.4, ctr)
 
+def _is(values, value):
+    values = np.asarray(values) if isinstance(values, (list, tuple)) else values
+    return np.asarray(values == value, dtype=float)
+
+def base_ctr_array(age, interest, creative, hour):
+    """base_ctr for whole columns (arrays, Series or Categoricals); same additions in the same order."""
+    hour = np.asarray(hour)
+    ctr = np.full(len(hour), 0.01)
+    ctr += 0.02 * _is(interest, "tech")
+    ctr += 0.015 * _is(creative, "video")
+    ctr += 0.01 * _is(age, "25-34")
+    ctr += 0.005 * ((hour >= 18) & (hour <= 22))
+    return np.minimum(0.4, ctr)
+
 def data_gen_main():
     random.seed(42)
 
@@ -17,53 +45,47 @@ def data_gen_main():
     OUTPUT = "data/raw/synthetic_ads.csv"
 
 
-    ages = ["18-24","25-34","35-44","45+"]
-    geos = ["IN","US","UK","CN"]
-    interests = ["sports","tech","finance","fashion"]
-    creatives = ["banner","video","native"]
-    devices = ["mobile","desktop","tablet"]
-
-    with open(OUTPUT, "w", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow([
-        "impression_id", "timestamp", "user_id", "age_bucket",
-        "geo", "interests", "ad_id", "advertiser_id",
-        "creative_type", "device", "hour_of_day",
-        "bid", "clicked", "revenue"
-        ])
+    ages = AGES
+    geos = GEOS
+    interests = INTERESTS
+    creatives = CREATIVES
+    devices = DEVICES
 
+    rows = []
+    for i in range(N):
+        hour = random.randint(0, 23)
+        age = random.choice(ages)
+        interest = random.choice(interests)
+        creative = random.choice(creatives)
+        pctr = base_ctr(age, interest, creative, hour)
 
-        for i in range(N):
-            hour = random.randint(0, 23)
-            age = random.choice(ages)
-            interest = random.choice(interests)
-            creative = random.choice(creatives)
-            pctr = base_ctr(age, interest, creative, hour)
 
+        clicked = 1 if random.random() < pctr else 0
+        revenue = round(random.uniform(0.1, 3.0), 2) if clicked else 0.0
 
-            clicked = 1 if random.random() < pctr else 0
-            revenue = round(random.uniform(0.1, 3.0), 2) if clicked else 0.0
 
+        rows.append([
+            f"imp_{i}",
+            datetime(2025, 12, 9, hour).isoformat(),
+            random.randint(0, 499),
+            age,
+            random.choice(geos),
+            interest,
+            random.randint(0, 199),
+            random.randint(0, 19),
+            creative,
+            random.choice(devices),
+            hour,
+            round(random.uniform(0.05, 2.0), 3),
+            clicked,
+            revenue
+        ])
 
-            writer.writerow([
-                f"imp_{i}",
-                datetime(2025, 12, 9, hour).isoformat(),
-                random.randint(0, 499),
-                age,
-                random.choice(geos),
-                interest,
-                random.randint(0, 199),
-                random.randint(0, 19),
-                creative,
-                random.choice(devices),
-                hour,
-                round(random.uniform(0.05, 2.0), 3),
-                clicked,
-                revenue
-            ])
+    df = pd.DataFrame(rows, columns=COLUMNS)
+    out = write_dataset(df, OUTPUT)
 
 
-    print(f"✅ Generated {N} rows at {OUTPUT}")
+    print(f"✅ Generated {N} rows at {out}")
 
 if __name__ == "__main__":
     data_gen_main()
\ No newline at end of file
@@ -1,6 +1,8 @@
-import os, json, shutil
+import os, sys, json, shutil
 from datetime import datetime
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # src/ for flat imports
+
 def export_model(model_path, out_dir="deploy"):
     os.makedirs(out_dir, exist_ok=True)
     shutil.copy(model_path, os.path.join(out_dir, os.path.basename(model_path)))
@@ -14,5 +16,24 @@ def export_model(model_path, out_dir="deploy"):
     print("Exported model to", out_dir)
     return out_dir
 
+def export_compact_model(model_path, out_dir="deploy"):
+    """Vocabulary + LR weights as one .npz, served by compact_model without sklearn/joblib."""
+    from joblib import load
+    from compact_model import save_compact, COMPACT_SUFFIX
+    os.makedirs(out_dir, exist_ok=True)
+    name = os.path.splitext(os.path.basename(model_path))[0] + COMPACT_SUFFIX
+    save_compact(load(model_path), os.path.join(out_dir, name))
+    meta = {
+        "model": name,
+        "source": os.path.basename(model_path),
+        "format": "compact-npz",
+        "exported_at": datetime.utcnow().isoformat() + "Z",
+    }
+    with open(os.path.join(out_dir, "metadata.json"), "w") as f:
+        json.dump(meta, f, indent=2)
+    print("Exported compact model to", os.path.join(out_dir, name))
+    return os.path.join(out_dir, name)
+
 if __name__ == "__main__":
     export_model("models/logistic_regression.pkl")
+    export_compact_model("models/logistic.pkl")
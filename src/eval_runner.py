@@ -0,0 +1,94 @@
+"""
+Evaluation runner for compare_models:
+- The eval set is read once and featurized once per distinct vocabulary (matrix_cache), so every
+  pipeline fit on train.csv scores the same matrix; other models (compact, hashed) score the DataFrame
+- Candidates are loaded and scored concurrently in a thread pool (sklearn / NumPy scoring
+  releases the GIL), writing into one (models x rows) score array
+- Per-model summaries (metrics, calibration, top-decile CTR, confusion matrix) and pairwise
+  top-decile overlap come from array ops on that block; no per-model DataFrames
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from array_eval import calibration_bins, top_k_ctr
+from batch_scoring import predict_in_batches
+from columnar import upgrade_pipeline
+from compact_model import load_model, COMPACT_SUFFIX
+from eval_utils import offline_metrics
+from matrix_cache import load_or_build
+
+EVAL_WORKERS = int(os.environ.get("EVAL_WORKERS", os.cpu_count() or 1))
+USE_COMPACT = True  # score with the compact .npz next to a pickle (e.g. models/gbt.npz) when it is up to date
+TOP_FRACTION = 0.1
+
+def scoring_model(path):
+    compact = os.path.splitext(path)[0] + COMPACT_SUFFIX
+    if USE_COMPACT and os.path.exists(compact) and os.path.getmtime(compact) >= os.path.getmtime(path):
+        return load_model(compact)
+    return upgrade_pipeline(load_model(path))
+
+class SharedFeatures:
+    """Eval matrices built (or mapped from the cache) once per vocabulary, shared by all scoring threads."""
+
+    def __init__(self, eval_path, eval_df):
+        self.eval_path = eval_path
+        self.eval_df = eval_df
+        self._matrices = {}
+        self._lock = threading.Lock()
+
+    def matrix(self, feature_names):
+        key = tuple(feature_names)
+        with self._lock:
+            if key not in self._matrices:
+                self._matrices[key] = load_or_build(self.eval_path, vocabulary=feature_names)[0]
+            return self._matrices[key]
+
+    def score(self, model):
+        """pCTR on the eval rows: pipelines score the shared matrix for their vocabulary, others the DataFrame."""
+        steps = getattr(model, "steps", None)
+        if steps and steps[0][0] == "vec" and hasattr(steps[0][1], "feature_names_"):
+            return model[1:].predict_proba(self.matrix(steps[0][1].feature_names_))[:, 1]
+        return predict_in_batches(model, self.eval_df)
+
+def score_all(models, eval_path, eval_df, n_workers=EVAL_WORKERS):
+    """(names scored, scores[len(names), n_rows], {name: error}) for models = {name: path}."""
+    features = SharedFeatures(eval_path, eval_df)
+    scores = np.empty((len(models), len(eval_df)))
+
+    def run(i, path):
+        scores[i] = features.score(scoring_model(path))
+
+    with ThreadPoolExecutor(max_workers=max(1, n_workers)) as pool:
+        futures = {name: pool.submit(run, i, path) for i, (name, path) in enumerate(models.items())}
+    ok, errors = [], {}
+    for i, (name, fut) in enumerate(futures.items()):
+        try:
+            fut.result()
+            ok.append(i)
+        except Exception as e:
+            errors[name] = str(e)
+    names = list(models)
+    return [names[i] for i in ok], scores[ok], errors
+
+def summarize(y_true, y_prob):
+    """Everything compare_models reports for one model."""
+    preds = (y_prob >= 0.5).astype(np.int64)
+    return {
+        "metrics": offline_metrics(y_true, y_prob),
+        "calibration": calibration_bins(y_true, y_prob, 10),
+        "top_decile_ctr": top_k_ctr(y_true, y_prob, max(1, int(TOP_FRACTION * len(y_true)))),
+        "confusion": np.bincount(2 * np.asarray(y_true, dtype=np.int64) + preds, minlength=4).reshape(2, 2),
+    }
+
+def top_overlap(scores, fraction=TOP_FRACTION):
+    """[i, j] = share of model i's top-`fraction` rows that are also in model j's."""
+    m, n = scores.shape
+    k = max(1, int(fraction * n))
+    top = np.zeros((m, n), dtype=np.float32)
+    if k < n:
+        np.put_along_axis(top, np.argpartition(-scores, k - 1, axis=1)[:, :k], 1.0, axis=1)
+    else:
+        top[:] = 1.0
+    return top @ top.T / k
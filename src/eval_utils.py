@@ -1,27 +1,14 @@
 import numpy as np
 from sklearn.metrics import roc_auc_score, log_loss, confusion_matrix, precision_recall_fscore_support
-import pandas as pd
+from array_eval import calibration_bins, top_k_ctr
 
 def brier_score(y_true, y_prob):
     return np.mean((y_prob - y_true) ** 2)  
 
 
 def calibration_table(y_true, y_prob, bins=10):
-    data = list(zip(y_true, y_prob))
-    data.sort(key=lambda x: x[1])
-    buckets = np.array_split(data, bins)
-
-
-    rows = []
-    for i, b in enumerate(buckets):
-        ys, ps = zip(*b)
-        rows.append({
-            "bucket": i,
-            "avg_pred": np.mean(ps),
-            "avg_true": np.mean(ys),
-            "count": len(b)
-        })
-    return rows
+    # equal-count buckets of ascending score, as np.array_split over the sorted rows
+    return calibration_bins(y_true, y_prob, bins)
 
 
 def offline_metrics(y_true, y_prob):
@@ -32,8 +19,5 @@ def offline_metrics(y_true, y_prob):
     }
 
 def decile_lift(y_true, y_prob, decile=10):
-    df = pd.DataFrame({"y": y_true, "p": y_prob})
-    df = df.sort_values("p", ascending=False)
-    n = len(df) // decile
-    top = df.head(n)
-    return {"top_decile_ctr": top.y.mean(), "overall_ctr": df.y.mean(), "n_top": len(top)}
\ No newline at end of file
+    n = len(y_true) // decile
+    return {"top_decile_ctr": top_k_ctr(y_true, y_prob, n), "overall_ctr": np.mean(y_true), "n_top": n}
\ No newline at end of file
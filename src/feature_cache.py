@@ -0,0 +1,162 @@
+"""
+In-process cache in front of feature_store for online serving:
+- Bounded LRU with per-entry TTL and hit / miss / eviction / expiry counters
+- Absent users are cached too (negative entries), so unknown ids don't hit disk every request
+- Write-through invalidation: feature_store writes in this process drop the cached entries
+  (writes from other processes are bounded by the TTL); a miss only fills the cache if no write
+  invalidated the key while the store was being read, so a stale read is never put back
+- warm_from_impressions preloads the most frequent users of the latest impressions log
+"""
+
+import threading
+import time
+from collections import OrderedDict
+import feature_store
+
+LATEST_IMPRESSIONS = "data/raw/synthetic_ads.csv"
+MAX_ENTRIES = 100000
+TTL_SECONDS = 300.0
+
+_MISSING = object()
+
+class LRUTTLCache:
+    def __init__(self, max_entries=MAX_ENTRIES, ttl=TTL_SECONDS, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self._data = OrderedDict()  # key -> (expires_at, value), oldest first
+        self._fills = {}  # key -> token of the miss currently reading the store for it
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def get(self, key, default=_MISSING):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                if entry[0] > self.clock():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._data[key]
+                self.expirations += 1
+            self.misses += 1
+            return default
+
+    def _put(self, key, value):
+        self._data[key] = (self.clock() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def put(self, key, value):
+        with self._lock:
+            self._put(key, value)
+
+    def reserve(self, keys):
+        """Token for filling keys after a backing-store read; invalidate() in between voids it."""
+        token = object()
+        with self._lock:
+            for k in keys:
+                self._fills[k] = token
+        return token
+
+    def fill(self, key, value, token):
+        """put(key, value) unless key was invalidated (or re-reserved) since reserve() returned token."""
+        with self._lock:
+            if self._fills.get(key) is token:
+                del self._fills[key]
+                self._put(key, value)
+
+    def release(self, keys, token):
+        with self._lock:
+            for k in keys:
+                if self._fills.get(k) is token:
+                    del self._fills[k]
+
+    def invalidate(self, keys):
+        with self._lock:
+            for k in keys:
+                self._data.pop(k, None)
+                self._fills.pop(k, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+class CachedFeatureStore:
+    """read_features / read_features_many with the same results as feature_store, served from memory."""
+
+    def __init__(self, cache=None):
+        self.cache = cache or LRUTTLCache()
+        feature_store.add_write_listener(self.cache.invalidate)
+
+    def close(self):
+        feature_store.remove_write_listener(self.cache.invalidate)
+
+    def _read_through(self, keys, read):
+        token = self.cache.reserve(keys)
+        try:
+            found = read(keys)
+        except Exception:
+            self.cache.release(keys, token)
+            raise
+        for k in keys:
+            self.cache.fill(k, found.get(k), token)
+        return found
+
+    def read_features(self, user_id):
+        user_id = int(user_id)
+        feats = self.cache.get(user_id)
+        if feats is _MISSING:
+            feats = self._read_through([user_id], lambda keys: {user_id: feature_store.read_features(user_id)})[user_id]
+        return feats
+
+    def read_features_many(self, user_ids):
+        out, todo = {}, []
+        for u in dict.fromkeys(int(u) for u in user_ids):
+            feats = self.cache.get(u)
+            if feats is _MISSING:
+                todo.append(u)
+            elif feats is not None:
+                out[u] = feats
+        if todo:
+            out.update(self._read_through(todo, feature_store.read_features_many))
+        return out
+
+    def warm_from_impressions(self, path=LATEST_IMPRESSIONS, top_n=None):
+        """Preload the top_n most frequent users of the impressions log (hottest last, so they evict last)."""
+        from storage import read_dataset  # pandas is only needed for warming
+        top_n = top_n or self.cache.max_entries
+        hot = read_dataset(path, columns=["user_id"])["user_id"].value_counts().head(top_n).index
+        hot = [int(u) for u in hot][::-1]
+        self._read_through(hot, feature_store.read_features_many)
+        print(f"✅ Warmed feature cache with {len(hot)} users from {path}")
+        return len(hot)
+
+    def stats(self):
+        return self.cache.stats()
+
+_default = None
+
+def default_store():
+    global _default
+    if _default is None:
+        _default = CachedFeatureStore()
+    return _default
+
+def read_features(user_id):
+    return default_store().read_features(user_id)
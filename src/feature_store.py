@@ -1,37 +1,176 @@
-import os, json
-from typing import Dict
+"""
+User feature store backed by a single indexed SQLite file:
+- One row per (user_id, last_seen) snapshot, so reads can be point-in-time (as_of)
+- write_features / read_features keep their original signatures: a write is stamped with the write
+  time, and read_features returns the latest snapshot as of now (future-dated snapshots stay hidden
+  until their time comes)
+- Bulk backfill in chunked transactions, compacted to one snapshot (the last one seen) per user per
+  SNAPSHOT_BUCKET-long ISO timestamp prefix, so the table grows with users x buckets, not log rows
+- Batched multi-get
+"""
+
+import os, json, glob, sqlite3, threading, weakref
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional
 
 STORE_DIR = "data/feature_store"
+DB_PATH = os.path.join(STORE_DIR, "features.sqlite")
+BACKFILL_CHUNK = 50000
+MULTIGET_CHUNK = 500  # ids per IN (...) query, well under SQLite's bound-parameter limit
+FEATURE_COLUMNS = ["age_bucket", "geo", "interests"]
+SNAPSHOT_BUCKET = 10  # ISO timestamp prefix length: 10 = one snapshot per user per day, 13 = per hour
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS features (
+        user_id INTEGER NOT NULL,
+        last_seen TEXT NOT NULL,
+        payload TEXT NOT NULL,
+        PRIMARY KEY (user_id, last_seen)
+    ) WITHOUT ROWID
+"""
+
+_local = threading.local()
+_write_listeners = []
+
+def _ref(fn):
+    # bound methods are held weakly, so a discarded listener object does not stay registered
+    return weakref.WeakMethod(fn) if hasattr(fn, "__self__") else (lambda: fn)
+
+def add_write_listener(fn):
+    """fn(user_ids) is called after snapshots for user_ids were written (e.g. cache invalidation)."""
+    _write_listeners.append(_ref(fn))
+
+def remove_write_listener(fn):
+    _write_listeners[:] = [r for r in _write_listeners if r() is not None and r() != fn]
+
+def _notify(user_ids):
+    live = [r for r in _write_listeners if r() is not None]
+    _write_listeners[:] = live
+    for r in live:
+        fn = r()
+        if fn is not None:
+            fn(user_ids)
 
 def init_store():
     os.makedirs(STORE_DIR, exist_ok=True)
+    return _conn()
+
+def _conn():
+    # one connection per thread (sqlite3 connections must not be shared across threads)
+    conns = getattr(_local, "conns", None)
+    if conns is None:
+        conns = _local.conns = {}
+    conn = conns.get(DB_PATH)
+    if conn is None:
+        os.makedirs(os.path.dirname(DB_PATH) or ".", exist_ok=True)
+        conn = sqlite3.connect(DB_PATH)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(SCHEMA)
+        conn.commit()
+        conns[DB_PATH] = conn
+    return conn
 
 def path_for(user_id):
+    # legacy per-user JSON layout, only used by migrate_json_store
     return os.path.join(STORE_DIR, f"user_{user_id}.json")
 
+def _stamp(value):
+    """Stored form of a timestamp: naive-UTC ISO (aware values are converted), as in existing rows,
+    so snapshot keys and as_of bounds compare as strings in time order."""
+    t = value if isinstance(value, datetime) else datetime.fromisoformat(str(value))
+    if t.tzinfo is not None:
+        t = t.astimezone(timezone.utc).replace(tzinfo=None)
+    return t.isoformat()
+
+def _now():
+    return _stamp(datetime.now(timezone.utc))
+
+def _row(user_id, features):
+    last_seen = features.get("last_seen")
+    return (int(user_id), _stamp(last_seen) if last_seen else _now(), json.dumps(features))
+
 def write_features(user_id: int, features: Dict):
-    init_store()
-    p = path_for(user_id)
-    with open(p, "w") as f:
-        json.dump(features, f)
-
-def read_features(user_id: int):
-    p = path_for(user_id)
-    if not os.path.exists(p):
+    """Store the user's current features as a snapshot at the write time (so read_features returns them)."""
+    conn = _conn()
+    with conn:
+        conn.execute("INSERT OR REPLACE INTO features VALUES (?, ?, ?)",
+                     (int(user_id), _now(), json.dumps(features)))
+    _notify([int(user_id)])
+
+def read_features(user_id: int, as_of: Optional[str] = None):
+    """Latest snapshot for user_id with last_seen <= as_of (default: now)."""
+    conn = _conn()
+    cur = conn.execute("SELECT payload FROM features WHERE user_id = ? AND last_seen <= ? "
+                       "ORDER BY last_seen DESC LIMIT 1", (int(user_id), _stamp(as_of) if as_of else _now()))
+    row = cur.fetchone()
+    return json.loads(row[0]) if row else None
+
+def read_features_many(user_ids: Iterable[int], as_of: Optional[str] = None):
+    """Batched multi-get: {user_id: features} for the users that have a snapshot <= as_of (default: now)."""
+    conn = _conn()
+    ids = list(dict.fromkeys(int(u) for u in user_ids))
+    as_of = _stamp(as_of) if as_of else _now()
+    out = {}
+    for i in range(0, len(ids), MULTIGET_CHUNK):
+        part = ids[i:i + MULTIGET_CHUNK]
+        marks = ",".join("?" * len(part))
+        # SQLite fills bare columns from the row holding MAX(last_seen)
+        sql = (f"SELECT user_id, MAX(last_seen), payload FROM features "
+               f"WHERE user_id IN ({marks}) AND last_seen <= ? GROUP BY user_id")
+        for uid, _, payload in conn.execute(sql, part + [as_of]):
+            out[uid] = json.loads(payload)
+    return out
+
+def _clean(v):
+    if v is None or (isinstance(v, float) and v != v):
         return None
-    return json.load(open(p))
-
-def backfill_from_csv(csv_path):
-    import pandas as pd
-    df = pd.read_csv(csv_path)
-    for _, r in df.iterrows():
-        feats = {
-            "age_bucket": r.get("age_bucket"),
-            "geo": r.get("geo"),
-            "interests": r.get("interests"),
-            "last_seen": r.get("timestamp")
-        }
-        write_features(int(r.user_id), feats)
+    return v.item() if hasattr(v, "item") else v
+
+# keep only the newest snapshot of a (user, bucket): insert unless a newer one exists, then drop older ones
+_INSERT_UNLESS_NEWER = """
+    INSERT OR REPLACE INTO features SELECT ?1, ?2, ?3 WHERE NOT EXISTS (
+        SELECT 1 FROM features WHERE user_id = ?1 AND substr(last_seen, 1, ?4) = substr(?2, 1, ?4)
+        AND last_seen > ?2)
+"""
+_DELETE_OLDER = """
+    DELETE FROM features WHERE user_id = ?1 AND substr(last_seen, 1, ?4) = substr(?2, 1, ?4) AND last_seen < ?2
+"""
+
+def backfill_from_csv(csv_path, chunksize=BACKFILL_CHUNK, bucket=SNAPSHOT_BUCKET):
+    """Load user snapshots from an impressions dataset, one per user per bucket; one transaction per chunk."""
+    from storage import iter_dataset
+    conn = _conn()
+    n = 0
+    for chunk in iter_dataset(csv_path, columns=["user_id", "timestamp"] + FEATURE_COLUMNS, chunksize=chunksize):
+        ts = chunk["timestamp"].astype(str)
+        chunk = chunk.assign(timestamp=ts, _bucket=ts.str[:bucket]).sort_values("timestamp", kind="stable")
+        chunk = chunk.drop_duplicates(["user_id", "_bucket"], keep="last")
+        cols = [chunk[c].astype(object).tolist() for c in FEATURE_COLUMNS]
+        rows = []
+        for uid, ts, *vals in zip(chunk["user_id"].tolist(), chunk["timestamp"].tolist(), *cols):
+            feats = {c: _clean(v) for c, v in zip(FEATURE_COLUMNS, vals)}
+            feats["last_seen"] = _clean(ts)
+            rows.append(_row(uid, feats) + (bucket,))
+        with conn:
+            conn.executemany(_INSERT_UNLESS_NEWER, rows)
+            conn.executemany(_DELETE_OLDER, rows)
+        _notify({r[0] for r in rows})
+        n += len(rows)
+    print(f"✅ Backfilled {n} feature snapshots into {DB_PATH}")
+    return n
+
+def migrate_json_store():
+    """Import legacy data/feature_store/user_{id}.json files into the SQLite store."""
+    conn = _conn()
+    rows = []
+    for p in glob.glob(path_for("*")):
+        uid = os.path.basename(p)[len("user_"):-len(".json")]
+        rows.append(_row(uid, json.load(open(p))))
+    with conn:
+        conn.executemany("INSERT OR REPLACE INTO features VALUES (?, ?, ?)", rows)
+    _notify({r[0] for r in rows})
+    return len(rows)
 
 if __name__ == "__main__":
-    print("Feature store module; call write_features/read_features/backfill_from_csv")
+    print("Feature store module; call write_features/read_features/read_features_many/backfill_from_csv")
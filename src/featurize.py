@@ -1,7 +1,9 @@
 import pandas as pd
 from sklearn.model_selection import train_test_split
+from storage import read_dataset, write_dataset
+from sampling import negative_downsample, save_sampling_info, NEG_SAMPLE_RATE
 
-def featurize_main():
+def featurize_main(neg_sample_rate=NEG_SAMPLE_RATE):
     INPUT = "data/raw/synthetic_ads.csv"
     TRAIN_OUT = "data/processed/train.csv"
     EVAL_OUT = "data/processed/eval.csv"
@@ -24,7 +26,7 @@ def featurize_main():
 
 
 
-    df = pd.read_csv(INPUT)
+    df = read_dataset(INPUT)
     df = featurize(df)
 
 
@@ -34,11 +36,16 @@ def featurize_main():
     )
 
 
-    train.to_csv(TRAIN_OUT, index=False)
-    eval_.to_csv(EVAL_OUT, index=False)
+    # only the training split is downsampled; eval keeps the true CTR for calibration checks
+    n_train = len(train)
+    train = negative_downsample(train, neg_sample_rate)
+    save_sampling_info(neg_sample_rate, n_train, len(train))
 
+    write_dataset(train, TRAIN_OUT)
+    write_dataset(eval_, EVAL_OUT)
 
-    print(f"✅ Train rows: {len(train)}, Eval rows: {len(eval_)}")
+
+    print(f"✅ Train rows: {len(train)} (negative sampling rate {neg_sample_rate}), Eval rows: {len(eval_)}")
 
 if __name__ == "__main__":
     featurize_main()
\ No newline at end of file
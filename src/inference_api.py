@@ -1,26 +1,210 @@
 from fastapi import FastAPI
 from pydantic import BaseModel
-from joblib import load
+from starlette.concurrency import run_in_threadpool
+from typing import List, Optional
+from collections import OrderedDict
+import asyncio
+import threading
+import numpy as np
 import uvicorn
 import os
+import feature_cache
+from microbatch import MicroBatcher
+import compact_model
+import model_registry
 
-MODEL_PATH = "models/logistic_regression.pkl"  # choose model to serve
+# pandas / sklearn are imported on first use (pickled pipelines, /predict_ctr_batch) to keep cold start short
+MODEL_PATH = os.environ.get("MODEL_PATH", "models/logistic_regression.pkl")  # pickled pipeline or compact .npz export
+# Compact .npz snapshot of MODEL_PATH: written by the first worker that loads the pickle,
+# later workers start from it without importing sklearn (used while at least as new as MODEL_PATH)
+MODEL_SNAPSHOT = os.environ.get("MODEL_SNAPSHOT", "")
+# Shared read-only model memory for multi-worker serving: arrays are memory-mapped from
+# models/shared/<version>/ by every worker, and MODEL_PATH is polled for hot reload
+SHARED_MODEL = os.environ.get("SHARED_MODEL", "0") == "1"
+MODEL_RELOAD_S = float(os.environ.get("MODEL_RELOAD_S", "2"))
+# Serve the current version of a model_registry directory instead of MODEL_PATH; the manifest is
+# polled every MODEL_RELOAD_S, new versions are loaded + warmed in the background and swapped in
+MODEL_REGISTRY = os.environ.get("MODEL_REGISTRY", "")
+WARM_VERSIONS = int(os.environ.get("WARM_VERSIONS", "2"))  # loaded versions kept for instant rollback
+WARM_FEATURE_CACHE = os.environ.get("WARM_FEATURE_CACHE", "0") == "1"
+# Micro-batching of concurrent /predict_ctr requests into one predict_proba call
+MICROBATCH = os.environ.get("MICROBATCH", "1") == "1"
+MICROBATCH_MAX_BATCH = int(os.environ.get("MICROBATCH_MAX_BATCH", "64"))
+MICROBATCH_MAX_WAIT_MS = float(os.environ.get("MICROBATCH_MAX_WAIT_MS", "2"))
+MICROBATCH_QUEUE_SIZE = int(os.environ.get("MICROBATCH_QUEUE_SIZE", "4096"))
 
 class RequestBody(BaseModel):
-    user_features: dict
+    user_features: dict = {}
     ad_features: dict
+    user_id: Optional[int] = None  # stored features are joined in; request user_features win
+
+class BatchRequestBody(BaseModel):
+    user_features: dict = {}
+    ads: List[dict]
+    user_id: Optional[int] = None
+    top_k: Optional[int] = None
+    rank_by: str = "pctr"  # "pctr" or "ecpm" (bid x pCTR)
+
+USER_COLUMNS = ["age_bucket", "geo", "interests", "device"]
+AD_COLUMNS = ["creative_type"]
 
 app = FastAPI()
 model = None
+batcher = None
+shared = None
+watcher = None
+serving_version = None
+warm_models = OrderedDict()  # registry version -> warmed model, most recently served last
+failed_versions = set()
+registry_lock = threading.Lock()
+
+def write_snapshot(pipe, snapshot):
+    tmp = snapshot + ".tmp"
+    try:
+        with open(tmp, "wb") as f:
+            compact_model.save_compact(pipe, f)
+        os.replace(tmp, snapshot)  # concurrent workers never see a half-written file
+        print("✅ Wrote model snapshot:", snapshot)
+    except Exception as e:
+        print("⚠️ Could not write model snapshot:", e)
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+def load_serving_model(path, snapshot=""):
+    """(model, loaded path): a fresh snapshot if there is one, else the model at path."""
+    if snapshot and os.path.exists(snapshot) and (
+            not os.path.exists(path) or os.path.getmtime(snapshot) >= os.path.getmtime(path)):
+        return compact_model.load_model(snapshot), snapshot
+    m = compact_model.load_model(path)
+    if str(path).endswith(compact_model.COMPACT_SUFFIX):
+        return m, path
+    if snapshot:
+        write_snapshot(m, snapshot)
+    from columnar import upgrade_pipeline
+    # DictVectorizer pipelines get a columnar "vec" step so they also score DataFrames
+    return upgrade_pipeline(m), path
+
+def warm_up(m):
+    """Run both scoring paths once so the first real request doesn't pay for lazy imports / caches."""
+    score_dicts(prepare_dict_for_pipe({}, {}), m)
+    try:
+        m.predict_proba(build_candidate_frame({}, [{}]))
+    except Exception:
+        pass  # models without a columnar vec step score /predict_ctr_batch through dicts
+
+def load_version(version):
+    if version in warm_models:
+        warm_models.move_to_end(version)
+        return warm_models[version]
+    manifest = model_registry.load_manifest(MODEL_REGISTRY)
+    path = model_registry.artifact_path(version, MODEL_REGISTRY, manifest)
+    if SHARED_MODEL:
+        from shared_model import load_or_publish
+        m = load_or_publish(path, lambda p: load_serving_model(p)[0], manifest["versions"][version]["sha256"])
+    else:
+        m = load_serving_model(path)[0]
+    warm_up(m)
+    warm_models[version] = m
+    while len(warm_models) > max(WARM_VERSIONS, 1):
+        warm_models.popitem(last=False)
+    if SHARED_MODEL:
+        # published versions other than the warm ones (kept for instant rollback) age out
+        from shared_model import prune, SHARED_DIR, KEEP_VERSIONS
+        prune(SHARED_DIR, KEEP_VERSIONS, current=manifest["versions"][version]["sha256"],
+              pinned=[manifest["versions"][v]["sha256"] for v in warm_models])
+    return m
+
+def sync_registry():
+    """Swap in the registry's current version if it changed; True when a new model went live."""
+    with registry_lock:  # watcher and /model/rollback may sync concurrently
+        return _sync_registry()
+
+def _sync_registry():
+    global model, serving_version
+    try:
+        version = model_registry.current_version(MODEL_REGISTRY)
+    except Exception as e:
+        print("⚠️ Could not read model registry:", e)
+        return False
+    if version is None or version == serving_version or version in failed_versions:
+        return False
+    try:
+        m = load_version(version)
+    except Exception as e:
+        print(f"⚠️ Could not load model version {version}, keeping {serving_version}:", e)
+        failed_versions.add(version)
+        return False
+    model, serving_version = m, version  # one reference swap; in-flight requests keep the old model
+    print("✅ Serving model version", version)
+    return True
+
+def refresh_model():
+    global model
+    if MODEL_REGISTRY:
+        return sync_registry()
+    if shared is not None and shared.refresh():
+        model = shared.model
+        return True
+    return False
 
 @app.on_event("startup")
 def load_model():
-    global model
-    if os.path.exists(MODEL_PATH):
-        model = load(MODEL_PATH)
-        print("Loaded model:", MODEL_PATH)
+    global model, shared
+    if MODEL_REGISTRY:
+        if not sync_registry():
+            print("No servable version in", MODEL_REGISTRY, "yet; API will return base CTR until one is promoted.")
+    elif SHARED_MODEL:
+        from shared_model import SharedModel
+        shared = SharedModel(MODEL_PATH, lambda p: load_serving_model(p)[0])
+        if shared.refresh():
+            model = shared.model
+        else:
+            print("Model not found; API will return base CTR until", MODEL_PATH, "appears.")
+    elif os.path.exists(MODEL_PATH) or (MODEL_SNAPSHOT and os.path.exists(MODEL_SNAPSHOT)):
+        model, loaded = load_serving_model(MODEL_PATH, MODEL_SNAPSHOT)
+        print("Loaded model:", loaded)
     else:
         print("Model not found; API will return base CTR.")
+    if WARM_FEATURE_CACHE:
+        try:
+            feature_cache.default_store().warm_from_impressions()
+        except Exception as e:
+            print("Could not warm feature cache:", e)
+
+@app.on_event("startup")
+async def start_batcher():
+    global batcher
+    if MICROBATCH:
+        batcher = MicroBatcher(score_dicts, max_batch=MICROBATCH_MAX_BATCH,
+                               max_wait_ms=MICROBATCH_MAX_WAIT_MS, queue_size=MICROBATCH_QUEUE_SIZE)
+        await batcher.start()
+
+@app.on_event("shutdown")
+async def stop_batcher():
+    if batcher is not None:
+        await batcher.stop()
+
+async def watch_model():
+    while True:
+        await asyncio.sleep(MODEL_RELOAD_S)
+        await run_in_threadpool(refresh_model)
+
+@app.on_event("startup")
+async def start_model_watcher():
+    global watcher
+    if (MODEL_REGISTRY or shared is not None) and MODEL_RELOAD_S > 0:
+        watcher = asyncio.create_task(watch_model())
+
+@app.on_event("shutdown")
+async def stop_model_watcher():
+    if watcher is not None:
+        watcher.cancel()
+
+def join_user_features(user_id, user_features):
+    if user_id is None:
+        return user_features
+    stored = feature_cache.read_features(user_id) or {}
+    return {**stored, **user_features}
 
 def prepare_dict_for_pipe(user_features, ad_features):
     d = {}
@@ -39,20 +223,126 @@ def prepare_dict_for_pipe(user_features, ad_features):
     d["bid"] = float(ad_features.get("bid", 0.5))
     return [d]
 
+def score_dicts(X, m=None):
+    """pCTR for a list of feature dicts in one predict_proba call."""
+    m = m or model  # the whole call scores with one model even if a swap happens meanwhile
+    try:
+        return m.predict_proba(X)[:,1]
+    except Exception:
+        # fallback if pipe expects vectorizer transform
+        return m.predict_proba(m.named_steps["vec"].transform(X))[:,1]
+
 @app.post("/predict_ctr")
-def predict(req: RequestBody):
-    if model is not None:
-        X = prepare_dict_for_pipe(req.user_features, req.ad_features)
-        try:
-            p = model.predict_proba(X)[:,1][0]
-        except Exception:
-            # fallback if pipe expects vectorizer transform
-            p = model.predict_proba(model.named_steps["vec"].transform(X))[:,1][0]
+async def predict(req: RequestBody):
+    # feature store reads (SQLite on a cache miss) and the pandas fallback stay off the event loop
+    user_features = await run_in_threadpool(join_user_features, req.user_id, req.user_features)
+    m = model
+    if m is not None:
+        X = prepare_dict_for_pipe(user_features, req.ad_features)
+        if batcher is not None:
+            p = await batcher.submit(X[0])
+        else:
+            p = (await run_in_threadpool(score_dicts, X, m))[0]
         return {"pctr": float(p)}
     else:
-        # crude base ctr fallback
-        bf = 0.02
-        return {"pctr": bf}
+        # no model loaded: rule-based pCTR from the request context
+        pctr, _ = await run_in_threadpool(fallback_scores, user_features, [req.ad_features])
+        return {"pctr": float(pctr[0])}
+
+def build_candidate_frame(user_features, ads):
+    """One row per candidate ad; user-side columns are broadcast scalars shared by every row."""
+    import pandas as pd
+    n = len(ads)
+    ad_df = pd.DataFrame.from_records(ads, index=range(n)) if n else pd.DataFrame(index=range(0))
+    cols = {c: user_features[c] for c in USER_COLUMNS if c in user_features}
+    cols["hour_of_day"] = user_features.get("hour_of_day", 12)
+    for c in AD_COLUMNS:
+        if c in ad_df:
+            cols[c] = ad_df[c]
+    cols["bid"] = ad_df["bid"].fillna(0.5).astype(float) if "bid" in ad_df else 0.5
+    return pd.DataFrame(cols, index=range(n))
+
+def fallback_pctr(df):
+    """data_generator's base CTR rules over candidate columns (missing features count as no match)."""
+    from data_generator import base_ctr_array
+    return base_ctr_array(df.get("age_bucket"), df.get("interests"), df.get("creative_type"), df["hour_of_day"])
+
+def fallback_scores(user_features, ads):
+    """(pCTR, bids) for the candidates when no model is loaded."""
+    df = build_candidate_frame(user_features, ads)
+    return fallback_pctr(df), df["bid"].to_numpy()
+
+def score_candidates(user_features, ads, m=None):
+    m = m or model  # one model for every candidate even if a hot swap happens meanwhile
+    df = build_candidate_frame(user_features, ads)
+    try:
+        return m.predict_proba(df)[:,1], df["bid"].to_numpy()
+    except Exception:
+        # pipelines without a vec step: fall back to one dict per candidate, still one predict call
+        X = [prepare_dict_for_pipe(user_features, ad)[0] for ad in ads]
+        return score_dicts(X, m), df["bid"].to_numpy()
+
+def top_k_indices(scores, k):
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=int)
+    idx = np.argpartition(-scores, k - 1)[:k]
+    return idx[np.argsort(-scores[idx], kind="stable")]
+
+@app.post("/predict_ctr_batch")
+def predict_batch(req: BatchRequestBody):
+    user_features = join_user_features(req.user_id, req.user_features)
+    m = model
+    if m is not None and req.ads:
+        pctr, bids = score_candidates(user_features, req.ads, m)
+    else:
+        pctr, bids = fallback_scores(user_features, req.ads)
+    out = {"pctr": [float(p) for p in pctr]}
+    if req.top_k is not None:
+        score = pctr * bids if req.rank_by == "ecpm" else pctr
+        out["top"] = [{
+            "index": int(i),
+            "ad_id": req.ads[i].get("ad_id"),
+            "pctr": float(pctr[i]),
+            "ecpm": float(pctr[i] * bids[i]),
+        } for i in top_k_indices(score, req.top_k)]
+    return out
+
+@app.get("/metrics/batching")
+def batching_metrics():
+    return batcher.metrics() if batcher is not None else {"enabled": False}
+
+@app.get("/model/version")
+def model_version():
+    if MODEL_REGISTRY:
+        return {
+            "registry": MODEL_REGISTRY,
+            "version": serving_version,
+            "warm_versions": list(warm_models),
+            "loaded": model is not None,
+        }
+    return {
+        "model_path": MODEL_PATH,
+        "shared": shared is not None,
+        "version": shared.version if shared is not None else None,
+        "loaded": model is not None,
+    }
+
+@app.post("/model/rollback")
+def model_rollback():
+    """Point the registry back at the previous version; every worker picks it up on its next poll."""
+    if not MODEL_REGISTRY:
+        return {"error": "MODEL_REGISTRY is not configured"}
+    try:
+        model_registry.rollback(MODEL_REGISTRY)
+    except Exception as e:
+        return {"error": str(e)}
+    sync_registry()  # instant here when the previous version is still warm
+    return model_version()
+
+@app.get("/feature_cache/stats")
+def feature_cache_stats():
+    return feature_cache.default_store().stats()
 
 if __name__ == "__main__":
     uvicorn.run("inference_api:app", host="0.0.0.0", port=8000, reload=False)
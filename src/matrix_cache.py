@@ -0,0 +1,116 @@
+"""
+Content-addressed cache of vectorized feature matrices:
+- Key = sha256(dataset content, vocabulary, feature spec, label); an entry holds the CSR arrays,
+  labels and feature names as plain .npy files, so a hit is a few memory maps
+- Trainers and evaluators share one build per (dataset, vocabulary) instead of each re-featurizing
+- Size-bounded: least recently used entries are evicted once the cache exceeds MAX_CACHE_MB
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+import scipy.sparse as sp
+from columnar import CATEGORICAL_FEATURES, NUMERIC_FEATURES, FEATURE_COLUMNS, columnar_feature_names, columnar_transform
+from storage import read_dataset, resolve_path
+from utils import file_digest
+
+CACHE_DIR = "data/matrix_cache"
+MAX_CACHE_MB = float(os.environ.get("MATRIX_CACHE_MB", "1024"))
+LABEL = "clicked"
+FORMAT_VERSION = 1
+DIGESTS_JSON = "digests.json"  # resolved path -> [size, mtime_ns, sha256], so unchanged files aren't rehashed
+
+def dataset_digest(path, cache_dir=CACHE_DIR):
+    path = resolve_path(path)
+    memo_path = os.path.join(cache_dir, DIGESTS_JSON)
+    try:
+        memo = json.load(open(memo_path))
+    except (FileNotFoundError, ValueError):
+        memo = {}
+    st = os.stat(path)
+    hit = memo.get(path)
+    if hit and hit[:2] == [st.st_size, st.st_mtime_ns]:
+        return hit[2]
+    memo[path] = [st.st_size, st.st_mtime_ns, file_digest(path)]
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp = f"{memo_path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(memo, f)
+    os.replace(tmp, memo_path)
+    return memo[path][2]
+
+def cache_key(data_digest, vocabulary=None, label=LABEL):
+    spec = {
+        "format": FORMAT_VERSION,
+        "categorical": CATEGORICAL_FEATURES,
+        "numeric": NUMERIC_FEATURES,
+        "label": label,
+        "vocabulary": list(vocabulary) if vocabulary is not None else None,  # None: fit on these rows
+    }
+    return hashlib.sha256((data_digest + json.dumps(spec, sort_keys=True)).encode()).hexdigest()[:32]
+
+def _save(entry_dir, X, y, feature_names):
+    np.save(os.path.join(entry_dir, "data.npy"), X.data)
+    np.save(os.path.join(entry_dir, "indices.npy"), X.indices)
+    np.save(os.path.join(entry_dir, "indptr.npy"), X.indptr)
+    np.save(os.path.join(entry_dir, "y.npy"), y)
+    with open(os.path.join(entry_dir, "meta.json"), "w") as f:
+        json.dump({"shape": list(X.shape), "feature_names": list(feature_names)}, f)
+
+def _load(entry_dir):
+    meta = json.load(open(os.path.join(entry_dir, "meta.json")))
+    arr = {k: np.load(os.path.join(entry_dir, k + ".npy"), mmap_mode="r") for k in ("data", "indices", "indptr", "y")}
+    X = sp.csr_matrix((arr["data"], arr["indices"], arr["indptr"]), shape=tuple(meta["shape"]))
+    return X, arr["y"], meta["feature_names"]
+
+def _entries(cache_dir):
+    if not os.path.isdir(cache_dir):
+        return []
+    return [os.path.join(cache_dir, d) for d in os.listdir(cache_dir)
+            if not d.startswith(".tmp-") and os.path.isdir(os.path.join(cache_dir, d))]
+
+def _entry_bytes(entry_dir):
+    return sum(os.path.getsize(os.path.join(entry_dir, f)) for f in os.listdir(entry_dir))
+
+def evict(cache_dir=CACHE_DIR, max_mb=MAX_CACHE_MB, keep=()):
+    """Drop least recently used entries (oldest mtime first) until the cache fits in max_mb."""
+    entries = sorted(_entries(cache_dir), key=os.path.getmtime)
+    sizes = {d: _entry_bytes(d) for d in entries}
+    total = sum(sizes.values())
+    evicted = []
+    for d in entries:
+        if total <= max_mb * 1024 * 1024:
+            break
+        if d in keep:
+            continue
+        shutil.rmtree(d, ignore_errors=True)
+        total -= sizes[d]
+        evicted.append(os.path.basename(d))
+    return evicted
+
+def load_or_build(path, vocabulary=None, label=LABEL, cache_dir=CACHE_DIR, max_mb=MAX_CACHE_MB):
+    """(X csr, y, feature_names) for the rows of path; vocabulary=None fits the vocabulary on them."""
+    key = cache_key(dataset_digest(path, cache_dir), vocabulary, label)
+    entry_dir = os.path.join(cache_dir, key)
+    if os.path.exists(os.path.join(entry_dir, "meta.json")):
+        os.utime(entry_dir)  # mark as recently used for eviction
+        return _load(entry_dir)
+
+    df = read_dataset(path, columns=FEATURE_COLUMNS + [label])
+    names = list(vocabulary) if vocabulary is not None else columnar_feature_names(df)
+    X = columnar_transform(df, {f: i for i, f in enumerate(names)}, len(names))
+    y = df[label].to_numpy()
+
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp = tempfile.mkdtemp(prefix=".tmp-", dir=cache_dir)
+    _save(tmp, X, y, names)
+    try:
+        os.rename(tmp, entry_dir)
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)  # a concurrent stage built the same entry first
+    print(f"✅ Cached feature matrix {X.shape} for {path} ({key[:12]})")
+    evict(cache_dir, max_mb, keep={entry_dir})
+    return _load(entry_dir)
@@ -0,0 +1,116 @@
+"""
+Micro-batching request coalescer for online scoring:
+- Callers await submit(item); items wait in a bounded asyncio.Queue (a full queue applies backpressure)
+- A single worker task collects up to max_batch items or waits at most max_wait_ms after the first one
+- One vectorized score_fn(items) call per batch (run in a thread so the event loop keeps accepting),
+  results are fanned back out to the waiting requests in order
+- Batch-size distribution / error counters via metrics()
+"""
+
+import asyncio
+import time
+from collections import Counter
+
+MAX_BATCH = 64
+MAX_WAIT_MS = 2.0
+QUEUE_SIZE = 4096
+
+def _bucket(n):
+    # power-of-two histogram buckets: "1", "2", "3-4", "5-8", ...
+    hi = 1
+    while hi < n:
+        hi *= 2
+    lo = hi // 2 + 1
+    return str(hi) if lo >= hi else f"{lo}-{hi}"
+
+class MicroBatcher:
+    def __init__(self, score_fn, max_batch=MAX_BATCH, max_wait_ms=MAX_WAIT_MS, queue_size=QUEUE_SIZE):
+        self.score_fn = score_fn  # list of items -> sequence of results, same order
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.queue_size = queue_size
+        self._queue = None
+        self._task = None
+        self._inflight = []  # (item, future) pairs taken off the queue and not yet answered
+        self.batch_sizes = Counter()
+        self.n_batches = self.n_items = self.n_errors = 0
+        self.score_seconds = 0.0
+
+    async def start(self):
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        pending, self._inflight = self._inflight, []
+        while self._queue is not None and not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+        for _, fut in pending:
+            if not fut.done():
+                fut.set_exception(RuntimeError("micro-batcher stopped"))
+
+    async def submit(self, item):
+        fut = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, fut))
+        return await fut
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        batch = self._inflight = []
+        batch.append(await self._queue.get())
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            items = [item for item, _ in batch]
+            t0 = time.perf_counter()
+            try:
+                results = await loop.run_in_executor(None, self.score_fn, items)
+                if len(results) != len(batch):
+                    raise ValueError(f"score_fn returned {len(results)} results for {len(batch)} items")
+                for (_, fut), res in zip(batch, results):
+                    if not fut.done():
+                        fut.set_result(res)
+            except Exception as e:
+                self.n_errors += 1
+                for _, fut in batch:
+                    if not fut.done():
+                        fut.set_exception(e)
+            self.score_seconds += time.perf_counter() - t0
+            self.n_batches += 1
+            self.n_items += len(batch)
+            self.batch_sizes[_bucket(len(batch))] += 1
+            self._inflight = []
+
+    def metrics(self):
+        return {
+            "max_batch": self.max_batch,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "batches": self.n_batches,
+            "items": self.n_items,
+            "errors": self.n_errors,
+            "mean_batch_size": self.n_items / self.n_batches if self.n_batches else 0.0,
+            "mean_score_ms": 1000.0 * self.score_seconds / self.n_batches if self.n_batches else 0.0,
+            "batch_size_histogram": dict(sorted(self.batch_sizes.items(), key=lambda kv: int(kv[0].split("-")[-1]))),
+        }
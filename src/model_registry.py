@@ -0,0 +1,89 @@
+"""
+Versioned model registry for serving:
+- register() copies a model into models/registry/vNNNN/ as an immutable artifact (+ metrics, sha256)
+- manifest.json records all versions, the promotion history and the version to serve ("current")
+- promote() / rollback() only rewrite the manifest (temp file + rename), never an artifact,
+  so serving workers watching it can load, warm and swap versions without a half-written file
+"""
+
+import json
+import os
+import shutil
+from datetime import datetime
+from utils import file_digest
+
+REGISTRY_DIR = "models/registry"
+MANIFEST = "manifest.json"
+
+def manifest_path(registry_dir=REGISTRY_DIR):
+    return os.path.join(registry_dir, MANIFEST)
+
+def load_manifest(registry_dir=REGISTRY_DIR):
+    try:
+        with open(manifest_path(registry_dir)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"current": None, "history": [], "versions": {}}
+
+def save_manifest(manifest, registry_dir=REGISTRY_DIR):
+    os.makedirs(registry_dir, exist_ok=True)
+    tmp = manifest_path(registry_dir) + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, manifest_path(registry_dir))
+
+def current_version(registry_dir=REGISTRY_DIR):
+    return load_manifest(registry_dir)["current"]
+
+def artifact_path(version, registry_dir=REGISTRY_DIR, manifest=None):
+    manifest = manifest or load_manifest(registry_dir)
+    return os.path.join(registry_dir, manifest["versions"][version]["file"])
+
+def register(model_path, name, metrics=None, registry_dir=REGISTRY_DIR):
+    """Add model_path as a new immutable version (an identical artifact reuses its version)."""
+    manifest = load_manifest(registry_dir)
+    digest = file_digest(model_path)
+    for version, info in manifest["versions"].items():
+        if info["sha256"] == digest:
+            return version
+
+    version = "v%04d" % (1 + max([int(v[1:]) for v in manifest["versions"]] + [0]))
+    file = os.path.join(version, "model" + os.path.splitext(model_path)[1])
+    os.makedirs(os.path.join(registry_dir, version), exist_ok=True)
+    tmp = os.path.join(registry_dir, file + ".tmp")
+    shutil.copy(model_path, tmp)
+    os.replace(tmp, os.path.join(registry_dir, file))
+
+    manifest["versions"][version] = {
+        "name": name,
+        "file": file,
+        "sha256": digest,
+        "source": model_path,
+        "metrics": metrics or {},
+        "registered_at": datetime.utcnow().isoformat() + "Z",
+    }
+    save_manifest(manifest, registry_dir)
+    print(f"✅ Registered {model_path} as {version}")
+    return version
+
+def promote(version, registry_dir=REGISTRY_DIR):
+    manifest = load_manifest(registry_dir)
+    if version not in manifest["versions"]:
+        raise KeyError(f"unknown model version {version}")
+    if manifest["current"] != version:
+        manifest["current"] = version
+        manifest["history"].append(version)
+        save_manifest(manifest, registry_dir)
+    print(f"✅ Promoted {version} ({manifest['versions'][version]['name']}) to current")
+    return version
+
+def rollback(registry_dir=REGISTRY_DIR):
+    """Serve the previously promoted version again; returns it."""
+    manifest = load_manifest(registry_dir)
+    if len(manifest["history"]) < 2:
+        raise RuntimeError("no previous version to roll back to")
+    manifest["history"].pop()
+    manifest["current"] = manifest["history"][-1]
+    save_manifest(manifest, registry_dir)
+    print(f"✅ Rolled back to {manifest['current']}")
+    return manifest["current"]
@@ -2,10 +2,12 @@ import json, os
 import numpy as np
 import pandas as pd
 from scipy.stats import entropy
+from storage import read_dataset, dataset_exists
+from sampling import SAMPLING_JSON, load_sampling_rate, negative_weights
 
 RAW = "data/raw/synthetic_ads.csv"
 OUT = "reports/monitoring.json"
-BASELINE_SAMPLE = "data/processed/train.csv"
+BASELINE_SAMPLE = "data/processed/train.csv"  # may be negative-downsampled: negatives reweighted by 1 / rate
 
 def kl_divergence(p, q, eps=1e-9):
     p = np.asarray(p) + eps
@@ -18,15 +20,18 @@ def distribution(series, bins=10):
     vals, edges = np.histogram(series, bins=bins)
     return vals.astype(float)
 
-def run_monitoring():
+def run_monitoring(baseline_path=BASELINE_SAMPLE, current_path=RAW, out_json=OUT, sampling_json=SAMPLING_JSON):
     # simple checks: age_bucket distribution drift; pctr distribution if present; CTR change
-    base = pd.read_csv(BASELINE_SAMPLE) if os.path.exists(BASELINE_SAMPLE) else None
-    curr = pd.read_csv(RAW) if os.path.exists(RAW) else None
+    cols = ["age_bucket", "clicked"]
+    base = read_dataset(baseline_path, columns=cols) if dataset_exists(baseline_path) else None
+    curr = read_dataset(current_path, columns=cols) if dataset_exists(current_path) else None
 
     report = {"alerts": [], "checks": {}}
     if base is not None and curr is not None:
+        # undo negative downsampling of the training set so the baseline reflects the raw log
+        w = pd.Series(negative_weights(base["clicked"], load_sampling_rate(sampling_json)), index=base.index)
         # age bucket drift
-        base_dist = base['age_bucket'].value_counts(normalize=True).to_dict()
+        base_dist = (w.groupby(base['age_bucket']).sum() / w.sum()).to_dict()
         curr_dist = curr['age_bucket'].value_counts(normalize=True).to_dict()
         # compute simple L1 diff
         age_keys = set(base_dist) | set(curr_dist)
@@ -36,7 +41,7 @@ def run_monitoring():
             report["alerts"].append(f"Age distribution L1 > 0.2 ({l1:.3f})")
 
         # CTR change
-        base_ctr = base['clicked'].mean() if 'clicked' in base else None
+        base_ctr = float(np.dot(w, base['clicked']) / w.sum()) if 'clicked' in base else None
         curr_ctr = curr['clicked'].mean() if 'clicked' in curr else None
         report["checks"]["base_ctr"] = base_ctr
         report["checks"]["curr_ctr"] = curr_ctr
@@ -44,9 +49,9 @@ def run_monitoring():
             if curr_ctr < base_ctr * 0.7:
                 report["alerts"].append("CTR dropped >30% vs baseline")
 
-    with open(OUT, "w") as f:
+    with open(out_json, "w") as f:
         json.dump(report, f, indent=2)
-    print("Monitoring report written to", OUT)
+    print("Monitoring report written to", out_json)
     return report
 
 if __name__ == "__main__":
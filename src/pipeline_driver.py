@@ -1,70 +1,76 @@
-import os, pprint
-from data_generator import data_gen_main  # if you use a main() in generator; else call script directly
-from featurize import featurize_main
-from train_baseline_lr import lr_main
-from train_gbt import gbt_main
-from train_dnn import dnn_main
-from compare_models import compare_and_choose
-from ab_test import run_ab_test
-from rtb_simulator import run_rtb_sim
-from report_generator import generate_final_report
-from monitoring import run_monitoring
-from dashboard import dashboard_main
+import os
 import subprocess
 
-def safe_run(func, *args, **kwargs):
-    try:
-        return func(*args, **kwargs)
-    except Exception as e:
-        print(f"[WARN] Step {func.__name__} failed: {e}")
-        return None
+# step name -> (module, function); dag_executor imports a stage's module (and its sklearn / streamlit
+# imports) only when the step runs
+STAGES = {
+    "data_gen": ("data_generator", "data_gen_main"),
+    "featurize": ("featurize", "featurize_main"),
+    "train_lr": ("train_baseline_lr", "lr_main"),
+    "train_gbt": ("train_gbt", "gbt_main"),
+    "train_dnn": ("train_dnn", "dnn_main"),
+    "train_stream": ("train_streaming_lr", "streaming_lr_main"),
+    "tune": ("tune", "tune_main"),
+    "compare": ("compare_models", "compare_and_choose"),
+    "ab_test": ("ab_test", "run_ab_test"),
+    "rtb": ("rtb_simulator", "run_rtb_sim"),
+    "monitoring": ("monitoring", "run_monitoring"),
+    "report": ("report_generator", "generate_final_report"),
+    "dashboard": ("dashboard", "dashboard_main"),
+}
 
-def main():
-    print("=== PIPELINE DRIVER START ===")
-    # # 1. Data generation (only if missing)
-    # if not os.path.exists("data/raw/synthetic_ads.csv"):
-    #     print("Generating synthetic data...")
-    #     safe_run(data_gen_main)
-    # else:
-    #     print("Found existing synthetic data, skipping generation.")
-
-    # # 2. Featurize + splits
-    # print("Featurizing + train/eval split...")
-    # safe_run(featurize_main)
-
-    # # 3. Train models
-    # print("Training baseline LR...")
-    # safe_run(lr_main)
-    # print("Training GBT...")
-    # safe_run(gbt_main)
-    # print("Training DNN...")
-    # safe_run(dnn_main)
-
-    # # 4. Compare models and pick best
-    # print("Comparing models...")
-    # best = safe_run(compare_and_choose)
-    # print("Best model:", best)
-
-    # # 5. Run A/B test (baseline vs best)
-    # print("Running A/B test (baseline vs candidate)...")
-    # ab_res = safe_run(run_ab_test, model_path=f"models/{best}" if best else None)
-
-    # # 6. Run RTB simulation using chosen model
-    # print("Running RTB simulation using best model...")
-    # rtb_res = safe_run(run_rtb_sim, model_path=f"models/{best}" if best else None)
-
-    # # 7. Run monitoring
-    # print("Running monitoring checks...")
-    # monitor_res = safe_run(run_monitoring)
-
-    # # 8. Final report
-    # print("Generating final report...")
-    # final_rep = safe_run(generate_final_report)
+RAW = "data/raw/synthetic_ads.csv"
+TRAIN = "data/processed/train.csv"
+EVAL = "data/processed/eval.csv"
+SAMPLING = "data/processed/train_sampling.json"
+# fraction of non-click rows featurize keeps in train.csv (read here too, so a new rate reruns featurize)
+NEG_SAMPLE_RATE = float(os.environ.get("NEG_SAMPLE_RATE", "1.0"))
 
+# stage -> dependencies + the files it reads / writes (used by dag_executor to skip up-to-date stages)
+PIPELINE_DAG = {
+    "data_gen": {"deps": [], "inputs": [], "outputs": [RAW]},
+    "featurize": {"deps": ["data_gen"], "inputs": [RAW], "outputs": [TRAIN, EVAL, SAMPLING],
+                  "kwargs": {"neg_sample_rate": NEG_SAMPLE_RATE}},
+    "train_lr": {"deps": ["featurize"], "inputs": [TRAIN, EVAL],
+                 "outputs": ["models/logistic.pkl", "reports/offline_metrics.json", "reports/calibration_table.csv"]},
+    "train_gbt": {"deps": ["featurize"], "inputs": [TRAIN, EVAL],
+                  "outputs": ["models/gbt.pkl", "reports/gbt_offline_metrics.json", "reports/gbt_calibration_table.csv"]},
+    "train_dnn": {"deps": ["featurize"], "inputs": [TRAIN, EVAL],
+                  "outputs": ["models/dnn.pkl", "reports/dnn_offline_metrics.json", "reports/dnn_calibration_table.csv"]},
+    "train_stream": {"deps": ["featurize"], "inputs": [TRAIN, EVAL],
+                     "outputs": ["models/streaming_lr.pkl", "reports/streaming_lr_offline_metrics.json"]},
+    "tune": {"deps": ["featurize"], "inputs": [TRAIN],
+             "outputs": ["models/tuned_logistic.pkl", "models/tuned_gbt.pkl", "models/tuned_dnn.pkl",
+                         "reports/tuning_best.json", "reports/tuning_trials.csv"]},
+    "compare": {"deps": ["train_lr", "train_gbt", "train_dnn", "train_stream", "tune"],
+                "inputs": [EVAL, "models/logistic.pkl", "models/gbt.pkl", "models/dnn.pkl",
+                           "models/streaming_lr.pkl", "reports/tuning_best.json"],
+                "outputs": ["models/best_model.pkl", "reports/best_model_info.json",
+                            "reports/all_offline_metrics.json", "reports/compare_report.txt"]},
+    "ab_test": {"deps": ["compare"], "inputs": [RAW, "models/logistic.pkl"], "outputs": ["reports/ab_results.json"]},
+    "rtb": {"deps": ["compare"], "inputs": [RAW, "models/logistic.pkl"], "outputs": ["reports/rtb_report.json"]},
+    "monitoring": {"deps": ["featurize"], "inputs": [RAW, TRAIN, SAMPLING], "outputs": ["reports/monitoring.json"]},
+    "report": {"deps": ["ab_test", "rtb", "monitoring"],
+               "inputs": ["reports/offline_metrics.json", "reports/ab_results.json", "reports/rtb_report.json"],
+               "outputs": ["reports/final_report.md"]},
+}
 
+def main(n_jobs=None, force=False, dashboard=True):
+    print("=== PIPELINE DRIVER START ===")
+    from dag_executor import run_dag
+    from storage import resolve_path  # datasets may live in a .parquet / .feather sibling
+    status = run_dag(PIPELINE_DAG, STAGES, n_jobs=n_jobs, force=force, resolve=resolve_path)
     print("=== PIPELINE DRIVER DONE ===")
 
-    subprocess.run(["streamlit", "run", "src\dashboard.py"])
+    if dashboard:
+        subprocess.run(["streamlit", "run", os.path.join("src", "dashboard.py")])
+    return status
 
 if __name__ == "__main__":
-    main()
+    import argparse
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--jobs", type=int, default=None, help="parallel stages (default: all cores)")
+    ap.add_argument("--force", action="store_true", help="rerun every stage even if up to date")
+    ap.add_argument("--no-dashboard", action="store_true")
+    args = ap.parse_args()
+    main(n_jobs=args.jobs, force=args.force, dashboard=not args.no_dashboard)
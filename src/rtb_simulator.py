@@ -5,15 +5,23 @@ RTB Simulator:
 - Use model pCTR (if available) or base_ctr.
 - Budget management and simple pacing.
 - Produce per-advertiser metrics and final CPT/RPM of served campaigns.
+- Two engines share one seeded randomness plan (competitor sets + click draws):
+    - "loop": one simulate_auction call per impression (reference)
+    - "vectorized": batch pCTR, array bids/second-price resolution; budgets are
+      advanced in time-ordered blocks, committing rows up to the first auction
+      touched by a budget change, so reports match the loop engine exactly
 """
 
 import pandas as pd
 import numpy as np
 import os
-from joblib import load
 from utils import save_json
 import random
-from data_generator import base_ctr
+from data_generator import base_ctr, base_ctr_array
+from columnar import upgrade_pipeline
+from compact_model import load_model
+from batch_scoring import predict_in_batches
+from storage import read_dataset
 
 random.seed(42)
 np.random.seed(42)
@@ -28,11 +36,14 @@ FLOOR = 0.01
 AVG_REVENUE_PER_CLICK = 1.0  # to compute expected value (simple)
 BUDGET_PER_ADVERTISER = 50.0  # starting budget per advertiser (small for demo)
 PACING_HALF_LIFE = 0.5  # effect on bid as budget depletes (simple)
+ENGINE = "vectorized"  # "loop" or "vectorized"
+BLOCK_SIZE = 4096  # max auctions resolved per array step in the vectorized engine
+SEED = 42
 
 def try_load_model(path):
     if os.path.exists(path):
         try:
-            return load(path)
+            return load_model(path)
         except Exception as e:
             print("Could not load model:", e)
     return None
@@ -48,9 +59,27 @@ def make_bid(advertiser_bid, pctr, budget_remaining, baseline_p=0.02):
     multiplier = min(3.0, pctr / (baseline_p + 1e-9))
     pacing = 1.0 - (1 - PACING_HALF_LIFE) * (1 - budget_remaining / BUDGET_PER_ADVERTISER)
     bid = advertiser_bid * multiplier * pacing
-    return max(FLOOR, round(bid, 4))
+    return max(FLOOR, float(np.round(bid, 4)))
 
-def simulate_auction(req_row, model_pipe=None, advertisers_bids=None, advertiser_budgets=None):
+def make_bids(advertiser_bids, pctr, budget_remaining, baseline_p=0.02):
+    """Array version of make_bid (same float ops, element-wise)."""
+    multiplier = np.minimum(3.0, pctr / (baseline_p + 1e-9))
+    pacing = 1.0 - (1 - PACING_HALF_LIFE) * (1 - budget_remaining / BUDGET_PER_ADVERTISER)
+    bids = np.maximum(FLOOR, np.round(advertiser_bids * multiplier * pacing, 4))
+    return np.where(budget_remaining <= 0, 0.0, bids)
+
+def draw_auction_plan(n, pool_size, seed=SEED, chunk=100000):
+    """Pre-draw competitor sets (positions into the advertiser pool) and click uniforms."""
+    bidder_rng, click_rng = [np.random.default_rng(s) for s in np.random.SeedSequence(seed).spawn(2)]
+    k = min(pool_size, NUM_COMPETITORS)
+    bidders = np.empty((n, k), dtype=np.int64)
+    for start in range(0, n, chunk):
+        m = min(chunk, n - start)
+        bidders[start:start + m] = np.argsort(bidder_rng.random((m, pool_size)), axis=1)[:, :k]
+    return bidders, click_rng.random(n)
+
+def simulate_auction(req_row, model_pipe=None, advertisers_bids=None, advertiser_budgets=None,
+                     bidder_ids=None, click_u=None):
     # get base pctr
     if model_pipe is not None:
         try:
@@ -73,7 +102,9 @@ def simulate_auction(req_row, model_pipe=None, advertisers_bids=None, advertiser
     # advertisers_bids is dict {adv_id: base_bid}, budgets dict adv->budget
     adv_pool = list(advertisers_bids.keys())
     # pick a set of bidders (ensure current advertiser participates)
-    bidder_ids = random.sample(adv_pool, min(len(adv_pool), NUM_COMPETITORS))
+    if bidder_ids is None:
+        bidder_ids = random.sample(adv_pool, min(len(adv_pool), NUM_COMPETITORS))
+    bidder_ids = list(bidder_ids)
     if req_row.advertiser_id not in bidder_ids:
         bidder_ids[0] = int(req_row.advertiser_id)  # force the original advertiser into the auction
 
@@ -97,21 +128,26 @@ def simulate_auction(req_row, model_pipe=None, advertisers_bids=None, advertiser
         return {"won": False, "winner": None, "price": 0.0, "pctr": p}
     advertiser_budgets[winner] -= price_paid
     # determine click outcome
-    click = 1 if random.random() < p else 0
+    click = 1 if (random.random() if click_u is None else click_u) < p else 0
     revenue = click * AVG_REVENUE_PER_CLICK
     return {"won": True, "winner": winner, "price": price_paid, "pctr": p, "click": click, "revenue": revenue}
 
-def run_rtb_sim(data_path=DATA_IN, model_path=MODEL_PATH, out_json=OUT_JSON):
-    df = pd.read_csv(data_path)
-    model_pipe = try_load_model(model_path)
-    # init advertiser bids and budgets
-    advertisers = df["advertiser_id"].unique().tolist()
-    advertisers_bids = {int(a): float(0.5 + (int(a) % 10) * 0.1) for a in advertisers}  # varied base bids
-    advertiser_budgets = {int(a): float(BUDGET_PER_ADVERTISER) for a in advertisers}
+def batch_pctr(df, model_pipe=None):
+    """pCTR for every impression in one batch (base_ctr fallback)."""
+    if model_pipe is not None:
+        try:
+            return predict_in_batches(upgrade_pipeline(model_pipe), df)
+        except Exception as e:
+            print("Model present but error predicting:", e)
+    return base_ctr_array(df["age_bucket"], df["interests"], df["creative_type"], df["hour_of_day"])
 
-    logs = []   
-    for _, row in df.iterrows():
-        res = simulate_auction(row, model_pipe, advertisers_bids, advertiser_budgets)
+def _run_loop(df, model_pipe, advertisers_bids, advertiser_budgets, plan):
+    adv_pool = list(advertisers_bids.keys())
+    bidder_pos, click_u = plan
+    logs = []
+    for i, (_, row) in enumerate(df.iterrows()):
+        res = simulate_auction(row, model_pipe, advertisers_bids, advertiser_budgets,
+                               bidder_ids=[adv_pool[j] for j in bidder_pos[i]], click_u=click_u[i])
         log = {
             "impression_id": row.impression_id,
             "ad_id": int(row.ad_id),
@@ -123,8 +159,93 @@ def run_rtb_sim(data_path=DATA_IN, model_path=MODEL_PATH, out_json=OUT_JSON):
             "revenue": res.get("revenue", 0.0)
         }
         logs.append(log)
+    return pd.DataFrame(logs)
+
+def _run_vectorized(df, model_pipe, advertisers_bids, advertiser_budgets, plan, block_size=BLOCK_SIZE):
+    n = len(df)
+    pool = np.array(list(advertisers_bids.keys()), dtype=np.int64)
+    bidder_pos, click_u = plan
+    pctr = batch_pctr(df, model_pipe)
+
+    # force the impression's own advertiser into slot 0 when it was not drawn
+    own_pos = pd.Index(pool).get_indexer(df["advertiser_id"].to_numpy())
+    bidder_pos = bidder_pos.copy()
+    missing = ~(bidder_pos == own_pos[:, None]).any(axis=1)
+    bidder_pos[missing, 0] = own_pos[missing]
+    if bidder_pos.shape[1] < 2:
+        # pad with a floor bid from a pseudo-advertiser (last slot) that has no budget
+        bidder_pos = np.column_stack([bidder_pos, np.full(n, len(pool))])
+
+    base_bids = np.array([advertisers_bids[int(a)] for a in pool] + [0.0])
+    budgets = np.array([advertiser_budgets[int(a)] for a in pool] + [0.0])
+    is_pad = np.zeros(len(budgets), dtype=bool)
+    is_pad[-1] = True
+
+    won = np.zeros(n, dtype=bool)
+    price = np.zeros(n)
+    start, size = 0, min(block_size, 64)
+    while start < n:
+        stop = min(n, start + size)
+        pos = bidder_pos[start:stop]
+        bids = make_bids(base_bids[pos], pctr[start:stop, None], budgets[pos])
+        bids[is_pad[pos]] = FLOOR
+        order = np.argsort(-bids, axis=1, kind="stable")  # stable like sorted(..., reverse=True)
+        rows = np.arange(stop - start)
+        winner = pos[rows, order[:, 0]]
+        second = np.maximum(FLOOR, bids[rows, order[:, 1]])
+        pays = (budgets[winner] >= second) & ~is_pad[winner]
+
+        # Commit wins in time order; a win only changes its winner's budget, so every later
+        # row is still exact until the first auction that includes an advertiser already charged.
+        dirty = np.zeros(len(budgets), dtype=bool)
+        end = stop - start
+        i = -1
+        while True:
+            nxt = np.flatnonzero(pays[i + 1:end])
+            if nxt.size == 0:
+                break
+            i += 1 + nxt[0]
+            won[start + i] = True
+            price[start + i] = second[i]
+            budgets[winner[i]] -= second[i]
+            dirty[winner[i]] = True
+            touched = np.flatnonzero(dirty[pos[i + 1:end]].any(axis=1))
+            if touched.size:
+                end = i + 1 + touched[0]
+
+        # grow the block while no budget change interrupts it, otherwise shrink towards the win rate
+        size = min(block_size, size * 2) if end == stop - start else min(block_size, max(64, 2 * end))
+        start += end
+
+    click = (won & (click_u < pctr)).astype(int)
+    return pd.DataFrame({
+        "impression_id": df["impression_id"].to_numpy(),
+        "ad_id": df["ad_id"].to_numpy(dtype=int),
+        "advertiser": df["advertiser_id"].to_numpy(dtype=int),
+        "pctr": pctr,
+        "won": won,
+        "price": price,
+        "click": click,
+        "revenue": click * AVG_REVENUE_PER_CLICK
+    })
+
+def run_rtb_sim(data_path=DATA_IN, model_path=MODEL_PATH, out_json=OUT_JSON,
+                engine=ENGINE, seed=SEED, block_size=BLOCK_SIZE):
+    df = read_dataset(data_path)
+    model_pipe = try_load_model(model_path)
+    # init advertiser bids and budgets
+    advertisers = df["advertiser_id"].unique().tolist()
+    advertisers_bids = {int(a): float(0.5 + (int(a) % 10) * 0.1) for a in advertisers}  # varied base bids
+    advertiser_budgets = {int(a): float(BUDGET_PER_ADVERTISER) for a in advertisers}
+    plan = draw_auction_plan(len(df), len(advertisers), seed=seed)
+
+    if engine == "vectorized":
+        logs_df = _run_vectorized(df, model_pipe, advertisers_bids, advertiser_budgets, plan, block_size)
+    elif engine == "loop":
+        logs_df = _run_loop(df, model_pipe, advertisers_bids, advertiser_budgets, plan)
+    else:
+        raise ValueError(f"Unknown RTB engine: {engine}")
 
-    logs_df = pd.DataFrame(logs)
     # aggregate per advertiser
     agg = logs_df[logs_df["won"] == True].groupby("advertiser").agg(
         impressions=("won","count"),
@@ -0,0 +1,92 @@
+"""
+Negative downsampling for training throughput:
+- negative_downsample keeps every click and a NEG_SAMPLE_RATE fraction of non-clicks (train split only)
+- The rate is recorded next to the training set (train_sampling.json) and read back by the trainers
+- Scores of a model fit on sampled data are recalibrated with p' = p / (p + (1 - p) / w), w = rate,
+  i.e. the logit shifted by log(w): DownsampledClassifier does it at predict time, and compact
+  exports fold the shift into the intercept / baseline
+"""
+
+import json
+import math
+import os
+import numpy as np
+from sklearn.base import BaseEstimator, ClassifierMixin
+
+NEG_SAMPLE_RATE = float(os.environ.get("NEG_SAMPLE_RATE", "1.0"))  # 1.0 = keep every negative
+SAMPLING_JSON = "data/processed/train_sampling.json"
+LABEL = "clicked"
+SEED = 42
+
+def negative_downsample(df, rate=NEG_SAMPLE_RATE, label=LABEL, seed=SEED):
+    """All positive rows plus each negative row with probability rate (order preserved)."""
+    if rate >= 1.0:
+        return df
+    if not 0.0 < rate:
+        raise ValueError(f"negative sampling rate must be in (0, 1], got {rate}")
+    keep = (df[label].to_numpy() == 1) | (np.random.default_rng(seed).random(len(df)) < rate)
+    return df[keep]
+
+def save_sampling_info(rate, rows_in, rows_out, path=SAMPLING_JSON):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({"neg_sample_rate": rate, "rows_before": rows_in, "rows_after": rows_out, "seed": SEED},
+                  f, indent=2)
+
+def load_sampling_rate(path=SAMPLING_JSON):
+    """Negative sampling rate of the current training set (1.0 if it was not sampled)."""
+    try:
+        return float(json.load(open(path))["neg_sample_rate"])
+    except (FileNotFoundError, ValueError, KeyError):
+        return 1.0
+
+def correct_proba(p, rate):
+    """Undo negative downsampling: p' = p / (p + (1 - p) / rate)."""
+    p = np.asarray(p, dtype=float)
+    return p / (p + (1.0 - p) / rate)
+
+def negative_weights(y, rate):
+    """Per-row sample weights (1 / rate for negatives) for estimators that take sample_weight instead."""
+    return np.where(np.asarray(y) == 1, 1.0, 1.0 / rate)
+
+class DownsampledClassifier(ClassifierMixin, BaseEstimator):
+    """A classifier fit on negative-downsampled rows, scoring on the original CTR scale.
+
+    The wrapped estimator is already fitted; neg_sample_rate travels with the pickled model.
+    """
+
+    def __init__(self, estimator, neg_sample_rate):
+        self.estimator = estimator
+        self.neg_sample_rate = neg_sample_rate
+
+    @property
+    def classes_(self):
+        return self.estimator.classes_
+
+    @property
+    def logit_shift(self):
+        return math.log(self.neg_sample_rate)
+
+    def __sklearn_is_fitted__(self):
+        return hasattr(self.estimator, "classes_")
+
+    def fit(self, X, y):
+        self.estimator.fit(X, y)
+        return self
+
+    def predict_proba(self, X):
+        p = correct_proba(self.estimator.predict_proba(X)[:, 1], self.neg_sample_rate)
+        return np.column_stack([1.0 - p, p])
+
+    def predict(self, X):
+        return self.classes_[(self.predict_proba(X)[:, 1] >= 0.5).astype(int)]
+
+def wrap_if_sampled(estimator, rate):
+    """estimator itself when the training set was not sampled, so unsampled artifacts stay unchanged."""
+    return estimator if rate >= 1.0 else DownsampledClassifier(estimator, rate)
+
+def unwrap(estimator):
+    """(inner estimator, logit shift to add to its raw score)."""
+    if isinstance(estimator, DownsampledClassifier):
+        return estimator.estimator, estimator.logit_shift
+    return estimator, 0.0
@@ -0,0 +1,117 @@
+"""
+Scale-test impression log generator:
+- Same columns, vocabularies and click model (base_ctr_array) as data_generator, but every column
+  is sampled with NumPy in BLOCK_ROWS blocks instead of per-row random calls
+- Output is split into shards written by a process pool; shard i always gets seed (seed, i) and
+  the same impression id range, so a dataset is reproducible for any number of workers
+- Rows, days and a time-of-day skew (0 = uniform hours as in data_generator, 1 = strong evening peak)
+  are configurable; Parquet shards are written one row group per block, CSV shards block by block
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from data_generator import AGES, GEOS, INTERESTS, CREATIVES, DEVICES, COLUMNS, base_ctr_array
+from storage import STORAGE_FORMAT, have_pyarrow
+
+OUT_DIR = "data/scale"
+ROWS = 1_000_000
+SHARD_ROWS = 2_000_000
+BLOCK_ROWS = 500_000
+START_DATE = "2025-12-09"
+SEED = 42
+
+def hour_weights(skew=0.0):
+    """P(hour) for 0..23: uniform at skew 0, blended toward a diurnal curve peaking around 20:00."""
+    hours = np.arange(24)
+    diurnal = 1.0 + np.cos((hours - 20) * np.pi / 12)  # 0 at 08:00, 2 at 20:00
+    w = (1.0 - skew) + skew * diurnal
+    return w / w.sum()
+
+def generate_block(rng, start_id, n, days=1, skew=0.0, start_date=START_DATE):
+    """n impression rows with ids start_id.. as a DataFrame (categorical columns as pd.Categorical)."""
+    hour = rng.choice(24, size=n, p=hour_weights(skew)) if skew else rng.integers(0, 24, n)
+    day = rng.integers(0, days, n) if days > 1 else np.zeros(n, dtype=np.int64)
+    age = pd.Categorical.from_codes(rng.integers(0, len(AGES), n), AGES)
+    interest = pd.Categorical.from_codes(rng.integers(0, len(INTERESTS), n), INTERESTS)
+    creative = pd.Categorical.from_codes(rng.integers(0, len(CREATIVES), n), CREATIVES)
+
+    clicked = (rng.random(n) < base_ctr_array(age, interest, creative, hour)).astype(np.int64)
+    revenue = np.where(clicked == 1, np.round(rng.uniform(0.1, 3.0, n), 2), 0.0)
+    # only days * 24 distinct timestamps: format each once, store as a dictionary column
+    stamps = np.datetime_as_string(np.datetime64(start_date, "s") + np.arange(days * 24) * np.timedelta64(3600, "s"),
+                                   unit="s")
+
+    return pd.DataFrame({
+        "impression_id": np.char.add("imp_", np.arange(start_id, start_id + n).astype(str)),
+        "timestamp": pd.Categorical.from_codes(day * 24 + hour, stamps),
+        "user_id": rng.integers(0, 500, n),
+        "age_bucket": age,
+        "geo": pd.Categorical.from_codes(rng.integers(0, len(GEOS), n), GEOS),
+        "interests": interest,
+        "ad_id": rng.integers(0, 200, n),
+        "advertiser_id": rng.integers(0, 20, n),
+        "creative_type": creative,
+        "device": pd.Categorical.from_codes(rng.integers(0, len(DEVICES), n), DEVICES),
+        "hour_of_day": hour,
+        "bid": np.round(rng.uniform(0.05, 2.0, n), 3),
+        "clicked": clicked,
+        "revenue": revenue,
+    }, columns=COLUMNS)
+
+def write_shard(shard, start_id, rows, out_dir, fmt="parquet", seed=SEED, days=1, skew=0.0,
+                block_rows=BLOCK_ROWS, start_date=START_DATE):
+    """Generate rows [start_id, start_id + rows) into out_dir/part-<shard>; returns the file written."""
+    rng = np.random.default_rng([seed, shard])
+    path = os.path.join(out_dir, f"part-{shard:05d}.{fmt}")
+    tmp = path + ".tmp"
+    writer = None
+    for b0 in range(0, rows, block_rows):
+        df = generate_block(rng, start_id + b0, min(block_rows, rows - b0), days, skew, start_date)
+        if fmt == "parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            writer = writer or pq.ParquetWriter(tmp, table.schema)
+            writer.write_table(table)
+        else:
+            df.to_csv(tmp, mode="w" if b0 == 0 else "a", header=b0 == 0, index=False)
+    if writer:
+        writer.close()
+    os.replace(tmp, path)
+    return path
+
+def generate(rows=ROWS, out_dir=OUT_DIR, shard_rows=SHARD_ROWS, n_jobs=None, seed=SEED, days=1,
+             skew=0.0, fmt=None, block_rows=BLOCK_ROWS, start_date=START_DATE):
+    """Write `rows` impressions as ceil(rows / shard_rows) shards in parallel; returns the shard paths."""
+    fmt = fmt or STORAGE_FORMAT
+    if fmt != "csv" and not have_pyarrow():
+        fmt = "csv"
+    os.makedirs(out_dir, exist_ok=True)
+    starts = list(range(0, rows, shard_rows))
+    sizes = [min(shard_rows, rows - s) for s in starts]
+    n_jobs = min(n_jobs or os.cpu_count() or 1, len(starts)) or 1
+    args = [(i, s, n, out_dir, fmt, seed, days, skew, block_rows, start_date)
+            for i, (s, n) in enumerate(zip(starts, sizes))]
+    if n_jobs == 1:
+        paths = [write_shard(*a) for a in args]
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs) as ex:
+            paths = list(ex.map(write_shard, *zip(*args)))
+    print(f"✅ Generated {rows} rows in {len(paths)} {fmt} shards under {out_dir}")
+    return paths
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=ROWS)
+    ap.add_argument("--out", default=OUT_DIR)
+    ap.add_argument("--shard-rows", type=int, default=SHARD_ROWS)
+    ap.add_argument("--jobs", type=int, default=None, help="writer processes (default: all cores)")
+    ap.add_argument("--days", type=int, default=1)
+    ap.add_argument("--hour-skew", type=float, default=0.0, help="0 = uniform hours, 1 = strong evening peak")
+    ap.add_argument("--format", choices=["parquet", "csv"], default=None)
+    ap.add_argument("--seed", type=int, default=SEED)
+    args = ap.parse_args()
+    generate(args.rows, args.out, args.shard_rows, args.jobs, args.seed, args.days, args.hour_skew, args.format)
@@ -0,0 +1,98 @@
+"""
+Read-only model memory shared by all serving workers:
+- publish() dumps a loaded model once per source version to models/shared/<digest>/model.joblib
+- load_shared() opens it with joblib mmap_mode="r": every worker maps the same file, so the model
+  arrays live once in the page cache instead of once per worker process
+- SharedModel.refresh() hot-reloads when the source file changes: publish + map the new version,
+  then swap the reference in one assignment (in-flight requests finish on the old one)
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+from utils import file_digest
+
+SHARED_DIR = "models/shared"
+ARTIFACT = "model.joblib"
+KEEP_VERSIONS = 3
+DIGEST_CHARS = 16
+
+def version_digest(path):
+    return file_digest(path)[:DIGEST_CHARS]
+
+def publish(model, digest, shared_dir=SHARED_DIR):
+    """Write model under shared_dir/digest once; concurrent publishers race on one atomic rename."""
+    final = os.path.join(shared_dir, digest)
+    if os.path.exists(os.path.join(final, ARTIFACT)):
+        return final
+    os.makedirs(shared_dir, exist_ok=True)
+    tmp = tempfile.mkdtemp(prefix=".tmp-", dir=shared_dir)
+    import joblib  # imported on use, so serving code can import this module before any model is loaded
+    joblib.dump(model, os.path.join(tmp, ARTIFACT))  # uncompressed, so the arrays can be mapped
+    try:
+        os.rename(tmp, final)
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)  # another worker published this version first
+    return final
+
+def load_shared(version_dir):
+    import joblib
+    return joblib.load(os.path.join(version_dir, ARTIFACT), mmap_mode="r")
+
+def load_or_publish(source_path, loader, digest=None, shared_dir=SHARED_DIR):
+    """Mapped model for source_path, publishing loader(source_path) first if this version is new."""
+    digest = digest or version_digest(source_path)
+    version_dir = os.path.join(shared_dir, digest)
+    if not os.path.exists(os.path.join(version_dir, ARTIFACT)):
+        publish(loader(source_path), digest, shared_dir)
+    return load_shared(version_dir)
+
+def prune(shared_dir=SHARED_DIR, keep=KEEP_VERSIONS, current=None, pinned=()):
+    """Drop all but the newest `keep` versions, never current or pinned ones
+    (mapped files stay valid until unmapped on POSIX)."""
+    protected = {current, *pinned} - {None}
+    versions = [d for d in os.listdir(shared_dir) if not d.startswith(".tmp-") and d not in protected]
+    versions.sort(key=lambda d: os.path.getmtime(os.path.join(shared_dir, d)), reverse=True)
+    for d in versions[max(keep - len(protected), 0):]:
+        shutil.rmtree(os.path.join(shared_dir, d), ignore_errors=True)
+
+class SharedModel:
+    """Memory-mapped model for source_path; loader(path) builds the servable model when publishing."""
+
+    def __init__(self, source_path, loader, shared_dir=SHARED_DIR, keep=KEEP_VERSIONS):
+        self.source_path = source_path
+        self.loader = loader
+        self.shared_dir = shared_dir
+        self.keep = keep
+        self.model = None
+        self.version = None
+        self._stat = None
+        self._failed = None  # signature of a source file that could not be loaded
+        self._lock = threading.Lock()
+
+    def refresh(self, force=False):
+        """Map the current version of source_path; True when a new version was swapped in."""
+        with self._lock:
+            try:
+                st = os.stat(self.source_path)
+            except FileNotFoundError:
+                return False
+            sig = (st.st_mtime_ns, st.st_size)
+            if (sig == self._stat or sig == self._failed) and not force:
+                return False
+            try:
+                digest = version_digest(self.source_path)
+                if digest == self.version:
+                    self._stat = sig
+                    return False
+                model = load_or_publish(self.source_path, self.loader, digest, self.shared_dir)
+            except Exception as e:
+                # e.g. a half-written file; keep serving and retry once it changes again
+                print(f"⚠️ Could not load {self.source_path}, keeping version {self.version}: {e}")
+                self._failed = sig
+                return False
+            self.model, self.version, self._stat = model, digest, sig
+            prune(self.shared_dir, self.keep, current=digest)
+            print(f"✅ Serving shared model {self.source_path} (version {digest})")
+            return True
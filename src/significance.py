@@ -0,0 +1,104 @@
+"""
+Paired significance tests for offline model comparison on a shared eval set:
+- DeLong AUC covariance for all candidate models at once (Sun & Xu midrank formulation):
+  one rankdata per model, ranked in parallel threads, O(k n log n) with no resampling loop
+- Log-loss: paired z-test on the per-row loss differences against the reference model
+- select_model keeps the reference (the serving incumbent) unless a challenger's AUC gain is
+  significant at ALPHA after a Holm correction over all challengers and it does not have a
+  significantly worse log-loss; of several such challengers the one with the highest AUC wins
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from scipy import stats
+
+ALPHA = 0.05
+N_JOBS = 4
+
+def _midranks(scores, n_jobs=N_JOBS):
+    """Average ranks (ties share the mean rank) of each row of scores (k x n), rows ranked in threads."""
+    scores = np.atleast_2d(scores)
+    if n_jobs <= 1 or len(scores) == 1:
+        return stats.rankdata(scores, axis=1)
+    with ThreadPoolExecutor(max_workers=n_jobs) as pool:
+        return np.vstack(list(pool.map(stats.rankdata, scores)))
+
+def delong(y_true, scores, n_jobs=N_JOBS):
+    """(AUC per model, k x k covariance of the AUC estimates) for scores of shape (k, n)."""
+    y = np.asarray(y_true).astype(bool)
+    scores = np.atleast_2d(np.asarray(scores, dtype=float))
+    pos, neg = scores[:, y], scores[:, ~y]
+    m, n = pos.shape[1], neg.shape[1]
+    if m < 2 or n < 2:
+        raise ValueError("DeLong needs at least two positive and two negative rows")
+
+    tx = _midranks(pos, n_jobs)
+    ty = _midranks(neg, n_jobs)
+    tz = _midranks(np.hstack([pos, neg]), n_jobs)
+    aucs = (tz[:, :m].sum(axis=1) / m - (m + 1) / 2) / n
+    v01 = (tz[:, :m] - tx) / n         # per-positive structural components
+    v10 = 1.0 - (tz[:, m:] - ty) / m   # per-negative structural components
+    cov = np.atleast_2d(np.cov(v01)) / m + np.atleast_2d(np.cov(v10)) / n
+    return aucs, cov
+
+def row_log_loss(y_true, scores):
+    eps = np.finfo(float).eps
+    p = np.clip(np.atleast_2d(np.asarray(scores, dtype=float)), eps, 1 - eps)
+    y = np.asarray(y_true, dtype=float)
+    return -(y * np.log(p) + (1 - y) * np.log1p(-p))
+
+def _two_sided(z):
+    return float(2 * stats.norm.sf(abs(z))) if np.isfinite(z) else (0.0 if z else 1.0)
+
+def paired_tests(y_true, scores, names, reference, alpha=ALPHA, n_jobs=N_JOBS):
+    """{name: AUC / log-loss difference vs scores[names.index(reference)] with CI and p-values}."""
+    ref = names.index(reference)
+    aucs, cov = delong(y_true, scores, n_jobs)
+    losses = row_log_loss(y_true, scores)
+    d_loss = losses - losses[ref]
+    loss_mean = d_loss.mean(axis=1)
+    loss_se = d_loss.std(axis=1, ddof=1) / np.sqrt(d_loss.shape[1])
+    z_crit = stats.norm.ppf(1 - alpha / 2)
+
+    out = {}
+    for i, name in enumerate(names):
+        diff = aucs[i] - aucs[ref]
+        se = np.sqrt(max(cov[i, i] + cov[ref, ref] - 2 * cov[i, ref], 0.0))
+        out[name] = {
+            "auc": float(aucs[i]),
+            "auc_diff": float(diff),
+            "auc_diff_ci": [float(diff - z_crit * se), float(diff + z_crit * se)],
+            "auc_p": _two_sided(diff / se) if se > 0 else 1.0,
+            "log_loss_diff": float(loss_mean[i]),
+            "log_loss_p": _two_sided(loss_mean[i] / loss_se[i]) if loss_se[i] > 0 else 1.0,
+        }
+    return out
+
+def holm(pvalues):
+    """Holm step-down adjusted p-values, in input order (family-wise error rate control)."""
+    p = np.asarray(pvalues, dtype=float)
+    order = np.argsort(p, kind="stable")
+    adjusted = np.minimum(1.0, np.maximum.accumulate(p[order] * (len(p) - np.arange(len(p)))))
+    out = np.empty_like(p)
+    out[order] = adjusted
+    return out
+
+def select_model(tests, reference, alpha=ALPHA):
+    """(chosen name, challenger name): the chosen challenger if one beats the reference significantly,
+    otherwise the reference and the highest-AUC challenger. Adds "auc_p_holm" to each challenger's tests."""
+    challengers = [name for name in tests if name != reference]
+    if not challengers:
+        return reference, None
+    for name, p in zip(challengers, holm([tests[name]["auc_p"] for name in challengers])):
+        tests[name]["auc_p_holm"] = float(p)
+
+    def promotable(t):
+        better_auc = t["auc_diff"] > 0 and t["auc_p_holm"] < alpha
+        worse_loss = t["log_loss_diff"] > 0 and t["log_loss_p"] < alpha
+        return better_auc and not worse_loss
+
+    winners = [name for name in challengers if promotable(tests[name])]
+    if winners:
+        best = max(winners, key=lambda name: tests[name]["auc"])
+        return best, best
+    return reference, max(challengers, key=lambda name: tests[name]["auc"])
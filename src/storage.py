@@ -0,0 +1,102 @@
+"""
+Dataset storage for raw + processed impression logs:
+- Parquet (default) or Feather with categorical dtypes; CSV stays as a fallback format
+- Stages keep passing the historical .csv paths: a binary sibling (same name, .parquet/.feather)
+  is read instead whenever it is at least as new as the CSV
+- Column projection everywhere, memory-mapped reads for the binary formats, chunked iteration
+
+Format is picked with ADS_STORAGE_FORMAT=parquet|feather|csv. Without pyarrow everything is CSV.
+"""
+
+import os
+import pandas as pd
+
+STORAGE_FORMAT = os.environ.get("ADS_STORAGE_FORMAT", "parquet")
+BINARY_SUFFIXES = {"parquet": ".parquet", "feather": ".feather"}
+CATEGORICAL_COLUMNS = ["age_bucket", "geo", "interests", "creative_type", "device"]
+CHUNK_ROWS = 100000
+
+_warned = False
+
+def have_pyarrow():
+    global _warned
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        if not _warned:
+            print("⚠️ pyarrow not installed; datasets are stored as CSV.")
+            _warned = True
+        return False
+
+def _with_suffix(path, suffix):
+    return os.path.splitext(path)[0] + suffix
+
+def _format_of(path):
+    for fmt, suffix in BINARY_SUFFIXES.items():
+        if path.endswith(suffix):
+            return fmt
+    return "csv"
+
+def resolve_path(path):
+    """Newest existing readable file among path and its .parquet/.feather siblings (binary wins ties)."""
+    candidates = [path]
+    if have_pyarrow():
+        candidates = [_with_suffix(path, s) for s in BINARY_SUFFIXES.values()] + candidates
+    existing = [p for p in dict.fromkeys(candidates) if os.path.exists(p)]
+    if not existing:
+        return path
+    return max(existing, key=lambda p: os.stat(p).st_mtime_ns)  # max keeps the first on ties
+
+def dataset_exists(path):
+    return os.path.exists(resolve_path(path))
+
+def _categorical_dtypes(columns=None):
+    cols = CATEGORICAL_COLUMNS if columns is None else [c for c in CATEGORICAL_COLUMNS if c in columns]
+    return {c: "category" for c in cols}
+
+def read_dataset(path, columns=None, memory_map=True):
+    p = resolve_path(path)
+    fmt = _format_of(p)
+    if fmt == "parquet":
+        return pd.read_parquet(p, columns=columns, memory_map=memory_map)
+    if fmt == "feather":
+        from pyarrow import feather
+        return feather.read_table(p, columns=columns, memory_map=memory_map).to_pandas()
+    return pd.read_csv(p, usecols=columns, dtype=_categorical_dtypes(columns))
+
+def iter_dataset(path, columns=None, chunksize=CHUNK_ROWS):
+    """Yield DataFrame chunks of at most chunksize rows, in file order."""
+    p = resolve_path(path)
+    fmt = _format_of(p)
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(p, memory_map=True).iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+    elif fmt == "feather":
+        from pyarrow import feather
+        table = feather.read_table(p, columns=columns, memory_map=True)
+        for batch in table.to_batches(max_chunksize=chunksize):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(p, usecols=columns, dtype=_categorical_dtypes(columns), chunksize=chunksize)
+
+def write_dataset(df, path, fmt=None):
+    """Write df next to `path` in the configured format; returns the file actually written."""
+    fmt = fmt or STORAGE_FORMAT
+    if fmt != "csv" and not have_pyarrow():
+        fmt = "csv"
+    out = path if fmt == "csv" else _with_suffix(path, BINARY_SUFFIXES[fmt])
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    tmp = out + ".tmp"
+
+    if fmt == "csv":
+        df.to_csv(tmp, index=False)
+    else:
+        df = df.astype({c: "category" for c in CATEGORICAL_COLUMNS if c in df})
+        if fmt == "parquet":
+            df.to_parquet(tmp, index=False)
+        else:
+            df.reset_index(drop=True).to_feather(tmp)
+    os.replace(tmp, out)
+    return out
@@ -1,13 +1,14 @@
 import pandas as pd
 from sklearn.linear_model import LogisticRegression
-from sklearn.feature_extraction import DictVectorizer
 from sklearn.pipeline import Pipeline
 from joblib import dump
 import json
 
 
 from eval_utils import offline_metrics, calibration_table
-from utils import prepare_dicts
+from columnar import ColumnarVectorizer
+from matrix_cache import load_or_build
+from sampling import load_sampling_rate, wrap_if_sampled
 
 def lr_main():
         TRAIN = "data/processed/train.csv"
@@ -17,28 +18,20 @@ def lr_main():
         CALIB_OUT = "reports/calibration_table.csv"
 
 
-        train = pd.read_csv(TRAIN)
-        eval_ = pd.read_csv(EVAL)
-
-
-        X_train = prepare_dicts(train)
-        y_train = train.clicked
-
-
-        X_eval = prepare_dicts(eval_)
-        y_eval = eval_.clicked
+        # vectorized matrices come from the shared matrix cache (built once per data version)
+        X_train, y_train, feature_names = load_or_build(TRAIN)
+        X_eval, y_eval, _ = load_or_build(EVAL, vocabulary=feature_names)
 
 
+        # scores come back on the true CTR scale if train.csv was negative-downsampled
+        lr = wrap_if_sampled(LogisticRegression(max_iter=200).fit(X_train, y_train), load_sampling_rate())
         pipe = Pipeline([
-                ("vec", DictVectorizer(sparse=True)),
-                ("lr", LogisticRegression(max_iter=200))
+                ("vec", ColumnarVectorizer.from_feature_names(feature_names)),
+                ("lr", lr)
                 ])
 
 
-        pipe.fit(X_train, y_train)
-
-
-        y_prob = pipe.predict_proba(X_eval)[:, 1]
+        y_prob = lr.predict_proba(X_eval)[:, 1]
         metrics = offline_metrics(y_eval, y_prob)
         cal = calibration_table(y_eval, y_prob)
 
@@ -2,43 +2,29 @@ import pandas as pd
 import joblib
 from sklearn.neural_network import MLPClassifier
 from sklearn.pipeline import Pipeline
-from sklearn.feature_extraction import DictVectorizer
+from matrix_cache import load_or_build
 from eval_utils import offline_metrics, calibration_table
 import json
-from utils import prepare_dicts
+from columnar import ColumnarVectorizer
+from sampling import load_sampling_rate, wrap_if_sampled
 
 
 def dnn_main():
     TRAIN = "data/processed/train.csv"
     EVAL = "data/processed/eval.csv"
-    BASELINE_PIPE = "models/logistic.pkl"
     DNN_OUT = "models/dnn.pkl"
     METRICS_OUT = "reports/dnn_offline_metrics.json"
     CALIB_OUT = "reports/dnn_calibration_table.csv"
 
-    train = pd.read_csv(TRAIN)
-    eval_ = pd.read_csv(EVAL)
+    # same cached matrices as the other trainers; no dependency on models/logistic.pkl
+    X_train, y_train, feature_names = load_or_build(TRAIN)
+    X_eval, y_eval, _ = load_or_build(EVAL, vocabulary=feature_names)
 
-    X_train_dicts = prepare_dicts(train)
-    y_train = train.clicked.values
-    X_eval_dicts = prepare_dicts(eval_)
-    y_eval = eval_.clicked.values
+    mlp = MLPClassifier(hidden_layer_sizes=(64,32), max_iter=200, random_state=42).fit(X_train, y_train)
+    mlp = wrap_if_sampled(mlp, load_sampling_rate())
+    pipe = Pipeline([("vec", ColumnarVectorizer.from_feature_names(feature_names)), ("mlp", mlp)])
 
-    vec = None
-    try:
-        baseline = joblib.load(BASELINE_PIPE)
-        vec = baseline.named_steps["vec"]
-        print("✅ Reused DictVectorizer from baseline.")
-    except Exception as e:
-        print("⚠️ Could not reuse baseline pipeline; creating new DictVectorizer.", e)
-        vec = DictVectorizer(sparse=True)
-
-    mlp = MLPClassifier(hidden_layer_sizes=(64,32), max_iter=200, random_state=42)
-    pipe = Pipeline([("vec", vec), ("mlp", mlp)])
-
-    pipe.fit(X_train_dicts, y_train)
-
-    y_prob = pipe.predict_proba(X_eval_dicts)[:, 1]
+    y_prob = mlp.predict_proba(X_eval)[:, 1]
     metrics = offline_metrics(y_eval, y_prob)
     json.dump(metrics, open(METRICS_OUT, "w"), indent=2)
 
@@ -1,56 +1,50 @@
 import pandas as pd
 import joblib
 from sklearn.ensemble import HistGradientBoostingClassifier
-from sklearn.feature_extraction import DictVectorizer
 from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import FunctionTransformer
-from utils import prepare_dicts, to_dense
+from utils import to_dense
+from columnar import ColumnarVectorizer
+from matrix_cache import load_or_build
 from eval_utils import offline_metrics, calibration_table
+from compact_model import save_compact
+from sampling import load_sampling_rate, wrap_if_sampled
 import json
 
 def gbt_main():
     TRAIN = "data/processed/train.csv"
     EVAL = "data/processed/eval.csv"
-    BASELINE_PIPE = "models/logistic.pkl"
     GBT_OUT = "models/gbt.pkl"
+    GBT_COMPACT_OUT = "models/gbt.npz"  # flattened trees for compact_model.CompactTreeEnsemble
     METRICS_OUT = "reports/gbt_offline_metrics.json"
     CALIB_OUT = "reports/gbt_calibration_table.csv"
 
-    train = pd.read_csv(TRAIN)
-    eval_ = pd.read_csv(EVAL)
-
-    X_train_dicts = prepare_dicts(train)
-    y_train = train.clicked.values
-    X_eval_dicts = prepare_dicts(eval_)
-    y_eval = eval_.clicked.values
-
-
-    vec = None
-    try:
-        baseline = joblib.load(BASELINE_PIPE)
-        vec = baseline.named_steps["vec"]
-        print("✅ Reused DictVectorizer from baseline pipeline.")
-    except Exception as e:
-        print("⚠️ Could not reuse baseline pipeline, creating new DictVectorizer. Error:", e)
-        vec = DictVectorizer(sparse=True)
+    # Vocabulary fit on train.csv (same as the baseline's), shared through the matrix cache,
+    # so this trainer does not wait for models/logistic.pkl and can run alongside it
+    X_train, y_train, feature_names = load_or_build(TRAIN)
+    X_eval, y_eval, _ = load_or_build(EVAL, vocabulary=feature_names)
 
     gbt = HistGradientBoostingClassifier(max_iter=200, learning_rate=0.1)
-    to_dense_transform = FunctionTransformer(to_dense, accept_sparse=True)
+    to_dense_transform = FunctionTransformer(to_dense, accept_sparse=True).fit(X_train)
+    gbt = wrap_if_sampled(gbt.fit(to_dense(X_train), y_train), load_sampling_rate())
     pipe = Pipeline([
-                ("vec", vec),             
+                ("vec", ColumnarVectorizer.from_feature_names(feature_names)),
                 ("to_dense", to_dense_transform),       
                 ("gbt", gbt),
             ])
 
-    pipe.fit(X_train_dicts, y_train)
-
-    y_prob = pipe.predict_proba(X_eval_dicts)[:, 1]
+    y_prob = gbt.predict_proba(to_dense(X_eval))[:, 1]
     metrics = offline_metrics(y_eval, y_prob)
     json.dump(metrics, open(METRICS_OUT, "w"), indent=2)
 
 
     pd.DataFrame(calibration_table(y_eval, y_prob)).to_csv(CALIB_OUT, index=False)
     joblib.dump(pipe, GBT_OUT)
+    try:
+        save_compact(pipe, GBT_COMPACT_OUT)
+        print("✅ Exported compact GBT to", GBT_COMPACT_OUT)
+    except Exception as e:
+        print("⚠️ Could not export compact GBT:", e)
 
     print("✅ GBT trained. Metrics:", metrics)
 
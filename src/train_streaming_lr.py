@@ -0,0 +1,140 @@
+"""
+Out-of-core logistic regression for impression logs that do not fit in memory:
+- Reads each source in CHUNK_ROWS chunks and featurizes it into a fixed HASH_FEATURES-wide hashed space
+  (no vocabulary to fit, so new categories need no refit)
+- One SGD (log loss) partial_fit per chunk; a checkpoint after every chunk records the model and,
+  per source file, its digest, size and the rows consumed so far
+- Warm start: a rerun resumes from the checkpoint and only reads files (or the rest of a file) it has
+  not trained on yet, so the daily retrain costs time in proportion to the new data; appending to a
+  CSV source trains on the appended rows only, rewriting a source retrains from scratch
+- Negatives of a downsampled train.csv are up-weighted by 1 / rate, so scores need no recalibration
+"""
+
+import glob
+import json
+import os
+import pandas as pd
+from joblib import dump, load
+from sklearn.linear_model import SGDClassifier
+from sklearn.pipeline import Pipeline
+
+from columnar import HashedVectorizer, FEATURE_COLUMNS
+from eval_utils import offline_metrics, calibration_table
+from sampling import load_sampling_rate, negative_weights
+from storage import iter_dataset, read_dataset, resolve_path
+from utils import file_digest
+
+TRAIN = "data/processed/train.csv"
+EVAL = "data/processed/eval.csv"
+DAILY_GLOB = "data/daily/*.csv"  # one file per day of new impression logs
+MODEL_OUT = "models/streaming_lr.pkl"
+CHECKPOINT = "models/streaming_lr.ckpt"
+METRICS_OUT = "reports/streaming_lr_offline_metrics.json"
+CALIB_OUT = "reports/streaming_lr_calibration_table.csv"
+
+HASH_FEATURES = 2 ** 20
+NUMERIC_SCALE = {"hour": 1 / 24}  # keep hour on the same scale as the one-hot features for SGD
+CHUNK_ROWS = 50000
+ALPHA = 1e-5
+ETA0 = 0.01  # constant step size: the model keeps adapting to new days instead of freezing as t grows
+LABEL = "clicked"
+
+def new_pipeline():
+    return Pipeline([
+        ("vec", HashedVectorizer(n_features=HASH_FEATURES, numeric_scale=NUMERIC_SCALE)),
+        ("lr", SGDClassifier(loss="log_loss", alpha=ALPHA, learning_rate="constant", eta0=ETA0,
+                              random_state=0)),
+    ])
+
+def load_checkpoint(path=CHECKPOINT):
+    try:
+        return load(path)
+    except FileNotFoundError:
+        return {"pipe": new_pipeline(), "sources": {}, "rows_seen": 0}
+
+def save_checkpoint(ckpt, path=CHECKPOINT):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    dump(ckpt, path + ".tmp")
+    os.replace(path + ".tmp", path)
+
+def default_sources():
+    return [TRAIN] + sorted(glob.glob(DAILY_GLOB))
+
+def _appended(path, done):
+    """True when path still starts with exactly the bytes trained on, i.e. rows were only appended."""
+    n = done.get("bytes")
+    return (n is not None and path.endswith(".csv") and os.path.getsize(path) >= n
+            and file_digest(path, n_bytes=n) == done.get("digest"))
+
+def train_incremental(sources, checkpoint=CHECKPOINT, warm_start=True, chunk_rows=CHUNK_ROWS):
+    """partial_fit the checkpointed model on the rows of sources it has not seen; returns the checkpoint.
+
+    A source that was appended to only contributes its new rows. A source that was rewritten
+    (e.g. train.csv after featurize reruns) invalidates the warm-started model, which is then
+    retrained from scratch on all sources rather than seeing the old rows twice.
+    """
+    ckpt = load_checkpoint(checkpoint) if warm_start else {"pipe": new_pipeline(), "sources": {}, "rows_seen": 0}
+    paths = [resolve_path(s) for s in sources]
+    digests = {path: file_digest(path) for path in paths}
+    rewritten = [path for path in paths if path in ckpt["sources"]
+                 and ckpt["sources"][path]["digest"] != digests[path] and not _appended(path, ckpt["sources"][path])]
+    if rewritten:
+        print(f"⚠️ {', '.join(rewritten)} changed beyond appends; retraining the streaming model from scratch")
+        ckpt = {"pipe": new_pipeline(), "sources": {}, "rows_seen": 0}
+    vec, lr = ckpt["pipe"].named_steps["vec"], ckpt["pipe"].named_steps["lr"]
+    new_rows = 0
+
+    for path in paths:
+        digest, size = digests[path], os.path.getsize(path)
+        done = ckpt["sources"].get(path, {})
+        if done.get("complete") and done["digest"] == digest:
+            continue
+        skip = done.get("rows", 0)  # rows already trained on: same file, or the same file plus appended rows
+        rate = load_sampling_rate() if path == resolve_path(TRAIN) else 1.0
+
+        offset = 0
+        for chunk in iter_dataset(path, columns=FEATURE_COLUMNS + [LABEL], chunksize=chunk_rows):
+            offset += len(chunk)
+            if offset <= skip:
+                continue
+            chunk = chunk.iloc[max(0, len(chunk) - (offset - skip)):]
+            y = chunk[LABEL].to_numpy()
+            weights = negative_weights(y, rate) if rate < 1.0 else None
+            lr.partial_fit(vec.transform(chunk), y, classes=[0, 1], sample_weight=weights)
+            new_rows += len(chunk)
+            skip = offset
+            ckpt["rows_seen"] += len(chunk)
+            ckpt["sources"][path] = {"digest": digest, "bytes": size, "rows": offset, "complete": False}
+            save_checkpoint(ckpt, checkpoint)
+
+        ckpt["sources"][path] = {"digest": digest, "bytes": size, "rows": offset, "complete": True}
+        save_checkpoint(ckpt, checkpoint)
+
+    print(f"✅ Streaming LR trained on {new_rows} new rows ({ckpt['rows_seen']} total)")
+    return ckpt
+
+def streaming_lr_main(sources=None, warm_start=True):
+    ckpt = train_incremental(sources or default_sources(), warm_start=warm_start)
+    pipe = ckpt["pipe"]
+    if not hasattr(pipe.named_steps["lr"], "coef_"):
+        raise RuntimeError("no training rows found for the streaming model")
+
+    eval_df = read_dataset(EVAL, columns=FEATURE_COLUMNS + [LABEL])
+    y_eval = eval_df[LABEL].to_numpy()
+    y_prob = pipe.predict_proba(eval_df)[:, 1]
+    metrics = offline_metrics(y_eval, y_prob)
+
+    pd.DataFrame(calibration_table(y_eval, y_prob)).to_csv(CALIB_OUT, index=False)
+    json.dump(metrics, open(METRICS_OUT, "w"), indent=2)
+    dump(pipe, MODEL_OUT + ".tmp")
+    os.replace(MODEL_OUT + ".tmp", MODEL_OUT)
+    print(metrics)
+    return metrics
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser()
+    ap.add_argument("sources", nargs="*", help=f"datasets to train on (default: {TRAIN} + {DAILY_GLOB})")
+    ap.add_argument("--cold", action="store_true", help="ignore the checkpoint and train from scratch")
+    args = ap.parse_args()
+    streaming_lr_main(args.sources or None, warm_start=not args.cold)
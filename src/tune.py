@@ -0,0 +1,190 @@
+"""
+Hyperparameter search for the LR / GBT / MLP trainers:
+- N_TRIALS configurations per family sampled from SEARCH_SPACES, scored on a held-out slice of train.csv
+  (eval.csv stays untouched for compare_models)
+- Successive halving: every rung trains the surviving trials on ETA times more rows and keeps the
+  best 1/ETA by validation log-loss, so bad configurations are dropped after a cheap fit
+- Trials of a rung run in parallel worker processes (one BLAS/OpenMP thread each) that memory-map
+  the same matrix_cache entry instead of re-featurizing
+- Every trial (family, params, rows, seconds, AUC, log-loss) is logged to reports/tuning_trials.csv;
+  the winners are refit on all of train.csv and saved as models/tuned_<family>.pkl
+"""
+
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import HistGradientBoostingClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.neural_network import MLPClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import FunctionTransformer
+from threadpoolctl import threadpool_limits
+
+from columnar import ColumnarVectorizer
+from eval_utils import offline_metrics
+from matrix_cache import load_or_build
+from sampling import load_sampling_rate, wrap_if_sampled
+from utils import to_dense
+
+TRAIN = "data/processed/train.csv"
+TRIALS_CSV = "reports/tuning_trials.csv"
+BEST_JSON = "reports/tuning_best.json"
+MODEL_OUT = "models/tuned_{family}.pkl"
+
+N_TRIALS = 9
+ETA = 3
+VAL_FRACTION = 0.2
+PRUNE_METRIC = "log_loss"  # lower is better; AUC is too noisy on the small early rungs
+SEED = 42
+
+SEARCH_SPACES = {
+    "logistic": {
+        "C": [0.01, 0.03, 0.1, 0.3, 1.0, 3.0, 10.0],
+        "max_iter": [200],
+    },
+    "gbt": {
+        "learning_rate": [0.03, 0.05, 0.1, 0.2],
+        "max_iter": [100, 200, 400],
+        "max_leaf_nodes": [7, 15, 31],
+        "min_samples_leaf": [20, 50, 100],
+        "l2_regularization": [0.0, 0.1, 1.0],
+    },
+    "dnn": {
+        "hidden_layer_sizes": [(32,), (64,), (64, 32), (128, 64)],
+        "alpha": [1e-5, 1e-4, 1e-3, 1e-2],
+        "learning_rate_init": [1e-3, 3e-3],
+        "max_iter": [200],
+    },
+}
+
+def build_estimator(family, params):
+    if family == "logistic":
+        return LogisticRegression(**params)
+    if family == "gbt":
+        return HistGradientBoostingClassifier(early_stopping=False, random_state=SEED, **params)
+    if family == "dnn":
+        return MLPClassifier(early_stopping=True, random_state=SEED, **params)
+    raise KeyError(f"unknown model family {family}")
+
+def _dense(family, X):
+    return to_dense(X) if family == "gbt" else X
+
+def sample_configs(family, n, seed=SEED):
+    """n distinct configurations (fewer if the space is smaller), deterministic for a seed."""
+    space = SEARCH_SPACES[family]
+    n = min(n, math.prod(len(v) for v in space.values()))
+    rng = np.random.default_rng(seed)
+    configs = []
+    while len(configs) < n:
+        params = {k: v[rng.integers(len(v))] for k, v in space.items()}
+        if params not in configs:
+            configs.append(params)
+    return configs
+
+@lru_cache(maxsize=4)
+def _split(train_path, seed):
+    """(X, y, feature_names, fit rows in random order, validation rows) for train_path."""
+    X, y, names = load_or_build(train_path)
+    order = np.random.default_rng(seed).permutation(X.shape[0])
+    n_val = int(len(order) * VAL_FRACTION)
+    return X, y, names, order[n_val:], np.sort(order[:n_val])
+
+def run_trial(family, params, n_rows, train_path=TRAIN, seed=SEED):
+    """Fit on the first n_rows fit rows and score on the validation rows (runs in a worker)."""
+    X, y, _, fit_rows, val_rows = _split(train_path, seed)
+    rows = np.sort(fit_rows[:n_rows])
+    t0 = time.perf_counter()
+    with threadpool_limits(1):
+        est = build_estimator(family, params).fit(_dense(family, X[rows]), y[rows])
+        y_prob = est.predict_proba(_dense(family, X[val_rows]))[:, 1]
+    metrics = offline_metrics(y[val_rows], y_prob)
+    return {
+        "family": family,
+        "params": json.dumps(params),
+        "rows": int(len(rows)),
+        "seconds": time.perf_counter() - t0,
+        "auc": float(metrics["auc"]),
+        "log_loss": float(metrics["log_loss"]),
+    }
+
+def successive_halving(family, configs, pool, n_fit, train_path=TRAIN, eta=ETA):
+    """Trial log for every rung; the last rung holds the winner, trained on all n_fit rows."""
+    n_rungs = 1 + int(math.floor(math.log(len(configs), eta) + 1e-9))
+    trials, alive = [], list(configs)
+    for rung in range(n_rungs):
+        n_rows = max(1, int(n_fit * eta ** (rung - n_rungs + 1)))
+        results = list(pool.map(run_trial, [family] * len(alive), alive, [n_rows] * len(alive),
+                                [train_path] * len(alive)))
+        for r in results:
+            r["rung"] = rung
+            print(f"  {family} rung {rung} rows={n_rows} {r['params']} "
+                  f"auc={r['auc']:.4f} log_loss={r['log_loss']:.4f} ({r['seconds']:.1f}s)")
+        trials.extend(results)
+        keep = max(1, len(alive) // eta)
+        ranked = sorted(range(len(alive)), key=lambda i: results[i][PRUNE_METRIC])
+        alive = [alive[i] for i in ranked[:keep]]
+    return trials, alive[0]
+
+def refit(family, params, train_path=TRAIN):
+    """Best configuration refit on all rows as a pipeline that scores DataFrames like the trainers' pickles."""
+    X, y, names = load_or_build(train_path)
+    est = build_estimator(family, params).fit(_dense(family, X), y)
+    steps = [("vec", ColumnarVectorizer.from_feature_names(names))]
+    if family == "gbt":
+        steps.append(("to_dense", FunctionTransformer(to_dense, accept_sparse=True).fit(X)))
+    return Pipeline(steps + [(family, wrap_if_sampled(est, load_sampling_rate()))])
+
+def tune_main(families=None, n_trials=N_TRIALS, n_jobs=None, train_path=TRAIN):
+    families = families or list(SEARCH_SPACES)
+    n_jobs = n_jobs or os.cpu_count() or 1
+    _, _, _, fit_rows, _ = _split(train_path, SEED)  # builds the cache entry once, before the workers map it
+
+    all_trials, best = [], {}
+    with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+        for family in families:
+            t0 = time.perf_counter()
+            trials, params = successive_halving(family, sample_configs(family, n_trials), pool,
+                                                len(fit_rows), train_path)
+            all_trials.extend(trials)
+            winner = [t for t in trials if t["params"] == json.dumps(params)][-1]  # its largest rung
+
+            path = MODEL_OUT.format(family=family)
+            joblib.dump(refit(family, params, train_path), path + ".tmp")
+            os.replace(path + ".tmp", path)
+            best[family] = {
+                "params": params,
+                "path": path,
+                "val_auc": winner["auc"],
+                "val_log_loss": winner["log_loss"],
+                "n_trials": len(trials),
+                "seconds": time.perf_counter() - t0,
+            }
+            print(f"✅ Tuned {family}: {params} (val AUC={winner['auc']:.4f}) -> {path}")
+
+    pd.DataFrame(all_trials).to_csv(TRIALS_CSV, index=False)
+    json.dump(best, open(BEST_JSON, "w"), indent=2)
+    print("📄 Trials logged to", TRIALS_CSV)
+    return best
+
+def tuned_candidates(best_json=BEST_JSON):
+    """{"<family>_tuned": model path} for the tuned models on disk (empty if tuning never ran)."""
+    try:
+        best = json.load(open(best_json))
+    except (FileNotFoundError, ValueError):
+        return {}
+    return {f"{family}_tuned": info["path"] for family, info in best.items() if os.path.exists(info["path"])}
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser()
+    ap.add_argument("families", nargs="*", help=f"subset of {list(SEARCH_SPACES)} (default: all)")
+    ap.add_argument("--trials", type=int, default=N_TRIALS)
+    ap.add_argument("--jobs", type=int, default=None, help="parallel trials (default: all cores)")
+    args = ap.parse_args()
+    tune_main(args.families or None, n_trials=args.trials, n_jobs=args.jobs)
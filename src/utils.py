@@ -11,6 +11,19 @@ def assign_user(user_id, pct_treatment=0.5, salt="ads_experiment"):
     val = hash_to_int(user_id, salt) % 10000 / 10000.0  # 0..1
     return "treatment" if val < pct_treatment else "control"
 
+def file_digest(path, n_bytes=None, block=1 << 20):
+    """sha256 hex digest of a file's contents (only its first n_bytes when given)."""
+    h = hashlib.sha256()
+    left = float("inf") if n_bytes is None else n_bytes
+    with open(path, "rb") as f:
+        while left > 0:
+            chunk = f.read(int(min(block, left)))
+            if not chunk:
+                break
+            h.update(chunk)
+            left -= len(chunk)
+    return h.hexdigest()
+
 def save_json(path, obj):
     with open(path, "w") as f:
         json.dump(obj, f, indent=2)
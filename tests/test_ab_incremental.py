@@ -0,0 +1,71 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from src.ab_incremental import empty_state, update_from_csv, update_from_dataset
+
+def _impressions(n, seed):
+    rng = np.random.default_rng(seed)
+    clicked = (rng.random(n) < 0.1).astype(int)
+    return pd.DataFrame({
+        "impression_id": [f"imp_{seed}_{i}" for i in range(n)],
+        "user_id": rng.integers(0, 300, n),
+        "clicked": clicked,
+        "revenue": np.where(clicked == 1, np.round(rng.uniform(0.1, 3.0, n), 2), 0.0),
+    })
+
+def _full_state(df, tmp_path):
+    path = str(tmp_path / "full.csv")
+    df.to_csv(path, index=False)
+    state = empty_state()
+    update_from_csv(state, path)
+    return state
+
+def _assert_same_arms(a, b):
+    assert a["arms"].keys() == b["arms"].keys()
+    for arm, st in a["arms"].items():
+        assert st["impressions"] == b["arms"][arm]["impressions"]
+        assert st["clicks"] == b["arms"][arm]["clicks"]
+        assert st["revenue"] == pytest.approx(b["arms"][arm]["revenue"])
+        assert st["revenue_sq"] == pytest.approx(b["arms"][arm]["revenue_sq"])
+
+def test_append_between_runs_matches_full_read(tmp_path):
+    first, second = _impressions(700, 1), _impressions(500, 2)
+    path = str(tmp_path / "log.csv")
+    first.to_csv(path, index=False)
+    state = empty_state()
+    assert update_from_csv(state, path, block_bytes=1000) == 700
+    second.to_csv(path, mode="a", header=False, index=False)
+    assert update_from_csv(state, path, block_bytes=1000) == 500
+    assert update_from_csv(state, path) == 0
+
+    _assert_same_arms(state, _full_state(pd.concat([first, second]), tmp_path))
+    assert state["sources"][path] == {"rows": 1200, "bytes": os.path.getsize(path)}
+
+def test_partial_last_line_waits_for_next_readout(tmp_path):
+    df = _impressions(300, 3)
+    text = df.to_csv(index=False)
+    cut = text.rindex("\n", 0, len(text) - 1) + 5  # a few bytes into the last row
+    path = str(tmp_path / "log.csv")
+    with open(path, "w") as f:
+        f.write(text[:cut])
+    state = empty_state()
+    assert update_from_csv(state, path) == 299
+    with open(path, "a") as f:
+        f.write(text[cut:])
+    assert update_from_csv(state, path) == 1
+    _assert_same_arms(state, _full_state(df, tmp_path))
+
+def test_switch_from_parquet_watermark_to_csv(tmp_path):
+    pytest.importorskip("pyarrow")
+    first, second = _impressions(400, 4), _impressions(200, 5)
+    path = str(tmp_path / "log.csv")
+    first.to_parquet(str(tmp_path / "log.parquet"), index=False)
+    state = empty_state()
+    assert update_from_dataset(state, path) == 400
+    assert "bytes" not in state["sources"][path]
+
+    os.remove(tmp_path / "log.parquet")
+    pd.concat([first, second]).to_csv(path, index=False)
+    assert update_from_dataset(state, path) == 200
+    _assert_same_arms(state, _full_state(pd.concat([first, second]), tmp_path))
@@ -0,0 +1,29 @@
+import numpy as np
+from sklearn.metrics import roc_auc_score, log_loss
+from src.array_eval import evaluate, StreamingEvaluator
+
+def test_evaluate_matches_sklearn_weights_and_streaming():
+    rng = np.random.default_rng(0)
+    y = (rng.random(3000) < 0.05).astype(int)
+    p = np.round(np.clip(0.03 + 0.04 * y * rng.random(3000) + 0.02 * rng.random(3000), 0, 1), 3)  # many ties
+
+    e = evaluate(y, p)
+    assert np.isclose(e["auc"], roc_auc_score(y, p)) and np.isclose(e["log_loss"], log_loss(y, p))
+    assert sum(b["count"] for b in e["calibration"]) == 3000
+
+    w = rng.integers(1, 4, 3000)  # integer weights == repeated rows
+    rep = evaluate(np.repeat(y, w), np.repeat(p, w))
+    weighted = evaluate(y, p, w=w)
+    assert np.isclose(weighted["auc"], rep["auc"]) and np.isclose(weighted["brier"], rep["brier"])
+
+    stream = StreamingEvaluator()
+    for i in range(0, 3000, 1000):
+        stream.merge(StreamingEvaluator().update(y[i:i + 1000], p[i:i + 1000]))
+    r = stream.result()
+    assert r["rows"] == 3000 and np.isclose(r["log_loss"], e["log_loss"])
+    assert abs(r["auc"] - e["auc"]) < 1e-3
+
+def test_calibration_counts_are_plain_ints():
+    from src.eval_utils import calibration_table
+    rows = calibration_table(np.array([0, 1, 0, 1, 0]), np.array([0.1, 0.9, 0.3, 0.7, 0.5]), bins=2)
+    assert [r["count"] for r in rows] == [3, 2] and all(type(r["count"]) is int for r in rows)
@@ -0,0 +1,52 @@
+import asyncio
+import numpy as np
+import pandas as pd
+import pytest
+from joblib import dump
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+from src.batch_scoring import score_csv
+from src.columnar import ColumnarVectorizer
+from src.compact_model import save_compact
+import src.inference_api as api
+
+def _frame(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "impression_id": [f"imp_{i}" for i in range(n)],
+        "age_bucket": rng.choice(["18-24", "25-34", "45+"], n),
+        "geo": rng.choice(["US", "IN", "UK"], n),
+        "interests": rng.choice(["tech", "sports", "fashion"], n),
+        "creative_type": rng.choice(["video", "banner", "native"], n),
+        "device": rng.choice(["mobile", "desktop"], n),
+        "hour_of_day": rng.integers(0, 24, n),
+        "bid": rng.uniform(0.1, 2.0, n).round(3),
+    })
+
+@pytest.fixture
+def saved_model(tmp_path):
+    df = _frame(400)
+    y = np.random.default_rng(1).random(len(df)) < 0.2
+    pipe = Pipeline([("vec", ColumnarVectorizer()), ("lr", LogisticRegression(max_iter=200))]).fit(df, y)
+    path = str(tmp_path / "lr.pkl")
+    dump(pipe, path)
+    return path
+
+def predict_ctr(row):
+    req = api.RequestBody(user_features={c: row[c] for c in api.USER_COLUMNS + ["hour_of_day"]},
+                          ad_features={"creative_type": row["creative_type"], "bid": row["bid"]})
+    return asyncio.run(api.predict(req))["pctr"]
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_chunked_scoring_matches_predict_ctr(saved_model, tmp_path, monkeypatch, compact):
+    monkeypatch.setattr(api, "model", api.load_serving_model(saved_model)[0])
+    data = _frame(150, seed=2)
+    data.to_csv(tmp_path / "imps.csv", index=False)
+    model_path = save_compact(api.model, str(tmp_path / "lr.npz")) if compact else saved_model
+
+    out = str(tmp_path / "scores.csv")
+    assert score_csv(str(tmp_path / "imps.csv"), model_path, out, chunksize=37) == 150
+    scored = pd.read_csv(out)
+    assert scored["impression_id"].tolist() == data["impression_id"].tolist()
+    expected = [predict_ctr(row) for row in data.to_dict("records")]
+    assert np.allclose(scored["pctr"], expected, rtol=0, atol=1e-12)
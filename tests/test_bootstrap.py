@@ -0,0 +1,25 @@
+import numpy as np
+import pytest
+from src.bootstrap import bootstrap_mean_diff_batched, PoissonBootstrap
+
+def test_batched_ci_independent_of_memory_cap():
+    rng = np.random.default_rng(3)
+    a = np.where(rng.random(4000) < 0.05, rng.uniform(0.1, 3.0, 4000).round(2), 0.0)
+    b = rng.normal(0.1, 1.0, 3000)
+    big = bootstrap_mean_diff_batched(a, b, iters=300, memory_cap_mb=64)
+    small = bootstrap_mean_diff_batched(a, b, iters=300, memory_cap_mb=0.01)
+    assert np.allclose(big["ci"], small["ci"], rtol=0, atol=1e-12)
+    assert big["ci"][0] < a.mean() - b.mean() < big["ci"][1]
+
+def test_poisson_independent_of_chunking():
+    values = np.random.default_rng(5).exponential(size=5000)
+    whole = PoissonBootstrap(iters=200).update("treatment", values).update("control", values[::-1])
+    chunked = PoissonBootstrap(iters=200)
+    for start in range(0, len(values), 777):
+        chunked.update("treatment", values[start:start + 777])
+        chunked.update("control", values[::-1][start:start + 777])
+    assert whole.mean_diff() == chunked.mean_diff()
+
+def test_empty_arm_is_rejected():
+    with pytest.raises(ValueError, match="both arms"):
+        bootstrap_mean_diff_batched(np.array([]), np.ones(10), iters=10)
@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction import DictVectorizer
+from src.columnar import ColumnarVectorizer
+from src.utils import prepare_dicts
+
+def _frame():
+    return pd.DataFrame({
+        "age_bucket": ["18-24", "25-34", "45+", "25-34"],
+        "geo": ["US", "IN", "UK", np.nan],
+        "interests": ["tech", "sports", "tech", "fashion"],
+        "creative_type": ["video", "banner", "native", "video"],
+        "device": ["mobile", "tablet", "desktop", "mobile"],
+        "hour_of_day": [0, 13, 22, 7],
+        "bid": [0.5, 1.25, 0.0, 2.0],
+    })
+
+def test_matches_dict_vectorizer():
+    train = _frame()
+    vec = DictVectorizer(sparse=True).fit(prepare_dicts(train))
+    col = ColumnarVectorizer().fit(train)
+    assert col.feature_names_ == vec.feature_names_
+
+    test = train.copy()
+    test.loc[0, "geo"] = "CN"  # unseen category is dropped
+    expected = vec.transform(prepare_dicts(test))
+    got = col.transform(test)
+    assert np.array_equal(expected.indptr, got.indptr)
+    assert np.array_equal(expected.indices, got.indices)
+    assert np.array_equal(expected.data, got.data)
+
+def test_ab_scoring_takes_columnar_path_and_surfaces_errors(monkeypatch):
+    import pytest
+    import src.ab_test
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import Pipeline
+    from src.ab_test import predict_pctr_from_model
+    from src.columnar import is_columnar, upgrade_pipeline
+
+    df = _frame()
+    pipe = Pipeline([("vec", DictVectorizer()), ("lr", LogisticRegression())]).fit(prepare_dicts(df), [0, 1, 0, 1])
+    assert is_columnar(upgrade_pipeline(pipe)) and not is_columnar(pipe)
+    assert np.allclose(predict_pctr_from_model(pipe, df), pipe.predict_proba(prepare_dicts(df))[:, 1])
+
+    def broken(pipe, df):
+        raise RuntimeError("columnar scoring bug")
+    monkeypatch.setattr(src.ab_test, "predict_in_batches", broken)
+    with pytest.raises(RuntimeError):
+        predict_pctr_from_model(pipe, df)  # no silent re-score through dicts
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import HistGradientBoostingClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import FunctionTransformer
+from src.columnar import ColumnarVectorizer
+from src.compact_model import save_compact, load_model
+from src.utils import prepare_dicts, to_dense
+
+def _frame(n=400):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "age_bucket": rng.choice(["18-24", "25-34", "45+"], n),
+        "geo": rng.choice(["US", "IN", "UK"], n),
+        "interests": rng.choice(["tech", "sports", "fashion"], n),
+        "creative_type": rng.choice(["video", "banner", "native"], n),
+        "device": rng.choice(["mobile", "desktop"], n),
+        "hour_of_day": rng.integers(0, 24, n),
+        "bid": rng.uniform(0.1, 2.0, n),
+    })
+    return df, rng.random(n) < 0.3
+
+def test_compact_matches_pipeline(tmp_path):
+    df, y = _frame()
+    pipe = Pipeline([("vec", ColumnarVectorizer()), ("lr", LogisticRegression(max_iter=200))]).fit(df, y)
+    model = load_model(save_compact(pipe, str(tmp_path / "lr.npz")))
+
+    test = df.head(50).copy()
+    test.loc[0, "geo"] = "CN"  # unseen category contributes nothing
+    assert np.allclose(model.predict_proba(test), pipe.predict_proba(test), rtol=0, atol=1e-12)
+    dicts = prepare_dicts(test)
+    assert np.allclose(model.predict_proba(dicts), pipe.predict_proba(dicts), rtol=0, atol=1e-12)
+
+def test_compact_trees_match_pipeline(tmp_path):
+    df, y = _frame(2000)
+    y = y | ((df.geo == "US") & (df.bid > 1.0))
+    pipe = Pipeline([
+        ("vec", ColumnarVectorizer()),
+        ("to_dense", FunctionTransformer(to_dense, accept_sparse=True)),
+        ("gbt", HistGradientBoostingClassifier(max_iter=30, early_stopping=False)),
+    ]).fit(df, y)
+    model = load_model(save_compact(pipe, str(tmp_path / "gbt.npz")))
+
+    test = df.head(200).copy()
+    test["geo"] = test["geo"].astype(object)
+    test.loc[0, "geo"] = "CN"
+    test.loc[1, "bid"] = np.nan
+    assert np.allclose(model.predict_proba(test), pipe.predict_proba(test), rtol=0, atol=1e-12)
+    dicts = prepare_dicts(test)
+    assert np.allclose(model.predict_proba(dicts), pipe.predict_proba(dicts), rtol=0, atol=1e-12)
+
+def test_downsampled_models_are_recalibrated_and_exported(tmp_path):
+    from src.sampling import DownsampledClassifier, correct_proba
+    df, y = _frame()
+    vec = ColumnarVectorizer().fit(df)
+    X = vec.transform(df)
+    for name, clf, steps in [
+        ("lr", LogisticRegression(max_iter=200).fit(X, y), []),
+        ("gbt", HistGradientBoostingClassifier(max_iter=20).fit(X.toarray(), y),
+         [("to_dense", FunctionTransformer(to_dense, accept_sparse=True).fit(X))]),
+    ]:
+        raw = Pipeline([("vec", vec)] + steps + [(name, clf)]).predict_proba(df)[:, 1]
+        pipe = Pipeline([("vec", vec)] + steps + [(name, DownsampledClassifier(clf, 0.25))])
+        p = pipe.predict_proba(df)[:, 1]
+        assert np.allclose(p, correct_proba(raw, 0.25)) and (p < raw).all()
+        model = load_model(save_compact(pipe, str(tmp_path / f"{name}.npz")))
+        assert np.allclose(model.predict_proba(df)[:, 1], p)
@@ -0,0 +1,28 @@
+from src.dag_executor import run_dag
+
+TASKS = '''
+import os
+def make_a(out):
+    open(out, "w").write("a")
+def make_b(src, out):
+    open(out, "w").write(open(src).read() + "b")
+'''
+
+def test_dag_runs_in_order_and_skips_up_to_date(tmp_path, monkeypatch):
+    (tmp_path / "dag_tasks_mod.py").write_text(TASKS)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    a, b = str(tmp_path / "a.txt"), str(tmp_path / "b.txt")
+    dag = {
+        "b": {"deps": ["a"], "inputs": [a], "outputs": [b], "kwargs": {"src": a, "out": b}},
+        "a": {"deps": [], "inputs": [], "outputs": [a], "kwargs": {"out": a}},
+    }
+    stages = {"a": ("dag_tasks_mod", "make_a"), "b": ("dag_tasks_mod", "make_b")}
+    state = str(tmp_path / "state.json")
+
+    assert run_dag(dag, stages, n_jobs=2, state_path=state) == {"a": "ran", "b": "ran"}
+    assert open(b).read() == "ab"
+    assert run_dag(dag, stages, n_jobs=2, state_path=state) == {"a": "cached", "b": "cached"}
+
+    open(b, "w").write("tampered")  # changed output -> only that stage reruns
+    assert run_dag(dag, stages, n_jobs=2, state_path=state) == {"a": "cached", "b": "ran"}
+    assert open(b).read() == "ab"
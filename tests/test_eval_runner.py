@@ -0,0 +1,17 @@
+import numpy as np
+from sklearn.metrics import confusion_matrix
+from src.eval_runner import summarize, top_overlap
+
+def test_summary_and_top_overlap():
+    rng = np.random.default_rng(1)
+    y = (rng.random(500) < 0.3).astype(int)
+    scores = np.vstack([rng.random(500), rng.random(500)])
+    scores = np.vstack([scores, scores[0] * 0.5])  # same ranking as model 0
+
+    s = summarize(y, scores[0])
+    assert (s["confusion"] == confusion_matrix(y, scores[0] >= 0.5)).all()
+    assert sum(b["count"] for b in s["calibration"]) == 500
+
+    overlap = top_overlap(scores)
+    assert np.allclose(np.diag(overlap), 1.0) and np.isclose(overlap[0, 2], 1.0)
+    assert np.allclose(overlap, overlap.T) and overlap[0, 1] < 0.5
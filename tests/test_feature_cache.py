@@ -0,0 +1,63 @@
+import gc
+import pytest
+from src.feature_cache import LRUTTLCache, CachedFeatureStore, feature_store as fs  # the store the cache reads
+
+class FakeClock:
+    def __init__(self):
+        self.t = 0.0
+    def __call__(self):
+        return self.t
+
+def test_lru_eviction_and_ttl_expiry():
+    clock = FakeClock()
+    cache = LRUTTLCache(max_entries=2, ttl=10, clock=clock)
+    cache.put(1, "a")
+    cache.put(2, "b")
+    assert cache.get(1) == "a"  # 1 is now most recently used
+    cache.put(3, "c")
+    assert cache.get(2, None) is None and cache.get(1) == "a" and cache.get(3) == "c"
+    clock.t = 10.5
+    assert cache.get(1, None) is None
+    assert cache.stats()["evictions"] == 1 and cache.stats()["expirations"] == 1
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(fs, "DB_PATH", str(tmp_path / "features.sqlite"))
+    monkeypatch.setattr(fs, "_write_listeners", [])
+    cached = CachedFeatureStore(LRUTTLCache())
+    yield cached
+    cached.close()
+
+def test_writes_invalidate_cached_entries(store):
+    fs.write_features(1, {"geo": "US"})
+    assert store.read_features(1) == {"geo": "US"}
+    assert store.read_features_many([1, 2]) == {1: {"geo": "US"}}
+    fs.write_features(1, {"geo": "IN"})
+    fs.write_features(2, {"geo": "UK"})
+    assert store.read_features(1) == {"geo": "IN"}
+    assert store.read_features_many([2]) == {2: {"geo": "UK"}}
+
+def test_write_during_a_miss_is_not_overwritten_by_the_stale_read(store, monkeypatch):
+    fs.write_features(1, {"geo": "US"})
+    read = fs.read_features
+
+    def racing_read(user_id, as_of=None):
+        stale = read(user_id, as_of)
+        fs.write_features(user_id, {"geo": "IN"})  # lands after the read, before the cache fill
+        return stale
+
+    monkeypatch.setattr(fs, "read_features", racing_read)
+    assert store.read_features(1) == {"geo": "US"}
+    monkeypatch.setattr(fs, "read_features", read)
+    assert store.read_features(1) == {"geo": "IN"}
+
+def test_discarded_caches_stop_listening(store):
+    before = len(fs._write_listeners)
+    extra = CachedFeatureStore(LRUTTLCache())
+    assert len(fs._write_listeners) == before + 1
+    extra.close()
+    assert len(fs._write_listeners) == before
+    CachedFeatureStore(LRUTTLCache())
+    gc.collect()
+    fs.write_features(1, {"geo": "US"})
+    assert len(fs._write_listeners) == before
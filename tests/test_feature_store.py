@@ -0,0 +1,54 @@
+import pandas as pd
+import pytest
+import src.feature_store as fs
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(fs, "DB_PATH", str(tmp_path / "features.sqlite"))
+    return fs
+
+def _backfill(store, tmp_path, rows):
+    path = str(tmp_path / "imps.csv")
+    pd.DataFrame(rows, columns=["user_id", "timestamp", "age_bucket", "geo", "interests"]).to_csv(path, index=False)
+    return store.backfill_from_csv(path)
+
+def test_backfill_keeps_one_snapshot_per_user_per_day(store, tmp_path):
+    n = _backfill(store, tmp_path, [
+        (1, "2025-12-09T08:00:00", "18-24", "US", "tech"),
+        (1, "2025-12-09T20:00:00", "25-34", "US", "tech"),
+        (1, "2025-12-09T11:00:00", "18-24", "IN", "tech"),
+        (1, "2025-12-10T09:00:00", "35-44", "UK", "sports"),
+        (2, "2025-12-09T10:00:00", "45+", "CN", "finance"),
+    ])
+    assert n == 3
+    assert store._conn().execute("SELECT COUNT(*) FROM features").fetchone()[0] == 3
+    # a later backfill of an earlier hour of the same day does not replace the newer snapshot
+    _backfill(store, tmp_path, [(1, "2025-12-09T09:00:00", "45+", "CN", "fashion")])
+    assert store.read_features(1, as_of="2025-12-09T23:59:59")["age_bucket"] == "25-34"
+
+def test_point_in_time_reads(store, tmp_path):
+    _backfill(store, tmp_path, [
+        (1, "2025-12-09T20:00:00", "18-24", "US", "tech"),
+        (1, "2025-12-11T20:00:00", "25-34", "US", "tech"),
+        (1, "2999-01-01T00:00:00", "45+", "CN", "finance"),  # future-dated
+    ])
+    assert store.read_features(1, as_of="2025-12-09T19:00:00") is None
+    assert store.read_features(1, as_of="2025-12-10T00:00:00")["age_bucket"] == "18-24"
+    assert store.read_features(1)["age_bucket"] == "25-34"  # the future snapshot is not visible yet
+    assert store.read_features(1, as_of="2999-06-01")["age_bucket"] == "45+"
+    assert store.read_features_many([1], as_of="2025-12-10")[1]["age_bucket"] == "18-24"
+    assert store.read_features_many([1])[1]["age_bucket"] == "25-34"
+
+def test_write_then_read_and_unknown_user(store, tmp_path):
+    _backfill(store, tmp_path, [(1, "2025-12-09T20:00:00", "18-24", "US", "tech")])
+    store.write_features(1, {"age_bucket": "35-44", "geo": "UK", "interests": "sports",
+                             "last_seen": "2025-01-01T00:00:00"})
+    assert store.read_features(1)["age_bucket"] == "35-44"
+    assert store.read_features(999) is None
+    assert store.read_features_many([1, 999]).keys() == {1}
+
+def test_timezone_aware_as_of_compares_with_stored_utc(store, tmp_path):
+    _backfill(store, tmp_path, [(1, "2025-12-09T20:00:00", "18-24", "US", "tech")])
+    assert store.read_features(1, as_of="2025-12-09T21:30:00+02:00") is None  # 19:30 UTC
+    assert store.read_features(1, as_of="2025-12-09T20:30:00+00:00")["age_bucket"] == "18-24"
+    assert store._now() > "2025-12-09T20:00:00" and "+" not in store._now()
@@ -0,0 +1,73 @@
+import os
+import subprocess
+import sys
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+def test_import_does_not_load_model_libraries():
+    code = ("import sys, inference_api; "
+            "print(','.join(m for m in ('joblib', 'pandas', 'sklearn', 'scipy') if m in sys.modules))")
+    out = subprocess.run([sys.executable, "-c", code], cwd=SRC, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == ""
+
+def test_batch_endpoint_matches_predict_ctr(monkeypatch):
+    import asyncio
+    import numpy as np
+    import pandas as pd
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import Pipeline
+    from src.columnar import ColumnarVectorizer
+    import src.inference_api as api
+
+    rng = np.random.default_rng(0)
+    n = 300
+    df = pd.DataFrame({
+        "age_bucket": rng.choice(["18-24", "25-34"], n), "geo": rng.choice(["US", "IN"], n),
+        "interests": rng.choice(["tech", "sports"], n), "creative_type": rng.choice(["video", "banner", "native"], n),
+        "device": rng.choice(["mobile", "desktop"], n), "hour_of_day": rng.integers(0, 24, n),
+        "bid": rng.uniform(0.1, 2.0, n),
+    })
+    pipe = Pipeline([("vec", ColumnarVectorizer()), ("lr", LogisticRegression(max_iter=200))])
+    user = {"age_bucket": "25-34", "geo": "US", "interests": "tech", "device": "mobile", "hour_of_day": 20}
+    ads = [{"ad_id": i, "creative_type": c, "bid": b} for i, (c, b) in
+           enumerate(zip(["video", "banner", "native", "video"], [0.4, 1.5, 0.9, 2.0]))]
+
+    for m in (None, pipe.fit(df, rng.random(n) < 0.2)):  # rule-based fallback, then a fitted model
+        monkeypatch.setattr(api, "model", m)
+        single = [asyncio.run(api.predict(api.RequestBody(user_features=user, ad_features=ad)))["pctr"]
+                  for ad in ads]
+        out = api.predict_batch(api.BatchRequestBody(user_features=user, ads=ads, top_k=2, rank_by="ecpm"))
+        assert np.allclose(out["pctr"], single, rtol=0, atol=1e-12)
+        ecpm = np.array(single) * [ad["bid"] for ad in ads]
+        assert [t["index"] for t in out["top"]] == list(np.argsort(-ecpm)[:2])
+    assert api.predict_batch(api.BatchRequestBody(user_features=user, ads=[]))["pctr"] == []
+
+def test_shared_registry_versions_are_pruned(tmp_path, monkeypatch):
+    from collections import OrderedDict
+    import numpy as np
+    from joblib import dump
+    from sklearn.feature_extraction import DictVectorizer
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import Pipeline
+    from src import model_registry
+    from src.shared_model import KEEP_VERSIONS
+    import src.inference_api as api
+
+    monkeypatch.chdir(tmp_path)  # models/shared and the registry live under tmp_path
+    for name, value in [("SHARED_MODEL", True), ("MODEL_REGISTRY", "registry"), ("model", None),
+                        ("serving_version", None), ("warm_models", OrderedDict()), ("failed_versions", set())]:
+        monkeypatch.setattr(api, name, value)
+
+    rng = np.random.default_rng(0)
+    X = [{"age=" + rng.choice(["18-24", "25-34"]): 1, "hour": int(h)} for h in rng.integers(0, 24, 200)]
+    for i in range(KEEP_VERSIONS + 3):
+        pipe = Pipeline([("vec", DictVectorizer()), ("lr", LogisticRegression())]).fit(X, rng.random(200) < 0.3)
+        dump(pipe, f"m{i}.pkl")
+        model_registry.promote(model_registry.register(f"m{i}.pkl", f"m{i}", registry_dir="registry"),
+                               registry_dir="registry")
+        assert api.sync_registry()
+        published = os.listdir(os.path.join("models", "shared"))
+        assert len(published) <= max(KEEP_VERSIONS, api.WARM_VERSIONS)
+        manifest = model_registry.load_manifest("registry")
+        assert {manifest["versions"][v]["sha256"] for v in api.warm_models} <= set(published)
+    assert api.serving_version == model_registry.current_version("registry")
@@ -0,0 +1,22 @@
+import os
+import pandas as pd
+from src.matrix_cache import load_or_build, _entries
+
+def test_matrix_cache_hits_and_evicts(tmp_path):
+    path = str(tmp_path / "rows.csv")
+    pd.DataFrame({
+        "age_bucket": ["18-24", "25-34"], "geo": ["US", "IN"], "interests": ["tech", "sports"],
+        "creative_type": ["image", "video"], "device": ["mobile", "desktop"],
+        "hour_of_day": [3, 20], "bid": [0.5, 1.0], "clicked": [0, 1],
+    }).to_csv(path, index=False)
+    cache = str(tmp_path / "cache")
+
+    X, y, names = load_or_build(path, cache_dir=cache)
+    assert X.shape == (2, len(names)) and list(y) == [0, 1]
+    X2, _, names2 = load_or_build(path, cache_dir=cache)
+    assert names2 == names and (X2 != X).nnz == 0
+    assert len(_entries(cache)) == 1
+
+    X3, _, _ = load_or_build(path, vocabulary=names[:3], cache_dir=cache, max_mb=0)
+    assert X3.shape == (2, 3)
+    assert len(_entries(cache)) == 1  # the older entry was evicted
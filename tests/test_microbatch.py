@@ -0,0 +1,55 @@
+import asyncio
+import threading
+import pytest
+from src.microbatch import MicroBatcher
+
+def _run(batcher, items):
+    async def main():
+        await batcher.start()
+        try:
+            return await asyncio.wait_for(
+                asyncio.gather(*(batcher.submit(i) for i in items), return_exceptions=True), 5)
+        finally:
+            await batcher.stop()
+    return asyncio.run(main())
+
+def test_concurrent_submits_are_coalesced():
+    sizes = []
+    def score(items):
+        sizes.append(len(items))
+        return [2 * x for x in items]
+    batcher = MicroBatcher(score, max_batch=8, max_wait_ms=50)
+    assert _run(batcher, range(20)) == [2 * x for x in range(20)]
+    assert sum(sizes) == 20 and max(sizes) == 8 and len(sizes) < 20
+    assert batcher.metrics()["items"] == 20
+
+def test_score_errors_reach_every_caller():
+    def score(items):
+        raise RuntimeError("model exploded")
+    batcher = MicroBatcher(score, max_batch=4, max_wait_ms=20)
+    results = _run(batcher, range(6))
+    assert all(isinstance(r, RuntimeError) and str(r) == "model exploded" for r in results)
+    assert batcher.metrics()["errors"] >= 2
+
+def test_short_result_list_fails_the_whole_batch():
+    batcher = MicroBatcher(lambda items: items[:-1], max_batch=4, max_wait_ms=20)
+    results = _run(batcher, range(4))
+    assert all(isinstance(r, ValueError) for r in results)
+
+def test_stop_fails_the_batch_in_flight():
+    started, release = threading.Event(), threading.Event()
+    def score(items):
+        started.set()
+        release.wait(5)
+        return items
+
+    async def main():
+        batcher = MicroBatcher(score, max_batch=4, max_wait_ms=1)
+        await batcher.start()
+        pending = asyncio.ensure_future(batcher.submit(1))
+        await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+        await batcher.stop()
+        release.set()
+        with pytest.raises(RuntimeError, match="stopped"):
+            await asyncio.wait_for(pending, 1)
+    asyncio.run(main())
@@ -0,0 +1,24 @@
+import pytest
+from src import model_registry as reg
+
+def test_register_promote_rollback(tmp_path):
+    root = str(tmp_path / "registry")
+    a, b = tmp_path / "a.pkl", tmp_path / "b.pkl"
+    a.write_bytes(b"model a")
+    b.write_bytes(b"model b")
+
+    va = reg.register(str(a), "a", {"auc": 0.6}, registry_dir=root)
+    vb = reg.register(str(b), "b", registry_dir=root)
+    assert (va, vb) == ("v0001", "v0002")
+    assert reg.register(str(a), "a again", registry_dir=root) == va  # same bytes -> same version
+
+    reg.promote(va, registry_dir=root)
+    reg.promote(vb, registry_dir=root)
+    assert reg.current_version(root) == vb
+    a.write_bytes(b"changed after registering")  # artifacts are copies
+    assert open(reg.artifact_path(va, root), "rb").read() == b"model a"
+
+    assert reg.rollback(root) == va
+    assert reg.current_version(root) == va
+    with pytest.raises(RuntimeError):
+        reg.rollback(root)
@@ -0,0 +1,22 @@
+import numpy as np
+import pandas as pd
+from src.monitoring import run_monitoring
+from src.sampling import negative_downsample, save_sampling_info
+
+def test_downsampled_baseline_does_not_alert(tmp_path):
+    rng = np.random.default_rng(0)
+    n = 20000
+    raw = pd.DataFrame({
+        "age_bucket": rng.choice(["18-24", "25-34", "35-44", "45+"], n, p=[0.4, 0.3, 0.2, 0.1]),
+        "clicked": (rng.random(n) < 0.03).astype(int),
+    })
+    raw.to_csv(tmp_path / "raw.csv", index=False)
+    train = negative_downsample(raw, rate=0.1)
+    train.to_csv(tmp_path / "train.csv", index=False)
+    save_sampling_info(0.1, len(raw), len(train), path=str(tmp_path / "sampling.json"))
+
+    report = run_monitoring(str(tmp_path / "train.csv"), str(tmp_path / "raw.csv"),
+                            str(tmp_path / "monitoring.json"), str(tmp_path / "sampling.json"))
+    assert report["alerts"] == []
+    assert abs(report["checks"]["base_ctr"] - report["checks"]["curr_ctr"]) < 0.005
+    assert report["checks"]["age_l1"] < 0.05
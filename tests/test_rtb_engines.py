@@ -0,0 +1,22 @@
+import numpy as np
+import pandas as pd
+from src.rtb_simulator import run_rtb_sim
+
+def test_vectorized_matches_loop(tmp_path):
+    rng = np.random.default_rng(0)
+    n = 3000
+    pd.DataFrame({
+        "impression_id": [f"imp_{i}" for i in range(n)],
+        "age_bucket": rng.choice(["18-24", "25-34", "35-44", "45+"], n),
+        "interests": rng.choice(["sports", "tech", "finance"], n),
+        "creative_type": rng.choice(["banner", "video", "native"], n),
+        "hour_of_day": rng.integers(0, 24, n),
+        "ad_id": rng.integers(0, 50, n),
+        "advertiser_id": rng.integers(0, 12, n),
+    }).to_csv(tmp_path / "imps.csv", index=False)
+
+    kw = dict(data_path=str(tmp_path / "imps.csv"), model_path=str(tmp_path / "missing.pkl"), seed=7)
+    loop = run_rtb_sim(out_json=str(tmp_path / "loop.json"), engine="loop", **kw)
+    vec = run_rtb_sim(out_json=str(tmp_path / "vec.json"), engine="vectorized", block_size=16, **kw)
+    assert loop == vec
+    assert loop["total_impressions_served"] > 0
@@ -0,0 +1,23 @@
+import itertools
+import numpy as np
+import pandas as pd
+from src.data_generator import AGES, INTERESTS, CREATIVES, base_ctr, base_ctr_array
+from src.scale_generator import generate
+
+def test_base_ctr_array_matches_scalar():
+    combos = list(itertools.product(AGES, INTERESTS, CREATIVES, range(24)))
+    age, interest, creative, hour = map(list, zip(*combos))
+    expected = [base_ctr(*c) for c in combos]
+    assert (base_ctr_array(pd.Categorical(age), pd.Series(interest), creative, hour) == expected).all()
+
+def test_shards_are_deterministic_and_cover_all_ids(tmp_path):
+    kw = dict(rows=2500, shard_rows=1000, block_rows=400, days=3, skew=0.7, fmt="csv")
+    a = generate(out_dir=str(tmp_path / "a"), n_jobs=1, **kw)
+    b = generate(out_dir=str(tmp_path / "b"), n_jobs=2, **kw)
+    assert len(a) == 3
+    da = pd.concat(map(pd.read_csv, a), ignore_index=True)
+    db = pd.concat(map(pd.read_csv, b), ignore_index=True)
+    assert da.equals(db)
+    assert (da.impression_id == [f"imp_{i}" for i in range(2500)]).all()
+    assert da.timestamp.str[:10].nunique() == 3
+    assert (pd.to_datetime(da.timestamp).dt.hour == da.hour_of_day).all()
@@ -0,0 +1,22 @@
+import os
+import joblib
+import numpy as np
+from src.shared_model import SharedModel
+
+def test_shared_model_maps_and_hot_reloads(tmp_path):
+    src = tmp_path / "model.pkl"
+    joblib.dump({"w": np.arange(1000.0)}, src)
+    shared = SharedModel(str(src), joblib.load, shared_dir=str(tmp_path / "shared"))
+    assert shared.refresh()
+    assert isinstance(shared.model["w"], np.memmap)
+    first = shared.version
+    assert not shared.refresh()  # unchanged source
+
+    joblib.dump({"w": np.arange(1000.0) * 2}, str(src) + ".tmp")
+    os.replace(str(src) + ".tmp", src)
+    assert shared.refresh()
+    assert shared.version != first and shared.model["w"][1] == 2.0
+
+    src.write_bytes(b"not a pickle")  # broken update keeps the current model
+    assert not shared.refresh()
+    assert shared.model["w"][1] == 2.0
@@ -0,0 +1,32 @@
+import numpy as np
+from sklearn.metrics import roc_auc_score
+from src.significance import delong, paired_tests, select_model
+
+def test_delong_and_selection():
+    rng = np.random.default_rng(0)
+    y = (rng.random(3000) < 0.1).astype(int)
+    strong = rng.random(3000) * 0.5 + y * 0.3
+    weak = np.round(rng.random(3000) * 0.5 + y * 0.05, 2)  # ties
+    scores = np.vstack([weak, strong, weak * 0.9])
+
+    aucs, cov = delong(y, scores)
+    assert np.allclose(aucs, [roc_auc_score(y, s) for s in scores])
+    assert np.allclose(cov, cov.T) and (np.diag(cov) > 0).all()
+
+    tests = paired_tests(y, scores, ["weak", "strong", "weak_copy"], reference="weak")
+    assert tests["strong"]["auc_p"] < 0.05 and tests["strong"]["auc_diff_ci"][0] > 0
+    assert select_model(tests, "weak") == ("strong", "strong")
+
+    tests = paired_tests(y, scores[[0, 2]], ["weak", "weak_copy"], reference="weak")
+    assert tests["weak_copy"]["auc_p"] == 1.0  # same ranking: nothing to promote
+    assert select_model(tests, "weak") == ("weak", "weak_copy")
+
+def test_holm_correction_across_challengers():
+    from src.significance import holm
+    assert np.allclose(holm([0.01, 0.04, 0.03]), [0.03, 0.06, 0.06])
+    tests = {"ref": {"auc": 0.6, "auc_diff": 0.0, "auc_p": 1.0, "log_loss_diff": 0.0, "log_loss_p": 1.0}}
+    for i, p in enumerate([0.03, 0.5, 0.6, 0.7]):
+        tests[f"c{i}"] = {"auc": 0.61 + i / 1000, "auc_diff": 0.01, "auc_p": p, "log_loss_diff": 0.0, "log_loss_p": 1.0}
+    # p=0.03 is significant on its own but not after correcting for four challengers
+    assert select_model(tests, "ref") == ("ref", "c3")
+    assert tests["c0"]["auc_p_holm"] == 0.12
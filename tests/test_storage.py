@@ -0,0 +1,22 @@
+import os
+import pandas as pd
+import pytest
+from src.storage import read_dataset, resolve_path, write_dataset
+
+def test_resolve_path_prefers_the_newest_sibling(tmp_path):
+    pytest.importorskip("pyarrow")
+    csv = str(tmp_path / "train.csv")
+    df = pd.DataFrame({"user_id": [1, 2], "geo": ["US", "IN"]})
+    assert resolve_path(csv) == csv  # nothing written yet
+    write_dataset(df, csv, fmt="csv")
+    parquet = write_dataset(df.assign(user_id=[3, 4]), csv, fmt="parquet")
+    assert parquet == str(tmp_path / "train.parquet")
+
+    t = os.stat(csv).st_mtime_ns
+    os.utime(parquet, ns=(t, t))
+    assert resolve_path(csv) == parquet  # binary wins ties
+    os.utime(csv, ns=(t + 10**9, t + 10**9))
+    assert resolve_path(csv) == csv
+    assert read_dataset(csv)["user_id"].tolist() == [1, 2]
+    os.utime(parquet, ns=(t + 2 * 10**9, t + 2 * 10**9))
+    assert read_dataset(csv)["user_id"].tolist() == [3, 4]
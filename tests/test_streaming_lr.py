@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+from src.train_streaming_lr import train_incremental
+
+def _day(path, n, seed):
+    rng = np.random.default_rng(seed)
+    pd.DataFrame({
+        "age_bucket": rng.choice(["18-24", "25-34"], n), "geo": rng.choice(["US", "IN"], n),
+        "interests": rng.choice(["tech", "sports"], n), "creative_type": rng.choice(["image", "video"], n),
+        "device": rng.choice(["mobile", "desktop"], n), "hour_of_day": rng.integers(0, 24, n),
+        "bid": rng.uniform(0.1, 2.0, n), "clicked": rng.integers(0, 2, n),
+    }).to_csv(path, index=False)
+    return str(path)
+
+def test_warm_start_trains_only_on_new_files(tmp_path):
+    ckpt_path = str(tmp_path / "lr.ckpt")
+    day1, day2 = _day(tmp_path / "d1.csv", 250, 1), _day(tmp_path / "d2.csv", 120, 2)
+
+    ckpt = train_incremental([day1], checkpoint=ckpt_path, chunk_rows=100)
+    assert ckpt["rows_seen"] == 250
+    coef = ckpt["pipe"].named_steps["lr"].coef_.copy()
+
+    ckpt = train_incremental([day1, day2], checkpoint=ckpt_path, chunk_rows=100)
+    assert ckpt["rows_seen"] == 370  # day1 is not read again
+    assert not np.array_equal(coef, ckpt["pipe"].named_steps["lr"].coef_)
+
+    cold = train_incremental([day1, day2], checkpoint=ckpt_path, chunk_rows=100, warm_start=False)
+    assert cold["rows_seen"] == 370
+
+def test_append_trains_new_rows_and_rewrite_retrains(tmp_path):
+    ckpt_path = str(tmp_path / "lr.ckpt")
+    day1, day2 = _day(tmp_path / "d1.csv", 200, 1), _day(tmp_path / "d2.csv", 100, 2)
+    train_incremental([day1, day2], checkpoint=ckpt_path, chunk_rows=64)
+
+    extra = pd.read_csv(_day(tmp_path / "extra.csv", 30, 3))
+    extra.to_csv(day1, mode="a", header=False, index=False)
+    ckpt = train_incremental([day1, day2], checkpoint=ckpt_path, chunk_rows=64)
+    assert ckpt["rows_seen"] == 330  # only the 30 appended rows are new
+    assert ckpt["sources"][day1]["rows"] == 230
+
+    _day(day2, 100, 4)  # same size, different rows: a rewrite, not an append
+    ckpt = train_incremental([day1, day2], checkpoint=ckpt_path, chunk_rows=64)
+    assert ckpt["rows_seen"] == 330  # retrained from scratch on both files, no row counted twice
+    assert train_incremental([day1, day2], checkpoint=ckpt_path)["rows_seen"] == 330
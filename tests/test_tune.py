@@ -0,0 +1,18 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+import src.tune as tune
+
+def test_successive_halving_prunes_to_one_full_size_trial(monkeypatch):
+    def fake_trial(family, params, n_rows, train_path=None):
+        return {"family": family, "params": json.dumps(params), "rows": n_rows, "seconds": 0.0,
+                "auc": 0.5, "log_loss": params["alpha"]}  # smallest alpha wins
+    monkeypatch.setattr(tune, "run_trial", fake_trial)
+
+    configs = tune.sample_configs("dnn", 9)
+    assert len(configs) == 9 and len({json.dumps(c) for c in configs}) == 9
+    with ThreadPoolExecutor(2) as pool:
+        trials, best = tune.successive_halving("dnn", configs, pool, n_fit=900)
+
+    assert [sum(t["rung"] == r for t in trials) for r in range(3)] == [9, 3, 1]
+    assert [t["rows"] for t in trials if t["rung"] == 2] == [900]
+    assert best["alpha"] == min(c["alpha"] for c in configs)